@@ -1,6 +1,8 @@
 # app.py (nasa labas ng eservices_app)
 
 import os
+import click
+from sqlalchemy.exc import SQLAlchemyError
 from eservices_app import create_app, db
 # Import models *na kailangan lang* para sa CLI commands
 from eservices_app.models import User, Department, Service, School, CannedResponse, AuthorizedEmail
@@ -103,4 +105,218 @@ def create_admin():
         db.session.commit()
     print('Admin user created successfully! (Email: admin@deped.gov.ph, Password: password123)')
 
+
+@app.cli.command("archive-tickets")
+@click.option('--older-than-days', type=int, default=None, help='Archive resolved tickets older than this (default: ARCHIVE_AFTER_DAYS).')
+@click.option('--batch-size', type=int, default=None, help='Tickets per batch/transaction (default: ARCHIVE_BATCH_SIZE).')
+@click.option('--max-batches', type=int, default=None, help='Stop after this many batches (for off-peak windows).')
+@click.option('--dry-run', is_flag=True, help='Only count the tickets that would be archived.')
+def archive_tickets(older_than_days, batch_size, max_batches, dry_run):
+    """Moves old resolved tickets into the archive tables (pwedeng i-schedule sa cron)."""
+    from eservices_app.archive import archive_resolved_tickets, archive_cutoff
+    with app.app_context():
+        older_than_days = older_than_days if older_than_days is not None else app.config['ARCHIVE_AFTER_DAYS']
+        batch_size = batch_size or app.config['ARCHIVE_BATCH_SIZE']
+        cutoff = archive_cutoff(older_than_days)
+        if dry_run:
+            count = archive_resolved_tickets(older_than_days, dry_run=True)
+            print(f"{count} resolved ticket(s) posted before {cutoff:%Y-%m-%d} would be archived.")
+            return
+        print(f"Archiving resolved tickets posted before {cutoff:%Y-%m-%d} in batches of {batch_size}...")
+        total = archive_resolved_tickets(older_than_days, batch_size=batch_size, max_batches=max_batches)
+        print(f"Archive complete! {total} ticket(s) moved to the archive.")
+
+@app.cli.command("send-digests")
+@click.option('--dry-run', is_flag=True, help='Only list the recipients whose digest is due.')
+def send_digests(dry_run):
+    """Sends the due staff notification digests (i-schedule sa cron, e.g. bawat 5 minuto)."""
+    from eservices_app.notifications import due_digests, send_due_digests
+    # Walang request sa CLI, kaya NOTIFY_BASE_URL ang base ng links sa email
+    with app.app_context(), app.test_request_context(base_url=app.config['NOTIFY_BASE_URL']):
+        if dry_run:
+            due = due_digests()
+            for user, count in due:
+                print(f"{user.email}: {count} pending event(s)")
+            print(f"{len(due)} digest(s) due.")
+            return
+        digests, events = send_due_digests()
+        print(f"Sent {digests} digest(s) covering {events} event(s).")
+
+@app.cli.command("seed-load")
+@click.option('--users', 'num_users', type=int, default=1000, show_default=True, help='Number of requester users to create.')
+@click.option('--tickets', 'num_tickets', type=int, default=10000, show_default=True, help='Number of tickets to create.')
+@click.option('--staff', 'num_staff', type=int, default=20, show_default=True, help='Number of staff users (assigned to services).')
+@click.option('--years', type=int, default=3, show_default=True, help='Spread tickets over this many years (ending at --end-date).')
+@click.option('--seed', type=int, default=42, show_default=True, help='Random seed (same seed = same data).')
+@click.option('--batch-size', type=int, default=5000, show_default=True, help='Rows per executemany batch/transaction.')
+@click.option('--end-date', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Last day of the data (default: today). Set this for reproducible runs.')
+def seed_load(num_users, num_tickets, num_staff, years, seed, batch_size, end_date):
+    """Generates a synthetic production-scale dataset for performance testing (run 'seed-db' first)."""
+    from eservices_app.seed_load import generate_load_data
+    import time
+    with app.app_context():
+        print(f"Generating {num_users} users, {num_staff} staff and {num_tickets} tickets over {years} year(s) (seed={seed})...")
+        start = time.perf_counter()
+
+        def progress(done, total):
+            print(f"  {done}/{total} tickets ({time.perf_counter() - start:.1f}s)")
+
+        try:
+            counts = generate_load_data(num_users, num_tickets, years=years, num_staff=num_staff, seed=seed,
+                                        batch_size=batch_size, end_date=end_date, progress=progress)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+        except SQLAlchemyError as e:
+            # Naka-commit na ang users at ang mga naunang batches; ang kasalukuyang batch lang ang na-rollback
+            db.session.rollback()
+            print(f"Error: seed load stopped, database error: {e}")
+            raise SystemExit(1)
+        print(f"Seed load complete in {time.perf_counter() - start:.1f}s! " + ", ".join(f"{count} {name}" for name, count in counts.items()))
+        # Core inserts ang seed-load (walang ORM events), kaya i-rebuild ang summary aggregates
+        from eservices_app.ticket_stats import rebuild_ticket_stats
+        from eservices_app.ticket_sla import rebuild_sla_stats
+        from eservices_app.ticket_assignment import rebuild_staff_loads
+        print(f"Rebuilt {rebuild_ticket_stats()} ticket summary buckets and {rebuild_sla_stats()} turnaround buckets.")
+        print(f"Rebuilt the open-ticket load of {rebuild_staff_loads()} staff.")
+
+@app.cli.command("refresh-ticket-stats")
+@click.option('--year', 'years', type=int, multiple=True, help='Only rebuild this year (repeatable). Default: all years.')
+@click.option('--check', is_flag=True, help='Only compare the stored aggregates with the ticket tables (needs --year).')
+def refresh_ticket_stats(years, check):
+    """Rebuilds the precomputed yearly summary aggregates from the ticket and archive tables."""
+    from eservices_app.ticket_stats import rebuild_ticket_stats, verify_ticket_stats
+    with app.app_context():
+        if check:
+            if not years:
+                print("Error: --check needs at least one --year.")
+                return
+            for year in years:
+                mismatches = verify_ticket_stats(year)
+                print(f"{year}: {'OK' if not mismatches else f'{len(mismatches)} bucket(s) differ'}")
+                for key, (stored, actual) in sorted(mismatches.items())[:20]:
+                    print(f"  {key}: stored {stored}, actual {actual}")
+            return
+        buckets = rebuild_ticket_stats(years or None)
+        print(f"Rebuilt {buckets} ticket summary buckets" + (f" for {', '.join(map(str, years))}." if years else "."))
+
+@app.cli.command("refresh-sla-stats")
+@click.option('--year', 'years', type=int, multiple=True, help='Only rebuild this year (repeatable). Default: all years.')
+@click.option('--check', is_flag=True, help='Only compare the stored histograms with the ticket tables (needs --year).')
+def refresh_sla_stats(years, check):
+    """Rebuilds the turnaround (first response / resolution) histograms from the ticket and archive tables."""
+    from eservices_app.ticket_sla import rebuild_sla_stats, verify_sla_stats
+    with app.app_context():
+        if check:
+            if not years:
+                print("Error: --check needs at least one --year.")
+                return
+            for year in years:
+                mismatches = verify_sla_stats(year)
+                print(f"{year}: {'OK' if not mismatches else f'{len(mismatches)} bucket(s) differ'}")
+                for key, (stored, actual) in sorted(mismatches.items())[:20]:
+                    print(f"  {key}: stored {stored}, actual {actual}")
+            return
+        buckets = rebuild_sla_stats(years or None)
+        print(f"Rebuilt {buckets} turnaround buckets" + (f" for {', '.join(map(str, years))}." if years else "."))
+
+@app.cli.command("refresh-staff-load")
+@click.option('--check', is_flag=True, help='Only compare the stored loads with the ticket table.')
+def refresh_staff_load(check):
+    """Rebuilds the per-staff open-ticket counters used by auto-assignment."""
+    from eservices_app.ticket_assignment import rebuild_staff_loads, verify_staff_loads
+    with app.app_context():
+        if check:
+            mismatches = verify_staff_loads()
+            print('OK' if not mismatches else f"{len(mismatches)} staff load(s) differ")
+            for user_id, (stored, actual) in sorted(mismatches.items())[:20]:
+                print(f"  user {user_id}: stored {stored}, actual {actual}")
+            return
+        print(f"Rebuilt the open-ticket load of {rebuild_staff_loads()} staff.")
+
+@app.cli.command("simulate-assignment")
+@click.option('--days', type=int, default=90, show_default=True, help='Replay the tickets posted in the last N days (ending at --end-date).')
+@click.option('--end-date', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='End of the replayed window (default: now).')
+@click.option('--strategy', 'strategies', multiple=True, help='Strategy to replay (repeatable). Default: all, plus the actual assignments.')
+@click.option('--sticky-slack', type=int, default=None, help='Extra open tickets allowed for sticky_school (default: AUTO_ASSIGN_STICKY_SLACK).')
+def simulate_assignment_command(days, end_date, strategies, sticky_slack):
+    """Replays historical tickets through the auto-assignment strategies and compares the resulting queues."""
+    from datetime import datetime, timedelta
+    from eservices_app.ticket_assignment import STRATEGIES, ticket_stream, managers_by_service, simulate_assignment
+    with app.app_context():
+        end = end_date or datetime.utcnow()
+        start = end - timedelta(days=days)
+        sticky_slack = sticky_slack if sticky_slack is not None else app.config['AUTO_ASSIGN_STICKY_SLACK']
+        managers = managers_by_service()
+        print(f"Replaying tickets posted {start:%Y-%m-%d} to {end:%Y-%m-%d} with the current service managers "
+              f"({sum(map(len, managers.values()))} assignments, {len(managers)} services).")
+        print("queue = open tickets of the chosen staff at assignment; spread = max - min load among the service's managers.")
+        header = f"{'strategy':<14} {'assigned':>8} {'unassigned':>10} {'queue':>7} {'p95':>5} {'spread':>7} {'max':>5} {'share sd':>8} {'sticky':>7}"
+        print(header)
+        print('-' * len(header))
+        for strategy in strategies or ('actual', *STRATEGIES):
+            try:
+                result = simulate_assignment(ticket_stream(start, end), managers, strategy, sticky_slack=sticky_slack)
+            except ValueError as e:
+                print(f"Error: {e}")
+                return
+            print(f"{strategy:<14} {result['assigned']:>8} {result['unassigned']:>10} {result['mean_queue']:>7} "
+                  f"{result['p95_queue']:>5} {result['mean_spread']:>7} {result['max_spread']:>5} "
+                  f"{result['share_stdev']:>8} {result['sticky_hits']:>7}")
+
+@app.cli.command("detail-columns")
+def detail_columns():
+    """Lists the indexed ticket details keys (indexed_details ng forms) and those still without an index."""
+    from eservices_app.ticket_details import indexed_detail_fields, missing_detail_indexes
+    with app.app_context():
+        for key, field in indexed_detail_fields().items():
+            print(f"{key:<20} {field.label} ({', '.join(field.forms)})")
+        missing = missing_detail_indexes()
+        if not missing:
+            print("All declared keys are indexed.")
+            return
+        print("\nMissing (create a migration that calls add_detail_columns(op, [...])):")
+        for forms, key, table_name in missing:
+            print(f"  {table_name}.{key} ({forms})")
+
+
+@app.cli.command("startup-profile")
+@click.option('--top', type=int, default=15, show_default=True, help='Number of slowest packages to show.')
+@click.option('--runs', type=int, default=3, show_default=True, help='Cold starts to time (best run is reported).')
+def startup_profile(top, runs):
+    """Shows the create_app() phase timings, an import-time breakdown and the cold start time."""
+    from eservices_app.startup_profile import import_time_breakdown, cold_start_ms
+    project_dir = os.path.dirname(os.path.abspath(__file__))
+    print("create_app() phases (this process, flask CLI):")
+    print(app.extensions['startup_profile'].report())
+
+    # Fresh process na parang gunicorn worker (walang FLASK_RUN_FROM_CLI kaya walang Flask-Migrate)
+    os.environ.pop('FLASK_RUN_FROM_CLI', None)
+    total_ms, packages = import_time_breakdown(top=top, cwd=project_dir)
+    print(f"\nImport time by package, 'from app import app' (self time; -X importtime run took {total_ms:.0f}ms):")
+    for package, self_ms in packages:
+        print(f"  {package:<40} {self_ms:8.1f} ms")
+    print(f"\nCold start 'from app import app': {cold_start_ms(runs=runs, cwd=project_dir):.0f}ms (best of {runs})")
+    flask_help = "import sys; sys.argv = ['flask', '--help']; from flask.cli import main; main()"
+    print(f"Cold start 'flask --help':        {cold_start_ms(flask_help, runs=runs, cwd=project_dir):.0f}ms (best of {runs})")
+
+
+@app.cli.command("build-assets")
+@click.option('--no-download', is_flag=True, help='Do not download missing vendor assets (Bootstrap, Bootstrap Icons, Chart.js).')
+@click.option('--refresh', is_flag=True, help='Download the vendor assets again even if they already exist.')
+def build_assets_command(no_download, refresh):
+    """Vendors the CDN assets and writes fingerprinted, precompressed copies of the static files."""
+    from eservices_app.assets import vendor_assets, build_assets, brotli
+    if not no_download:
+        for logical_path in vendor_assets(app.static_folder, refresh=refresh):
+            print(f"Downloaded {logical_path}")
+    output_dir = app.config['ASSETS_DIR']
+    manifest = build_assets(app.static_folder, output_dir)
+    total = sum(entry['size'] for entry in manifest['files'].values())
+    print(f"Built {len(manifest['files'])} assets ({total / 1024:.0f} KB) into {output_dir}")
+    if brotli is None:
+        print("Note: 'brotli' is not installed, only .gz variants were written.")
+    print("Restart the app to load the new manifest.")
+
+
 # Wala nang 'if __name__ == "__main__":' dito. Ang 'flask run' na ang bahala.
\ No newline at end of file
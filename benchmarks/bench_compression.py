@@ -0,0 +1,105 @@
+# benchmarks/bench_compression.py
+
+"""Measures the bytes saved and the CPU cost of response compression per route.
+
+Ginagamit ang parehong dataset setup ng bench_routes.py. Bawat route ay kinukuha
+nang walang compression (Accept-Encoding: identity) at may gzip / br, tapos
+nire-report ang laki ng response at ang CPU time per request (process_time, median).
+Ang "compress CPU" ay ang oras ng pag-compress lang ng body (hiwalay na sinukat).
+
+Usage (mula sa project root):
+    python benchmarks/bench_compression.py                                   # temp SQLite DB
+    python benchmarks/bench_compression.py --database-url sqlite:////tmp/bench.db --iterations 20
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from bench_routes import boot_app, prepare_dataset, pick_actors, SEED_PASSWORD, DATASET_YEAR
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark response compression (bytes saved and CPU per request).')
+    parser.add_argument('--database-url', default=None, help='Database to use (default: a fresh temp SQLite file). Seeded only if it has no tickets.')
+    parser.add_argument('--users', type=int, default=500, help='Requester users to generate (default: 500).')
+    parser.add_argument('--tickets', type=int, default=5000, help='Tickets to generate (default: 5000).')
+    parser.add_argument('--seed', type=int, default=42, help='Dataset seed (default: 42).')
+    parser.add_argument('--iterations', type=int, default=15, help='Timed requests per route and encoding (default: 15).')
+    return parser.parse_args()
+
+
+def bench_routes(app, db):
+    from eservices_app.models import Department
+    with app.app_context():
+        dept_id = db.session.query(Department.id).filter_by(name='ICT').scalar() or db.session.query(Department.id).scalar()
+    actors = pick_actors(app, db)
+    admin_email = actors['Admin'][0]
+    admin_routes = dict(actors['Admin'][1])
+    return admin_email, [
+        ('staff_dashboard (Admin)', admin_routes['staff_dashboard']),
+        ('staff_dashboard tickets tab', f'/admin/staff-dashboard/tab/tickets?year={DATASET_YEAR}'),
+        ('staff_dashboard school tab', admin_routes['staff_dashboard_tab_school']),
+        ('export_tickets (CSV, streamed)', admin_routes['export_tickets']),
+        ('_get_services_for_department', f'/admin/_get_services_for_department/{dept_id}'),
+        ('create_ticket_form', admin_routes['create_ticket_form']),
+    ]
+
+
+def measure(client, url, encoding, iterations):
+    sizes, cpu_ms = [], []
+    for _ in range(iterations + 2):
+        start = time.process_time()
+        response = client.get(url, headers={'Accept-Encoding': encoding})
+        body = response.get_data() # Pati ang streamed responses ay binabasa nang buo
+        cpu_ms.append((time.process_time() - start) * 1000)
+        sizes.append(len(body))
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {response.status_code}")
+        served_encoding = response.headers.get('Content-Encoding', 'identity')
+    return sizes[-1], statistics.median(cpu_ms[2:]), served_encoding
+
+
+def compress_cpu_ms(body, encoding, config, iterations):
+    from eservices_app.compression import compress_bytes
+    start = time.process_time()
+    for _ in range(iterations):
+        compress_bytes(body, encoding, config['COMPRESS_GZIP_LEVEL'], config['COMPRESS_BR_QUALITY'])
+    return (time.process_time() - start) * 1000 / iterations
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url or 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='eservices-bench-'), 'bench.db')
+    app, db = boot_app(database_url)
+    prepare_dataset(app, db, args)
+    from eservices_app.compression import brotli
+    encodings = ['gzip'] + (['br'] if brotli is not None else [])
+    if brotli is None:
+        print("Note: 'brotli' is not installed; gzip only.")
+
+    admin_email, routes = bench_routes(app, db)
+    client = app.test_client()
+    client.post('/auth/login', data={'username': admin_email, 'password': SEED_PASSWORD})
+
+    print(f"{'Route':<32} {'enc':<5} {'bytes':>10} {'saved':>7} {'CPU/req':>9} {'compress CPU':>13}")
+    for name, url in routes:
+        raw_size, raw_cpu, _ = measure(client, url, 'identity', args.iterations)
+        print(f"{name:<32} {'none':<5} {raw_size:>10,} {'':>7} {raw_cpu:>7.2f}ms")
+        raw_body = client.get(url, headers={'Accept-Encoding': 'identity'}).get_data()
+        for encoding in encodings:
+            size, cpu, served = measure(client, url, encoding, args.iterations)
+            if served == 'identity':
+                print(f"{'':<32} {encoding:<5} {'(not compressed: below COMPRESS_MIN_SIZE or not compressible)'}")
+                continue
+            saved = 100 * (1 - size / raw_size)
+            print(f"{'':<32} {encoding:<5} {size:>10,} {saved:>6.1f}% {cpu:>7.2f}ms "
+                  f"{compress_cpu_ms(raw_body, encoding, app.config, args.iterations):>11.3f}ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# benchmarks/bench_logging.py
+
+"""Measures the request-thread cost of one log call, before and after the queue-based logging.
+
+Kinukumpara ang dating setup (RotatingFileHandler na direktang nagsusulat, f-string
+message) at ang bagong setup (LazyQueueHandler + QueueListener + JSON, %-style args),
+sa loob ng isang Flask request context gaya ng sa totoong routes.
+
+Usage (mula sa project root):
+    python benchmarks/bench_logging.py [--calls 20000]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, g  # noqa: E402
+from flask.logging import default_handler  # noqa: E402
+from eservices_app.logging_config import setup_queue_logging, stop_queue_logging  # noqa: E402
+
+
+def make_app(name):
+    app = Flask(name)
+    app.config['LOG_SAMPLING'] = {}
+    return app
+
+
+def old_pipeline(log_file):
+    """Ang dating setup sa create_app (synchronous file writes sa request thread)."""
+    app = make_app('bench_old')
+    handler = RotatingFileHandler(log_file, maxBytes=10240000, backupCount=5)
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'))
+    handler.setLevel(logging.INFO)
+    app.logger.removeHandler(default_handler) # Para file I/O lang ang sinusukat
+    app.logger.addHandler(handler)
+    app.logger.setLevel(logging.INFO)
+    return app
+
+
+def new_pipeline(log_file):
+    app = make_app('bench_new')
+    setup_queue_logging(app, log_file)
+    return app
+
+
+def time_calls(app, calls, lazy, level=logging.INFO):
+    ticket_number, email = 'ICT-2025-0001', 'juan.delacruz@deped.gov.ph'
+    with app.test_request_context('/ticket/1'):
+        g.request_id = 'bench'
+        # thread_time: CPU time ng request thread lang (hindi kasama ang listener thread)
+        start = time.thread_time()
+        for _ in range(calls):
+            if lazy:
+                app.logger.log(level, "Ticket %s status changed by %s", ticket_number, email)
+            else:
+                app.logger.log(level, f"Ticket {ticket_number} status changed by {email}")
+        return (time.thread_time() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=20000)
+    args = parser.parse_args()
+    log_dir = tempfile.mkdtemp(prefix='eservices-bench-log-')
+
+    old_app = old_pipeline(os.path.join(log_dir, 'old.log'))
+    new_app = new_pipeline(os.path.join(log_dir, 'new.log'))
+
+    results = [
+        ('old: file handler, f-string', time_calls(old_app, args.calls, lazy=False)),
+        ('new: queue + JSON, %-args', time_calls(new_app, args.calls, lazy=True)),
+        ('old: DEBUG (dropped), f-string', time_calls(old_app, args.calls, lazy=False, level=logging.DEBUG)),
+        ('new: DEBUG (dropped), %-args', time_calls(new_app, args.calls, lazy=True, level=logging.DEBUG)),
+    ]
+    listener = new_app.extensions['log_listener']
+    drain_start = time.perf_counter()
+    stop_queue_logging(listener) # Hintayin ang listener thread na maubos ang queue
+    drain_ms = (time.perf_counter() - drain_start) * 1000
+
+    print(f"Request-thread CPU time per log call ({args.calls} calls):")
+    for label, micros in results:
+        print(f"  {label:<34} {micros:8.2f} us")
+    print(f"Listener finished writing the queued records {drain_ms:.0f}ms after the last call.")
+
+
+if __name__ == '__main__':
+    main()
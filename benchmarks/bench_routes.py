@@ -0,0 +1,277 @@
+# benchmarks/bench_routes.py
+
+"""Route-level benchmarks for the main pages, as Admin, Staff and User.
+
+Gumagawa (o gumagamit) ng database na may 'flask seed-db' + 'flask seed-load'
+data, tapos pinapatakbo ang bawat route gamit ang Flask test client.
+Nire-record ang p50/p95 latency, bilang ng SQL statements at peak memory, at
+kinukumpara sa naka-save na baseline (benchmarks/baseline.json).
+
+Usage (mula sa project root):
+    python benchmarks/bench_routes.py                        # temp SQLite DB, compare sa baseline
+    python benchmarks/bench_routes.py --update-baseline      # i-save ang results bilang bagong baseline
+    python benchmarks/bench_routes.py --database-url mysql+pymysql://user:pw@localhost/eservices_bench --tickets 200000
+
+Exit code 1 kapag may regression. Ang latency ay depende sa makina, kaya
+i-refresh ang baseline (--update-baseline) sa parehong makina na gagamit nito.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Fixed na end date para pareho ang dataset sa bawat run (at sa baseline)
+DATASET_END_DATE = '2025-06-30'
+DATASET_YEAR = 2025
+SEED_PASSWORD = 'password123'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the main eServices routes against a stored baseline.')
+    parser.add_argument('--database-url', default=None, help='Database to use (default: a fresh temp SQLite file). Seeded only if it has no tickets.')
+    parser.add_argument('--users', type=int, default=500, help='Requester users to generate (default: 500).')
+    parser.add_argument('--tickets', type=int, default=5000, help='Tickets to generate (default: 5000).')
+    parser.add_argument('--seed', type=int, default=42, help='Dataset seed (default: 42).')
+    parser.add_argument('--iterations', type=int, default=30, help='Timed requests per route (default: 30).')
+    parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per route before timing (default: 5).')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file.')
+    parser.add_argument('--update-baseline', action='store_true', help='Save these results as the new baseline instead of comparing.')
+    parser.add_argument('--latency-tolerance', type=float, default=0.25, help='Allowed p50 increase as a fraction (default: 0.25).')
+    parser.add_argument('--p95-tolerance', type=float, default=0.5, help='Allowed p95 increase as a fraction (default: 0.5; p95 is noisier).')
+    parser.add_argument('--latency-floor-ms', type=float, default=2.0, help='Ignore latency increases smaller than this (default: 2ms).')
+    parser.add_argument('--memory-tolerance', type=float, default=0.25, help='Allowed peak memory increase as a fraction (default: 0.25).')
+    parser.add_argument('--output', default=None, help='Also write the results JSON here.')
+    return parser.parse_args()
+
+
+# --- Dataset Setup ---
+
+def boot_app(database_url):
+    """Imports app.py (create_app + CLI commands) against the benchmark database."""
+    os.environ['DATABASE_URL'] = database_url
+    sys.path.insert(0, ROOT)
+    import app as app_module
+    from eservices_app import db, limiter
+
+    app = app_module.app
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.config['MAIL_SUPPRESS_SEND'] = True
+    app.extensions['mail'].suppress = True
+    limiter.enabled = False # Ang benchmark ay maraming requests mula sa iisang client
+    return app, db
+
+
+def prepare_dataset(app, db, args):
+    from eservices_app.models import Ticket
+    with app.app_context():
+        db.create_all() # Walang epekto sa existing tables
+        if db.session.query(Ticket.id).first():
+            print("Database already has tickets; skipping seeding.")
+            return
+    runner = app.test_cli_runner()
+    for command in (['seed-db'], ['create-admin'],
+                    ['seed-load', '--users', str(args.users), '--tickets', str(args.tickets), '--seed', str(args.seed),
+                     '--end-date', DATASET_END_DATE]):
+        print(f"Running 'flask {' '.join(command)}'...")
+        result = runner.invoke(args=command)
+        if result.exit_code != 0:
+            raise SystemExit(f"'flask {command[0]}' failed:\n{result.output}")
+
+
+def pick_actors(app, db):
+    """Returns the benchmark users, a ticket each can open, and a service for the create form."""
+    from sqlalchemy import select, func
+    from eservices_app.models import User, Ticket, Service, user_service_association
+    with app.app_context():
+        admin = db.session.scalar(select(User).where(User.role == 'Admin').order_by(User.id))
+        # Staff na may pinakamaraming managed services, at ticket sa isa sa mga iyon
+        staff_id = db.session.execute(
+            select(user_service_association.c.user_id).group_by(user_service_association.c.user_id)
+            .order_by(func.count().desc(), user_service_association.c.user_id)
+        ).scalar()
+        staff = db.session.get(User, staff_id) if staff_id else None
+        staff_service_ids = select(user_service_association.c.service_id).where(user_service_association.c.user_id == staff_id)
+        staff_ticket = db.session.scalar(select(Ticket.id).where(Ticket.service_id.in_(staff_service_ids)).order_by(Ticket.id.desc()))
+        # User na may pinakamaraming tickets (pinakamabigat na 'my_tickets')
+        requester_email = db.session.execute(
+            select(Ticket.requester_email).group_by(Ticket.requester_email).order_by(func.count().desc(), Ticket.requester_email)
+        ).scalar()
+        user = db.session.scalar(select(User).where(User.email == requester_email))
+        user_ticket = db.session.scalar(select(Ticket.id).where(Ticket.requester_email == requester_email).order_by(Ticket.id.desc()))
+        service_id = db.session.scalar(select(Service.id).where(Service.name == 'DepEd Email Account')) or db.session.scalar(select(Service.id))
+        if not (admin and staff and user and staff_ticket and user_ticket):
+            raise SystemExit("Dataset is missing an admin, staff, requester or tickets; run with a fresh database.")
+        return {
+            'Admin': (admin.email, [
+                ('staff_dashboard', f'/admin/staff-dashboard?year={DATASET_YEAR}'),
+                ('staff_dashboard_tab_dept', f'/admin/staff-dashboard/tab/dept?year={DATASET_YEAR}'),
+                ('staff_dashboard_tab_school', f'/admin/staff-dashboard/tab/school?year={DATASET_YEAR}'),
+                ('staff_dashboard_tab_tickets_recent', f'/admin/staff-dashboard/tab/tickets?year={DATASET_YEAR}&view=recent'),
+                ('staff_dashboard_tab_tickets_awaiting', f'/admin/staff-dashboard/tab/tickets?year={DATASET_YEAR}&view=awaiting'),
+                ('ticket_detail', f'/ticket/{staff_ticket}'),
+                ('export_tickets', f'/admin/export-tickets?year={DATASET_YEAR}'),
+                ('summary', f'/summary?year={DATASET_YEAR}'),
+                ('summary_data', f'/summary/data?year={DATASET_YEAR}'),
+                ('create_ticket_form', f'/create-ticket/form/{service_id}'),
+            ]),
+            'Staff': (staff.email, [
+                ('staff_dashboard', f'/admin/staff-dashboard?year={DATASET_YEAR}'),
+                ('staff_dashboard_tab_dept', f'/admin/staff-dashboard/tab/dept?year={DATASET_YEAR}'),
+                ('staff_dashboard_tab_school', f'/admin/staff-dashboard/tab/school?year={DATASET_YEAR}'),
+                ('ticket_detail', f'/ticket/{staff_ticket}'),
+                ('create_ticket_form', f'/create-ticket/form/{service_id}'),
+            ]),
+            'User': (user.email, [
+                ('my_tickets', '/my-tickets'),
+                ('my_tickets_recent', '/my-tickets?view=recent'),
+                ('my_tickets_awaiting', '/my-tickets?view=awaiting'),
+                ('ticket_detail', f'/ticket/{user_ticket}'),
+                ('create_ticket_form', f'/create-ticket/form/{service_id}'),
+            ]),
+        }
+
+
+# --- Measurement ---
+
+class QueryCounter:
+    """Counts SQL statements sent through the engine."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def measure_route(client, url, counter, iterations, warmup):
+    for _ in range(warmup):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {response.status_code}")
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # Hiwalay na request para sa query count at memory (mabagal ang tracemalloc)
+    counter.count = 0
+    tracemalloc.start()
+    client.get(url)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'queries': counter.count,
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(app, db, actors, args):
+    from sqlalchemy import event
+    counter = QueryCounter()
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', counter)
+    results = {}
+    try:
+        for role, (email, routes) in actors.items():
+            client = app.test_client()
+            login = client.post('/auth/login', data={'username': email, 'password': SEED_PASSWORD})
+            if login.status_code != 302:
+                raise SystemExit(f"Could not log in as {role} ({email}).")
+            for name, url in routes:
+                key = f"{role}:{name}"
+                results[key] = measure_route(client, url, counter, args.iterations, args.warmup)
+                r = results[key]
+                print(f"  {key:<28} p50 {r['p50_ms']:>9.2f}ms  p95 {r['p95_ms']:>9.2f}ms  {r['queries']:>4} queries  {r['peak_kb']:>9.1f} KB")
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter)
+    return results
+
+
+# --- Baseline ---
+
+def compare(results, baseline, args):
+    """Returns a list of regression messages (empty kung walang regression)."""
+    regressions = []
+    for key, current in results.items():
+        base = baseline['routes'].get(key)
+        if not base:
+            print(f"  {key}: no baseline yet")
+            continue
+        if current['queries'] > base['queries']:
+            regressions.append(f"{key}: {current['queries']} SQL statements (baseline {base['queries']})")
+        for metric, tolerance in (('p50_ms', args.latency_tolerance), ('p95_ms', args.p95_tolerance)):
+            if current[metric] > base[metric] * (1 + tolerance) and current[metric] - base[metric] > args.latency_floor_ms:
+                regressions.append(f"{key}: {metric[:3]} {current[metric]:.2f}ms (baseline {base[metric]:.2f}ms)")
+        if current['peak_kb'] > base['peak_kb'] * (1 + args.memory_tolerance):
+            regressions.append(f"{key}: peak memory {current['peak_kb']:.1f}KB (baseline {base['peak_kb']:.1f}KB)")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url or 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='eservices-bench-'), 'bench.db')
+    app, db = boot_app(database_url)
+    prepare_dataset(app, db, args)
+    actors = pick_actors(app, db)
+
+    print(f"Benchmarking {args.iterations} requests per route ({database_url.split('://')[0]})...")
+    results = run_benchmarks(app, db, actors, args)
+    report = {
+        'created': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+        'dataset': {'backend': database_url.split('://')[0], 'users': args.users, 'tickets': args.tickets,
+                    'seed': args.seed, 'end_date': DATASET_END_DATE},
+        'iterations': args.iterations,
+        'routes': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('dataset') != report['dataset']:
+        print(f"WARNING: baseline dataset {baseline.get('dataset')} differs from this run {report['dataset']}")
+
+    regressions = compare(results, baseline, args)
+    if regressions:
+        print("REGRESSIONS:")
+        for message in regressions:
+            print(f"  - {message}")
+        return 1
+    print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# benchmarks/check_seed_load.py
+
+"""Checks that 'flask seed-load' can run twice on the same database without duplicate ticket numbers.
+
+Pinapatakbo ang 'flask seed-load' nang dalawang beses sa iisang taon, na may sapat
+na tickets para lumampas sa 9999 ang sequence ng pinakamalaking prefix (e.g.
+ICT-2025-10000), tapos chine-check na:
+  - parehong run ay pumasa (walang IntegrityError sa ticket_number)
+  - walang duplicate na ticket_number
+  - ang sequence ng pangalawang run ay tuloy-tuloy mula sa numeric max ng una
+
+Usage (mula sa project root):
+    python benchmarks/check_seed_load.py [--tickets 25000] [--database-url ...]
+
+Exit code 1 kapag may pumalya.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_routes import boot_app  # noqa: E402
+
+DATASET_END_DATE = '2025-12-31'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', default=None, help='Empty database to use (default: a fresh temp SQLite file).')
+    parser.add_argument('--tickets', type=int, default=25000, help='Tickets per run, all in one year (default: 25000).')
+    parser.add_argument('--users', type=int, default=200, help='Requester users per run (default: 200).')
+    return parser.parse_args()
+
+
+def sequence_stats(db):
+    """Returns (ticket count, distinct ticket numbers, {prefix: highest numeric sequence})."""
+    from sqlalchemy import select, func
+    from eservices_app.models import Ticket
+    numbers = db.session.scalars(select(Ticket.ticket_number)).all()
+    highest = {}
+    for number in numbers:
+        prefix, _sep, seq = number.rpartition('-')
+        highest[prefix] = max(highest.get(prefix, 0), int(seq))
+    return len(numbers), db.session.scalar(select(func.count(func.distinct(Ticket.ticket_number)))), highest
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='eservices_seed_'), 'seed.db')}"
+    print(f"Database: {database_url}")
+    app, db = boot_app(database_url)
+    with app.app_context():
+        db.create_all()
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['seed-db'])
+    if result.exit_code != 0:
+        print(f"'flask seed-db' failed:\n{result.output}")
+        return 1
+
+    failures = []
+    highest_before = {}
+    for run in (1, 2):
+        command = ['seed-load', '--users', str(args.users), '--tickets', str(args.tickets), '--years', '1',
+                   '--seed', str(run), '--end-date', DATASET_END_DATE]
+        print(f"Run {run}: 'flask {' '.join(command)}'...")
+        result = runner.invoke(args=command)
+        if result.exit_code != 0 or result.exception is not None or 'Error' in result.output:
+            print(result.output[-2000:])
+            failures.append(f"run {run} of 'flask seed-load' failed (exit code {result.exit_code})")
+            break
+        with app.app_context():
+            total, distinct, highest = sequence_stats(db)
+        top_prefix = max(highest, key=highest.get)
+        print(f"  {total} tickets, {distinct} distinct numbers, highest sequence {top_prefix}-{highest[top_prefix]}")
+        if distinct != total:
+            failures.append(f"run {run}: {total - distinct} duplicate ticket numbers")
+        if run == 1 and highest[top_prefix] <= 9999:
+            failures.append(f"run 1 only reached {top_prefix}-{highest[top_prefix]}; use more --tickets to pass 9999")
+        for prefix, seq in highest_before.items():
+            if highest.get(prefix, 0) < seq:
+                failures.append(f"run {run}: {prefix} went from {seq} down to {highest.get(prefix, 0)}")
+        highest_before = highest
+
+    if failures:
+        print("FAILED:")
+        for message in failures:
+            print(f"  - {message}")
+        return 1
+    print("OK: both seed-load runs passed with unique, continuing ticket numbers.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
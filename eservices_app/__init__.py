@@ -3,25 +3,35 @@
 import os
 from flask import Flask, render_template, request 
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_login import LoginManager, current_user
 from flask_mail import Mail
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from dotenv import load_dotenv
 import logging
-from logging.handlers import RotatingFileHandler
 import traceback
 from werkzeug.exceptions import HTTPException
 from datetime import datetime
+from .db_pool import configure_pool, configure_replica_pool, attach_pool_listeners, default_pool_profile
+from .db_routing import RoutingSession, init_db_routing
+from .request_metrics import init_request_metrics, instrument_engine
+from .metrics import init_metrics, record_rate_limited
+from .logging_config import init_request_id, setup_queue_logging
+from .startup_profile import StartupProfiler
+from .page_cache import init_page_cache
+from .fragment_cache import init_fragment_cache
+from .assets import init_assets
+from .compression import init_compression, DEFAULT_MIMETYPES as COMPRESS_DEFAULT_MIMETYPES
 
 # Load environment variables dito sa taas
 env_path = os.path.join(os.path.dirname(__file__), '..', '.env')
 load_dotenv(dotenv_path=env_path)
 
 # --- Initialize Extensions (without app) ---
-db = SQLAlchemy()
-migrate = Migrate()
+# Ang RoutingSession ay nagbabasa sa read replica para sa @replica_read views (tingnan ang db_routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+# Ang Flask-Migrate (at Alembic, ~150ms na import) ay nilo-load lang kapag kailangan (tingnan ang init_migrate)
+migrate = None
 login_manager = LoginManager()
 mail = Mail()
 limiter = Limiter(key_func=get_remote_address, storage_uri="memory://")
@@ -34,90 +44,241 @@ def smarter_key_func():
         remote_addr = get_remote_address() or 'cli'
         return remote_addr
 
+# --- Lazy Flask-Migrate ---
+def init_migrate(app):
+    """Imports Flask-Migrate and registers it on the app (para sa 'flask db ...' commands)."""
+    global migrate
+    if migrate is None:
+        from flask_migrate import Migrate
+        migrate = Migrate()
+    migrate.init_app(app, db)
+
+
 # --- Application Factory Function ---
-def create_app(config_name=None):
-    app = Flask(__name__, instance_relative_config=True,
-                static_folder='static',
-                template_folder='templates')
-
-    # --- Load Configuration ---
-    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'default-fallback-secret-key')
-
-    # Database Config
-    MYSQL_USER = os.getenv('MYSQL_USER', 'root')
-    MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD', '')
-    MYSQL_HOST = os.getenv('MYSQL_HOST', 'localhost')
-    MYSQL_DB = os.getenv('MYSQL_DB', 'eservices_db')
-    app.config['SQLALCHEMY_DATABASE_URI'] = f'mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}/{MYSQL_DB}?charset=utf8mb4'
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-    # Upload Config
-    UPLOAD_FOLDER = os.path.join(app.root_path, 'static', 'uploads')
-    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-    app.config['MAX_CONTENT_LENGTH'] = 25 * 1024 * 1024
-    app.config['MAX_FILE_SIZE_MB'] = 25
-
-    # Other Config
-    app.config['TICKETS_PER_PAGE'] = 10
-    app.config['EMAILS_PER_PAGE'] = 50
-
-    # Email Config
-    app.config['MAIL_SERVER'] = 'smtp.gmail.com'
-    app.config['MAIL_PORT'] = 587
-    app.config['MAIL_USE_TLS'] = True
-    app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
-    app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
+def create_app(config_name=None, pool_profile=None):
+    profiler = StartupProfiler()
+    with profiler.phase('flask app'):
+        app = Flask(__name__, instance_relative_config=True,
+                    static_folder='static',
+                    template_folder='templates')
+    app.extensions['startup_profile'] = profiler
+
+    with profiler.phase('config'):
+        # --- Load Configuration ---
+        app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'default-fallback-secret-key')
+
+        # Database Config
+        MYSQL_USER = os.getenv('MYSQL_USER', 'root')
+        MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD', '')
+        MYSQL_HOST = os.getenv('MYSQL_HOST', 'localhost')
+        MYSQL_DB = os.getenv('MYSQL_DB', 'eservices_db')
+        # DATABASE_URL (kung meron) ang masusunod, e.g. 'sqlite:///eservices.db' para sa local testing
+        app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL') or f'mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}/{MYSQL_DB}?charset=utf8mb4'
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+        # Connection Pool Config (tingnan ang db_pool.py para sa profiles at env overrides)
+        # Profile: pool_profile argument > DB_POOL_PROFILE env > 'development' sa 'flask run'
+        # > 'cli' sa ibang 'flask' commands > 'production' (e.g. gunicorn)
+        configure_pool(app, pool_profile or default_pool_profile())
+
+        # Read Replica (optional; tingnan ang db_routing.py). Walang DB_REPLICA_URL = lahat sa primary.
+        if os.getenv('DB_REPLICA_URL'):
+            configure_replica_pool(app, app.config['DB_POOL_PROFILE'], os.getenv('DB_REPLICA_URL'))
+        app.config['DB_REPLICA_MAX_LAG'] = float(os.getenv('DB_REPLICA_MAX_LAG', 5)) # seconds
+        app.config['DB_REPLICA_CHECK_INTERVAL'] = float(os.getenv('DB_REPLICA_CHECK_INTERVAL', 5)) # seconds, per worker
+        app.config['DB_REPLICA_STICKY_SECONDS'] = int(os.getenv('DB_REPLICA_STICKY_SECONDS', 15)) # primary muna pagkatapos ng POST
+
+        # Upload Config
+        UPLOAD_FOLDER = os.path.join(app.root_path, 'static', 'uploads')
+        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+        app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+        app.config['MAX_CONTENT_LENGTH'] = 25 * 1024 * 1024
+        app.config['MAX_FILE_SIZE_MB'] = 25
+
+        # Other Config
+        app.config['TICKETS_PER_PAGE'] = 10
+        app.config['EMAILS_PER_PAGE'] = 50
+
+        # Archive Config (para sa 'flask archive-tickets')
+        app.config['ARCHIVE_AFTER_DAYS'] = int(os.getenv('ARCHIVE_AFTER_DAYS', 730))
+        app.config['ARCHIVE_BATCH_SIZE'] = int(os.getenv('ARCHIVE_BATCH_SIZE', 500))
+
+        # Request Instrumentation Config (tingnan ang request_metrics.py)
+        app.config['SLOW_REQUEST_MS'] = int(os.getenv('SLOW_REQUEST_MS', 1000))
+        app.config['SLOW_REQUEST_QUERIES'] = int(os.getenv('SLOW_REQUEST_QUERIES', 50))
+        app.config['SLOW_QUERY_MS'] = int(os.getenv('SLOW_QUERY_MS', 250))
+        app.config['SERVER_TIMING_ENABLED'] = os.getenv('SERVER_TIMING_ENABLED', 'true').lower() in ('1', 'true', 'yes', 'on')
+
+        # Prometheus '/metrics': Bearer token, o localhost lang kapag walang token (tingnan ang metrics.py)
+        app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')
+
+        # Log Sampling: message template -> isusulat lang ang 1 sa bawat N (para sa high-volume messages)
+        app.config['LOG_SAMPLING'] = {
+            "404 Not Found: %s": 10,
+            "Rate limit exceeded: %s for %s on route %s": 10,
+        }
+
+        # Email Config
+        app.config['MAIL_SERVER'] = 'smtp.gmail.com'
+        app.config['MAIL_PORT'] = 587
+        app.config['MAIL_USE_TLS'] = True
+        app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
+        app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
+        # Bulk emails (e.g. bulk resolve) ay ipinapadala sa background (tingnan ang mail_outbox.py)
+        app.config['MAIL_OUTBOX_ASYNC'] = os.getenv('MAIL_OUTBOX_ASYNC', 'true').lower() in ('1', 'true', 'yes', 'on')
     
-    # Allowed Extensions for upload (ilagay natin sa config)
-    app.config['ALLOWED_EXTENSIONS'] = {'pdf', 'jpg', 'jpeg', 'png', 'doc', 'docx'}
+        # Allowed Extensions for upload (ilagay natin sa config)
+        app.config['ALLOWED_EXTENSIONS'] = {'pdf', 'jpg', 'jpeg', 'png', 'doc', 'docx'}
+
+        # Page Cache para sa public ticket-creation pages (tingnan ang page_cache.py)
+        app.config['PAGE_CACHE_BACKEND'] = os.getenv('PAGE_CACHE_BACKEND', 'memory') # memory, filesystem o none
+        app.config['PAGE_CACHE_DIR'] = os.getenv('PAGE_CACHE_DIR', os.path.join(app.instance_path, 'page_cache'))
+        app.config['PAGE_CACHE_TIMEOUT'] = int(os.getenv('PAGE_CACHE_TIMEOUT', 300)) # seconds
+        app.config['PAGE_CACHE_MAX_ENTRIES'] = int(os.getenv('PAGE_CACHE_MAX_ENTRIES', 256))
+        app.config['PAGE_CACHE_MAX_AGE'] = int(os.getenv('PAGE_CACHE_MAX_AGE', 0)) # browser Cache-Control max-age
 
+        # Jinja Fragment Cache, {% cache %} (tingnan ang fragment_cache.py)
+        app.config['FRAGMENT_CACHE_ENABLED'] = os.getenv('FRAGMENT_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes', 'on')
+        app.config['FRAGMENT_CACHE_MAX_BYTES'] = int(os.getenv('FRAGMENT_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+        app.config['FRAGMENT_CACHE_TTL'] = int(os.getenv('FRAGMENT_CACHE_TTL', 120)) # seconds
+
+        # Canned responses ng reply composer, JSON + per-worker cache (tingnan ang canned_responses.py)
+        app.config['CANNED_RESPONSE_CACHE_TTL'] = int(os.getenv('CANNED_RESPONSE_CACHE_TTL', 300)) # seconds, 0 = walang cache
+        app.config['CANNED_RESPONSE_SEARCH_LIMIT'] = int(os.getenv('CANNED_RESPONSE_SEARCH_LIMIT', 50)) # bawat group
+
+        # Fingerprinted Static Assets (tingnan ang assets.py; binubuo ng 'flask build-assets')
+        app.config['ASSETS_DIR'] = os.getenv('ASSETS_DIR', os.path.join(app.static_folder, 'dist'))
+        app.config['ASSETS_URL_PATH'] = '/assets'
+        app.config['ASSETS_MAX_AGE'] = int(os.getenv('ASSETS_MAX_AGE', 365 * 24 * 3600)) # seconds, immutable
+
+        # Response Compression, gzip/brotli (tingnan ang compression.py)
+        app.config['COMPRESS_ENABLED'] = os.getenv('COMPRESS_ENABLED', 'true').lower() in ('1', 'true', 'yes', 'on')
+        app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', 500)) # bytes
+        app.config['COMPRESS_MIMETYPES'] = COMPRESS_DEFAULT_MIMETYPES
+        app.config['COMPRESS_GZIP_LEVEL'] = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+        app.config['COMPRESS_BR_QUALITY'] = int(os.getenv('COMPRESS_BR_QUALITY', 4)) # 0-11; mababa = mas mura sa CPU
+
+        # Audit Trail, write-behind (tingnan ang audit.py)
+        app.config['AUDIT_WRITE_BEHIND'] = os.getenv('AUDIT_WRITE_BEHIND', 'true').lower() in ('1', 'true', 'yes', 'on')
+        app.config['AUDIT_BATCH_SIZE'] = int(os.getenv('AUDIT_BATCH_SIZE', 200))
+        app.config['AUDIT_FLUSH_INTERVAL'] = float(os.getenv('AUDIT_FLUSH_INTERVAL', 1.0)) # seconds
+        app.config['AUDIT_MAX_PENDING'] = int(os.getenv('AUDIT_MAX_PENDING', 10000)) # events na hinahawakan kapag down ang DB
+        app.config['AUDIT_EVENTS_PER_PAGE'] = 50
+
+        # Staff notification digests at urgent bypass rules (tingnan ang notifications.py)
+        app.config['NOTIFY_DIGEST_MINUTES'] = int(os.getenv('NOTIFY_DIGEST_MINUTES', 30)) # default window; 0 = laging immediate
+        app.config['NOTIFY_ASSIGNEE_IMMEDIATE'] = os.getenv('NOTIFY_ASSIGNEE_IMMEDIATE', 'true').lower() in ('1', 'true', 'yes', 'on')
+        app.config['NOTIFY_URGENT_KEYWORDS'] = os.getenv('NOTIFY_URGENT_KEYWORDS', 'urgent,asap,emergency,agaran')
+        app.config['NOTIFY_URGENT_WAITING_HOURS'] = int(os.getenv('NOTIFY_URGENT_WAITING_HOURS', 48)) # 0 = walang ganitong rule
+        app.config['NOTIFY_BASE_URL'] = os.getenv('NOTIFY_BASE_URL', 'http://localhost:5000') # para sa links ng 'flask send-digests'
+        app.config['RECIPIENT_DIRECTORY_TTL'] = int(os.getenv('RECIPIENT_DIRECTORY_TTL', 300)) # seconds, 0 = walang cache (tingnan ang recipient_directory.py)
+
+        # Idempotent ticket submission (tingnan ang ticket_submissions.py)
+        app.config['TICKET_SUBMISSION_TOKEN_TTL'] = int(os.getenv('TICKET_SUBMISSION_TOKEN_TTL', 3600)) # seconds, refresh/resubmit ng parehong form
+        app.config['TICKET_SUBMISSION_FINGERPRINT_TTL'] = int(os.getenv('TICKET_SUBMISSION_FINGERPRINT_TTL', 300)) # seconds, parehong laman mula sa bagong form
+        app.config['TICKET_SUBMISSION_WAIT_SECONDS'] = float(os.getenv('TICKET_SUBMISSION_WAIT_SECONDS', 5)) # paghihintay ng duplicate sa original
+
+        # Auto-assignment ng bagong tickets (tingnan ang ticket_assignment.py)
+        app.config['AUTO_ASSIGN_STRATEGY'] = os.getenv('AUTO_ASSIGN_STRATEGY', 'least_loaded') # least_loaded, round_robin, sticky_school o off
+        app.config['AUTO_ASSIGN_STICKY_SLACK'] = int(os.getenv('AUTO_ASSIGN_STICKY_SLACK', 3)) # dagdag na open tickets na pwede sa sticky staff
+
+        # Startup Config (tingnan ang startup_profile.py)
+        app.config['ENABLE_MIGRATE'] = os.getenv('FLASK_RUN_FROM_CLI') == 'true' or os.getenv('ENABLE_MIGRATE') == '1'
+        app.config['STARTUP_PROFILE'] = os.getenv('STARTUP_PROFILE') == '1'
 
     # --- Initialize Extensions (with app) ---
-    db.init_app(app)
-    migrate.init_app(app, db)
-    login_manager.init_app(app)
-    login_manager.login_view = 'auth.login' # 'blueprint_name.function_name'
-    login_manager.login_message_category = 'info' # Optional: para maganda ang flash message
-    mail.init_app(app)
-    limiter.init_app(app)
-    limiter.key_func = smarter_key_func
-    limiter.default_limits = ["500 per 5 minutes", "2000 per hour"]
+    with profiler.phase('extensions'):
+        db.init_app(app)
+        login_manager.init_app(app)
+        login_manager.login_view = 'auth.login' # 'blueprint_name.function_name'
+        login_manager.login_message_category = 'info' # Optional: para maganda ang flash message
+        mail.init_app(app)
+        limiter.init_app(app)
+        limiter.key_func = smarter_key_func
+        limiter.default_limits = ["500 per 5 minutes", "2000 per hour"]
+
+    # Migrations: sa 'flask' CLI lang (FLASK_RUN_FROM_CLI ay sine-set ng flask command), o kung ENABLE_MIGRATE=1.
+    # Ang gunicorn workers ay hindi na nag-i-import ng Alembic.
+    if app.config['ENABLE_MIGRATE']:
+        with profiler.phase('flask-migrate'):
+            init_migrate(app)
 
     # --- Setup Logging ---
-    if not app.debug and not app.testing:
-        log_dir = os.path.join(app.root_path, '..', 'logs')
-        os.makedirs(log_dir, exist_ok=True)
-        file_handler = RotatingFileHandler(os.path.join(log_dir, 'eservices.log'),
-                                           maxBytes=10240000, backupCount=5)
-        log_format = logging.Formatter(
-            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-        )
-        file_handler.setFormatter(log_format)
-        file_handler.setLevel(logging.INFO)
-        app.logger.addHandler(file_handler)
-        app.logger.setLevel(logging.INFO)
-        app.logger.info('eServices startup')
+    with profiler.phase('logging'):
+        # Request id (X-Request-ID) para sa log records at sa response header
+        init_request_id(app)
+        if not app.debug and not app.testing:
+            log_dir = os.path.join(app.root_path, '..', 'logs')
+            os.makedirs(log_dir, exist_ok=True)
+            # JSON lines; ang file I/O at rotation ay nasa QueueListener thread (tingnan ang logging_config.py)
+            setup_queue_logging(app, os.path.join(log_dir, 'eservices.log'))
+            app.logger.info('eServices startup')
 
     # --- Import Models ---
     # Kailangan ito bago mag-register ng blueprints kung
     # ang blueprints ay gumagamit ng models (which they do)
-    with app.app_context():
+    with profiler.phase('models + db engine'), app.app_context():
         from . import models
+        # Pool metrics listeners (checkout wait, in-use, overflow)
+        attach_pool_listeners(db.engine, app.extensions['pool_stats']['default'])
+        # Per-request SQL count/time, Server-Timing header at slow request log
+        init_request_metrics(app, db.engine)
+        # Read replica: lag check, read-your-writes at pool/SQL metrics ng 'replica' bind
+        if init_db_routing(app, db.engines):
+            attach_pool_listeners(db.engines['replica'], app.extensions['pool_stats']['replica'])
+            instrument_engine(app, db.engines['replica'])
+        # Incremental refresh ng precomputed summary aggregates (tingnan ang ticket_stats.py)
+        from .ticket_stats import init_ticket_stats
+        init_ticket_stats(app)
+        # Turnaround (SLA) histograms; isinusulat ng ticket_activity.py (tingnan ang ticket_sla.py)
+        from .ticket_sla import init_ticket_sla
+        init_ticket_sla(app)
+        # Audit trail writer (isinusulat pagkatapos ng commit, labas sa request; tingnan ang audit.py)
+        from .audit import init_audit
+        init_audit(app)
+        # Background sending ng bulk emails, labas sa request (tingnan ang mail_outbox.py)
+        from .mail_outbox import init_mail_outbox
+        init_mail_outbox(app)
+        # Incremental na load ng bawat staff at auto-assignment ng bagong tickets (tingnan ang ticket_assignment.py)
+        from .ticket_assignment import init_ticket_assignment
+        init_ticket_assignment(app)
+
+    # Prometheus metrics (gumagamit ng timers ng request_metrics kaya dapat pagkatapos nito)
+    with profiler.phase('metrics'):
+        init_metrics(app)
+        limiter.exempt(app.view_functions['metrics'])
+
+    with profiler.phase('page + fragment cache'):
+        init_page_cache(app)
+        init_fragment_cache(app)
+        from .canned_responses import init_canned_responses
+        init_canned_responses(app)
+        from .recipient_directory import init_recipient_directory
+        init_recipient_directory(app)
+
+    with profiler.phase('static assets'):
+        init_assets(app)
+        limiter.exempt(app.view_functions['assets'])
+
+    # Response compression. Ang after_request hooks ay tumatakbo nang pabaliktad, kaya ito ay
+    # nauuna sa latency/Server-Timing hooks ng metrics (kasama sa sinusukat ang compression).
+    with profiler.phase('compression'):
+        init_compression(app)
 
     # --- Register Blueprints ---
     # Dapat tamang indentation (Level 1, kapantay ng db.init_app)
-    from .main.routes import main_bp
-    app.register_blueprint(main_bp)
+    with profiler.phase('blueprints'):
+        from .main.routes import main_bp
+        app.register_blueprint(main_bp)
 
-    from .auth.routes import auth_bp
-    app.register_blueprint(auth_bp, url_prefix='/auth')
+        from .auth.routes import auth_bp
+        app.register_blueprint(auth_bp, url_prefix='/auth')
 
-    from .admin.routes import admin_bp
-    app.register_blueprint(admin_bp, url_prefix='/admin')
+        from .admin.routes import admin_bp
+        app.register_blueprint(admin_bp, url_prefix='/admin')
 
-    from .tickets.routes import tickets_bp
-    app.register_blueprint(tickets_bp) # Walang prefix
+        from .tickets.routes import tickets_bp
+        app.register_blueprint(tickets_bp) # Walang prefix
 
 
     # --- Context Processor ---
@@ -136,7 +297,8 @@ def create_app(config_name=None):
     # Dapat tamang indentation (Level 1 din)
     @app.errorhandler(429)
     def ratelimit_handler(e):
-        app.logger.warning(f"Rate limit exceeded: {e.description} for {limiter.key_func()} on route {request.endpoint}")
+        app.logger.warning("Rate limit exceeded: %s for %s on route %s", e.description, limiter.key_func(), request.endpoint)
+        record_rate_limited(request.endpoint)
         try:
             return render_template("429.html"), 429
         except Exception as render_error:
@@ -147,7 +309,7 @@ def create_app(config_name=None):
     def handle_exception(e):
         if isinstance(e, HTTPException):
             if e.code == 404:
-                app.logger.warning(f"404 Not Found: {request.url}")
+                app.logger.warning("404 Not Found: %s", request.url)
                 try:
                     return render_template("404.html"), 404
                 except Exception as render_error:
@@ -155,11 +317,11 @@ def create_app(config_name=None):
                      return "Not Found", 404 # Simple fallback
             
             # Para sa ibang HTTP errors, i-log natin pero hayaan si Flask mag-handle
-            app.logger.warning(f"{e.code} Error: {e.name} - {e.description} for URL {request.url}")
+            app.logger.warning("%s Error: %s - %s for URL %s", e.code, e.name, e.description, request.url)
             return e
 
         # Para sa mga non-HTTP exceptions (Python errors)
-        app.logger.error(f"An unexpected error occurred: {e}", exc_info=True)
+        app.logger.error("An unexpected error occurred: %s", e, exc_info=True)
         try:
             return render_template("500.html"), 500
         except Exception as render_error:
@@ -168,4 +330,6 @@ def create_app(config_name=None):
 
     
     app.logger.info('eServices application created and configured.')
+    if app.config['STARTUP_PROFILE']:
+        app.logger.info("Startup profile (pid %s):\n%s", os.getpid(), profiler.report())
     return app
\ No newline at end of file
@@ -2,24 +2,39 @@
 
 # --- Standard Flask & SQLAlchemy Imports ---
 from flask import (Blueprint, render_template, request, redirect,
-                   url_for, flash, current_app, jsonify, Response)
+                   url_for, flash, current_app, jsonify, Response, abort)
 from flask_login import login_required, current_user
-from sqlalchemy import func, case, extract, or_, text
+from sqlalchemy import func, case, extract, or_, text, select, insert
 from sqlalchemy.orm import joinedload
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 import io # For export
 import csv # For export
 import json # For _get_services_for_department
+from functools import partial # For lazy dashboard summaries
 
 # --- Imports from our App Package ---
 from .. import db, limiter # Import db and limiter
 from ..models import (User, Department, Service, School, Ticket, Attachment,
                       CannedResponse, AuthorizedEmail, PersonalCannedResponse,
-                      Response as TicketResponse) # Import all needed models
+                      Response as TicketResponse, user_service_association,
+                      ArchivedTicket) # Import all needed models
 from ..forms import (EditUserForm, AddAuthorizedEmailForm, BulkUploadForm,
                    DepartmentForm, ServiceForm, CannedResponseForm,
-                   PersonalCannedResponseForm) # Import necessary forms
+                   PersonalCannedResponseForm, BulkTicketActionForm) # Import necessary forms
 from ..decorators import admin_required, staff_or_admin_required # Import decorators
+from ..helpers import send_bulk_resolution_emails
+from ..archive import archive_year_range, archive_years, year_needs_archive, ticket_source
+from ..db_pool import pool_stats_snapshot
+from ..db_routing import replica_read, replica_status
+from ..ticket_details import indexed_detail_fields, parse_detail_filter, detail_criteria
+from ..canned_responses import invalidate_canned_responses
+from ..recipient_directory import invalidate_recipient_directory
+from ..ticket_assignment import record_bulk_load_changes
+from ..request_metrics import request_stats_snapshot
+from ..metrics import record_tickets_resolved
+from .. import audit
+from ..ticket_activity import (TICKET_VIEWS, apply_ticket_view, response_values, status_values, activity_rows,
+                               record_bulk_status_change, record_bulk_first_responses, record_ticket_deleted)
 
 # --- Create Blueprint ---
 admin_bp = Blueprint('admin', __name__, template_folder='templates', url_prefix='/admin')
@@ -30,7 +45,14 @@ admin_bp = Blueprint('admin', __name__, template_folder='templates', url_prefix=
 
 # Sa loob ng: eservices_app/admin/routes.py
 
+# Mga tab ng staff dashboard: (builder ng data, fragment template)
+# Ang shell page ay nagre-render lang ng naka-open na tab; ang iba ay kinukuha ng
+# browser sa 'admin.staff_dashboard_tab' kapag binuksan (tingnan ang staff_dashboard.html).
+DASHBOARD_TABS = ('tickets', 'dept', 'school')
+
+
 @admin_bp.route('/staff-dashboard')
+@replica_read
 @login_required
 def staff_dashboard():
     # --- Check Role ---
@@ -39,55 +61,144 @@ def staff_dashboard():
         current_app.logger.warning(f"Unauthorized access to staff dashboard by user {current_user.email}")
         return redirect(url_for('main.home'))
 
-    # --- Request Arguments ---
-    page_active = request.args.get('page_active', 1, type=int)
-    page_resolved = request.args.get('page_resolved', 1, type=int)
-    page_school = request.args.get('page_school', 1, type=int)
-    search_query = request.args.get('search', '').strip()
-    default_view = 'all_managed' if current_user.role == 'Staff' else 'all_system'
-    filter_view = request.args.get('filter_view', default_view)
-    selected_year = request.args.get('year', datetime.utcnow().year, type=int)
-    selected_quarter = request.args.get('quarter', 0, type=int)
-    active_tab = request.args.get('tab', 'tickets')
+    args = _dashboard_args()
 
     # --- Year/Quarter Setup ---
     available_years_query = db.session.query(extract('year', Ticket.date_posted)).distinct().order_by(extract('year', Ticket.date_posted).desc())
     available_years = [y[0] for y in available_years_query.all()]
+    # Isama ang mga taon na nasa archive (MIN/MAX lang, hindi buong scan)
+    archive_range = archive_year_range()
+    if archive_range:
+        available_years = sorted(set(available_years) | set(archive_years(archive_range)), reverse=True)
     current_year = datetime.utcnow().year
     if not available_years: available_years.append(current_year)
-    elif selected_year not in available_years: selected_year = available_years[0]
+    elif args['selected_year'] not in available_years: args['selected_year'] = available_years[0]
+
+    ctx = _dashboard_query(args, archive_range)
+    tab_args = _dashboard_tab_args(ctx)
+    if ctx['managed_service_ids'] == []:
+        flash("You are not assigned to any services. Contact admin.", "warning")
+        current_app.logger.warning(f"Staff user {current_user.email} has no services.")
+        empty_paginate = db.paginate(db.select(Ticket).where(db.false()), page=1, per_page=current_app.config['TICKETS_PER_PAGE'], error_out=False)
+
+        # --- BAGONG DAGDAG na timestamp para iwas error ---
+        initial_latest_timestamp = datetime.min.replace(tzinfo=timezone.utc).isoformat()
+
+        return render_template('staff_dashboard.html',
+                               active_tickets=empty_paginate, resolved_tickets=empty_paginate, archived_tickets=None,
+                               load_dept_summary=lambda: {}, load_school_summary=lambda: (empty_paginate, {}),
+                               available_years=available_years, tab_args=tab_args, lazy_tabs=False,
+                               initial_latest_timestamp=initial_latest_timestamp, **ctx) # <-- Idinagdag dito
+
+    # --- Data ng naka-open na tab lang (ang ibang tabs ay lazy) ---
+    tab_context = _DASHBOARD_TAB_BUILDERS[ctx['active_tab']](ctx)
+
+    # ====================================================================
+    # === SIMULA NG BAGONG AYOS (Pagkuha ng tamang latest timestamp) ===
+    # ====================================================================
+
+    # Hanapin ang pinakabagong timestamp para sa polling
+    # Gagamitin natin ang 'ticket_base_query' bago ito i-paginate
+    # Ito ay sumusunod sa LAHAT ng filters (year, quarter, search, role)
+    latest_ticket_in_view = ctx['ticket_base_query'].order_by(Ticket.date_posted.desc()).first()
+
+    if latest_ticket_in_view:
+        # Ito ang pinakabagong ticket na nakikita ng user base sa filters
+        # Kailangan nating tiyakin na ito ay UTC at may "Z" (Zulu time)
+        latest_timestamp_utc = latest_ticket_in_view.date_posted.replace(tzinfo=timezone.utc)
+        initial_latest_timestamp = latest_timestamp_utc.isoformat().replace('+00:00', 'Z')
+    else:
+        # Kung walang ticket, magsimula sa pinaka-unang petsa
+        initial_latest_timestamp = datetime.min.replace(tzinfo=timezone.utc).isoformat().replace('+00:00', 'Z')
+
+    # ==================================================================
+    # === TAPOS NG BAGONG AYOS ===
+    # ==================================================================
+
+    # === ITO NA ANG IISANG FINAL RETURN ===
+    return render_template(
+        'staff_dashboard.html',
+        available_years=available_years,
+        tab_args=tab_args,
+        lazy_tabs=True,
+        initial_latest_timestamp=initial_latest_timestamp,  # <--- HETO NA ANG TAMANG TIMESTAMP
+        **ctx,
+        **tab_context
+    )
+
+
+@admin_bp.route('/staff-dashboard/tab/<tab>')
+@replica_read
+@login_required
+@staff_or_admin_required
+def staff_dashboard_tab(tab):
+    """Returns the HTML fragment of one dashboard tab (kinukuha ng browser kapag binuksan ang tab)."""
+    if tab not in DASHBOARD_TABS:
+        abort(404)
+    args = _dashboard_args()
+    args['active_tab'] = tab
+    ctx = _dashboard_query(args, archive_year_range())
+    if ctx['managed_service_ids'] == []:
+        empty_paginate = db.paginate(db.select(Ticket).where(db.false()), page=1, per_page=current_app.config['TICKETS_PER_PAGE'], error_out=False)
+        tab_context = {'active_tickets': empty_paginate, 'resolved_tickets': empty_paginate, 'archived_tickets': None,
+                       'bulk_form': None, 'load_dept_summary': lambda: {}, 'load_school_summary': lambda: (empty_paginate, {})}
+    else:
+        tab_context = _DASHBOARD_TAB_BUILDERS[tab](ctx)
+    response = current_app.make_response(render_template(_DASHBOARD_TAB_TEMPLATES[tab], **ctx, **tab_context))
+    # Summaries: ok na i-reuse ng browser nang sandali; ang tickets tab ay live data (at may CSRF token)
+    response.headers['Cache-Control'] = 'private, no-cache' if tab == 'tickets' else 'private, max-age=60'
+    return response
+
+
+def _dashboard_args():
+    """Reads the dashboard filters and page numbers from the query string."""
+    default_view = 'all_managed' if current_user.role == 'Staff' else 'all_system'
+    active_tab = request.args.get('tab', 'tickets')
+    ticket_view = request.args.get('view', '')
+    detail_filter = request.args.get('detail', '')
+    return {
+        'page_active': request.args.get('page_active', 1, type=int),
+        'page_resolved': request.args.get('page_resolved', 1, type=int),
+        'page_school': request.args.get('page_school', 1, type=int),
+        'page_archived': request.args.get('page_archived', 1, type=int),
+        'search_query': request.args.get('search', '').strip(),
+        'filter_view': request.args.get('filter_view', default_view),
+        'selected_year': request.args.get('year', datetime.utcnow().year, type=int),
+        'selected_quarter': request.args.get('quarter', 0, type=int),
+        'active_tab': active_tab if active_tab in DASHBOARD_TABS else 'tickets',
+        'ticket_view': ticket_view if ticket_view in TICKET_VIEWS else '',
+        'detail_filter': detail_filter if parse_detail_filter(detail_filter) else '', # 'key:value' (tingnan ang ticket_details.py)
+    }
+
+
+def _dashboard_query(args, archive_range):
+    """Builds the role/search/date-filtered ticket query shared by the dashboard shell and its tabs.
+
+    Ang 'managed_service_ids' ay [] kapag Staff na walang services (walang query na gagawin).
+    """
+    ctx = dict(args)
+    selected_year = ctx['selected_year']
     quarters = {
         1: (datetime(selected_year, 1, 1, tzinfo=timezone.utc), datetime(selected_year, 3, 31, 23, 59, 59, tzinfo=timezone.utc)),
         2: (datetime(selected_year, 4, 1, tzinfo=timezone.utc), datetime(selected_year, 6, 30, 23, 59, 59, tzinfo=timezone.utc)),
         3: (datetime(selected_year, 7, 1, tzinfo=timezone.utc), datetime(selected_year, 9, 30, 23, 59, 59, tzinfo=timezone.utc)),
         4: (datetime(selected_year, 10, 1, tzinfo=timezone.utc), datetime(selected_year, 12, 31, 23, 59, 59, tzinfo=timezone.utc)),
     }
+    ctx['quarter_range'] = quarters.get(ctx['selected_quarter'])
+    ctx['include_archive'] = bool(ctx['search_query']) or year_needs_archive(selected_year, archive_range)
+    ctx['detail'] = parse_detail_filter(ctx['detail_filter'])
+    ctx['detail_fields'] = indexed_detail_fields()
 
     # --- Base Ticket Query & Filtering ---
     ticket_base_query = Ticket.query.options(db.joinedload(Ticket.school), db.joinedload(Ticket.service_type))
     managed_service_ids = None
-    title = ""
+    filter_view = ctx['filter_view']
 
     if current_user.role == 'Staff':
         managed_service_ids = [service.id for service in current_user.managed_services]
         if not managed_service_ids:
-            flash("You are not assigned to any services. Contact admin.", "warning")
-            current_app.logger.warning(f"Staff user {current_user.email} has no services.")
-            empty_paginate = db.paginate(db.select(Ticket).where(db.false()), page=1, per_page=current_app.config['TICKETS_PER_PAGE'], error_out=False)
-            
-            # --- BAGONG DAGDAG na timestamp para iwas error ---
-            initial_latest_timestamp = datetime.min.replace(tzinfo=timezone.utc).isoformat()
-            
-            return render_template('staff_dashboard.html', 
-                                   active_tickets=empty_paginate, resolved_tickets=empty_paginate, 
-                                   dashboard_summary={}, school_summary={}, 
-                                   paginated_schools=empty_paginate,
-                                   title="My Managed Tickets", available_years=available_years, 
-                                   selected_year=selected_year, selected_quarter=selected_quarter, 
-                                   search_query=search_query, filter_view=filter_view,
-                                   active_tab=active_tab,
-                                   initial_latest_timestamp=initial_latest_timestamp) # <-- Idinagdag dito
-
+            ctx.update(managed_service_ids=[], ticket_base_query=None, title="My Managed Tickets", cache_scope=None)
+            return ctx
         ticket_base_query = ticket_base_query.filter(Ticket.service_id.in_(managed_service_ids))
         if filter_view == 'my_assigned':
             ticket_base_query = ticket_base_query.filter(Ticket.assigned_staff_id == current_user.id)
@@ -104,171 +215,388 @@ def staff_dashboard():
             filter_view = 'all_system'
 
     # --- Apply Search or Date Filters ---
+    search_query = ctx['search_query']
     if search_query:
         search_term = f"%{search_query}%"
         ticket_base_query = ticket_base_query.join(School, Ticket.school_id == School.id, isouter=True).filter(
             or_(Ticket.ticket_number.ilike(search_term), Ticket.requester_name.ilike(search_term), School.name.ilike(search_term)))
     else:
         ticket_base_query = ticket_base_query.filter(extract('year', Ticket.date_posted) == selected_year)
-        if selected_quarter in quarters:
-            start_date, end_date = quarters[selected_quarter]
-            ticket_base_query = ticket_base_query.filter(Ticket.date_posted.between(start_date, end_date))
+        if ctx['quarter_range']:
+            ticket_base_query = ticket_base_query.filter(Ticket.date_posted.between(*ctx['quarter_range']))
+    # Indexed details field (e.g. Provident Fund query type)
+    if ctx['detail']:
+        ticket_base_query = ticket_base_query.filter(detail_criteria(Ticket.__table__, ctx['detail']))
+
+    # Fragment cache scope: pareho ang summaries para sa parehong role/services/filter (tingnan ang fragment_cache.py)
+    cache_scope = 'all' if managed_service_ids is None else 'services:' + ','.join(map(str, sorted(managed_service_ids)))
+    if filter_view == 'my_assigned':
+        cache_scope = f'assigned:{current_user.id}:{cache_scope}'
+    if ctx['detail_filter']:
+        cache_scope = f"{cache_scope}:detail:{ctx['detail_filter']}"
+
+    ctx.update(managed_service_ids=managed_service_ids, ticket_base_query=ticket_base_query,
+               filter_view=filter_view, title=title, cache_scope=cache_scope)
+    return ctx
+
+
+def _dashboard_tab_args(ctx):
+    """Query args na ipinapasa sa tab fragment URLs at sa reload links."""
+    return {'year': ctx['selected_year'], 'quarter': ctx['selected_quarter'], 'search': ctx['search_query'],
+            'filter_view': ctx['filter_view'], 'page_active': ctx['page_active'], 'page_resolved': ctx['page_resolved'],
+            'page_school': ctx['page_school'], 'page_archived': ctx['page_archived'], 'view': ctx['ticket_view'] or None,
+            'detail': ctx['detail_filter'] or None}
+
+
+def _dashboard_tickets_tab(ctx):
+    """Active, resolved and (kung kailangan) archived tickets, plus the bulk action form."""
+    ticket_base_query = ctx['ticket_base_query']
+    per_page = current_app.config['TICKETS_PER_PAGE']
 
     # --- Paginate Tickets ---
     status_order = case((Ticket.status == 'Open', 1), (Ticket.status == 'In Progress', 2), else_=3)
-    active_tickets = db.paginate(ticket_base_query.filter(Ticket.status.in_(['Open', 'In Progress'])).order_by(status_order, Ticket.date_posted.desc()), page=page_active, per_page=current_app.config['TICKETS_PER_PAGE'], error_out=False)
-    resolved_tickets = db.paginate(ticket_base_query.filter(Ticket.status == 'Resolved').order_by(Ticket.date_posted.desc()), page=page_resolved, per_page=current_app.config['TICKETS_PER_PAGE'], error_out=False)
-
-    # --- Generate Summaries (Only if not searching) ---
+    # Query.paginate (hindi db.paginate) para gumana ang joinedload options; dati ay
+    # natatakpan lang ito ng identity map kapag kasabay na nilo-load ang summaries
+    # 'recent' / 'awaiting' views: activity columns lang ng ticket (tingnan ang ticket_activity.py)
+    active_query = ticket_base_query.filter(Ticket.status.in_(['Open', 'In Progress']))
+    active_query = apply_ticket_view(active_query, ctx['ticket_view']) or active_query.order_by(status_order, Ticket.date_posted.desc())
+    resolved_query = ticket_base_query.filter(Ticket.status == 'Resolved')
+    resolved_query = apply_ticket_view(resolved_query, ctx['ticket_view'], active=False) or resolved_query.order_by(Ticket.date_posted.desc())
+    active_tickets = active_query.paginate(page=ctx['page_active'], per_page=per_page, error_out=False)
+    resolved_tickets = resolved_query.paginate(page=ctx['page_resolved'], per_page=per_page, error_out=False)
+
+    # --- Archived Tickets (kung kailangan lang ng napiling taon o ng search) ---
+    archived_tickets = None
+    if ctx['include_archive']:
+        archived_query = _filter_archived_tickets(
+            ArchivedTicket.query.options(db.joinedload(ArchivedTicket.school), db.joinedload(ArchivedTicket.service_type)),
+            ctx['managed_service_ids'], ctx['filter_view'], ctx['search_query'], ctx['selected_year'],
+            ctx['quarter_range'], ctx['detail'])
+        archived_tickets = archived_query.order_by(ArchivedTicket.date_posted.desc()).paginate(page=ctx['page_archived'], per_page=per_page, error_out=False)
+
+    # --- Bulk Action Form (para sa Active Tickets table) ---
+    bulk_form = _build_bulk_action_form(ctx['managed_service_ids'])
+    return {'active_tickets': active_tickets, 'resolved_tickets': resolved_tickets,
+            'archived_tickets': archived_tickets, 'bulk_form': bulk_form}
+
+
+def _dashboard_dept_summary_tab(ctx):
+    """Lazy loader: tinatawag lang ng template kapag wala sa fragment cache ang summary."""
+    return {'load_dept_summary': partial(_dept_summary_data, ctx)}
+
+
+def _dept_summary_data(ctx):
+    """Ticket counts per department and service (walang summary kapag nag-search)."""
     dashboard_summary = {}
-    school_summary = {}
-    paginated_schools = db.paginate(db.select(School).where(db.false()), page=1, per_page=10, error_out=False)
+    if ctx['search_query']:
+        return dashboard_summary
+    managed_service_ids = ctx['managed_service_ids']
+
+    # === Department Summary ===
+    # Ang 'src' ay 'ticket' table, o UNION ALL ng ticket + archived_ticket kung kailangan
+    src = ticket_source(ctx['include_archive'], ctx['detail'])
+    dept_summary_query = db.session.query(
+        Department.name.label('dept_name'),
+        Service.name.label('service_name'),
+        Service.id.label('service_id'),
+        func.count(src.c.id).label('total'),
+        func.sum(case((src.c.status == 'Resolved', 1), else_=0)).label('resolved_count')
+    ).select_from(src).join(Service, src.c.service_id == Service.id).join(Department, Service.department_id == Department.id)
+    dept_summary_query = dept_summary_query.filter(extract('year', src.c.date_posted) == ctx['selected_year'])
+    if ctx['quarter_range']:
+        dept_summary_query = dept_summary_query.filter(src.c.date_posted.between(*ctx['quarter_range']))
+    if managed_service_ids is not None:
+         dept_summary_query = dept_summary_query.filter(Service.id.in_(managed_service_ids))
+    if ctx['filter_view'] == 'my_assigned':
+        dept_summary_query = dept_summary_query.filter(src.c.assigned_staff_id == current_user.id)
+    dept_summary_data = dept_summary_query.group_by(Department.name, Service.name, Service.id).all()
+    if current_user.role == 'Admin':
+        all_departments = Department.query.options(db.joinedload(Department.services)).order_by(Department.name).all()
+    else: # Staff
+        all_departments = Department.query.join(Service).filter(Service.id.in_(managed_service_ids)).options(db.joinedload(Department.services.and_(Service.id.in_(managed_service_ids)))).order_by(Department.name).distinct().all()
+    color_palette = ['#FE9321', '#6FE3CC', '#185D7A', '#C8DB2A', '#EF4687', '#5BC0DE', '#F0AD4E', '#D9534F']
+    for dept in all_departments:
+        dept_services_data = []
+        department_total_tickets = 0
+        services_in_dept = sorted([s for s in dept.services if managed_service_ids is None or s.id in managed_service_ids], key=lambda s: s.name)
+        for i, service in enumerate(services_in_dept):
+            found = next((row for row in dept_summary_data if row.dept_name == dept.name and row.service_id == service.id), None)
+            if found:
+                res, tot = found.resolved_count, found.total; act = tot - res
+                dept_services_data.append({'name': service.name, 'active': act, 'resolved': res, 'total': tot,'resolved_percent': int(res / tot * 100) if tot else 0,'color': color_palette[i % len(color_palette)]})
+                department_total_tickets += tot
+            else:
+                dept_services_data.append({'name': service.name, 'active': 0, 'resolved': 0, 'total': 0, 'resolved_percent': 0, 'color': color_palette[i % len(color_palette)]})
+        if dept_services_data:
+            dashboard_summary[dept.name] = {'services': dept_services_data,'department_total': department_total_tickets,'service_count': len(dept_services_data)}
+    return dashboard_summary
 
-    if not search_query:
-        # === Department Summary ===
-        # (Walang binago dito)
-        dept_summary_query = db.session.query(
-            Department.name.label('dept_name'),
+
+def _dashboard_school_summary_tab(ctx):
+    """Lazy loader: tinatawag lang ng template kapag wala sa fragment cache ang summary."""
+    return {'load_school_summary': partial(_school_summary_data, ctx)}
+
+
+def _school_summary_data(ctx):
+    """Ticket counts per school (paginated, most tickets first). Returns (paginated_schools, school_summary)."""
+    school_summary = {}
+    if ctx['search_query']:
+        paginated_schools = db.paginate(db.select(School).where(db.false()), page=1, per_page=10, error_out=False)
+        return paginated_schools, school_summary
+    managed_service_ids = ctx['managed_service_ids']
+    src = ticket_source(ctx['include_archive'], ctx['detail'])
+
+    # === School Summary ===
+    school_name_query = db.session.query(School). \
+        select_from(src).join(School, src.c.school_id == School.id). \
+        join(Service, src.c.service_id == Service.id)
+    school_name_query = school_name_query.filter(extract('year', src.c.date_posted) == ctx['selected_year'])
+    if ctx['quarter_range']:
+        school_name_query = school_name_query.filter(src.c.date_posted.between(*ctx['quarter_range']))
+    if managed_service_ids is not None:
+        school_name_query = school_name_query.filter(Service.id.in_(managed_service_ids))
+    if ctx['filter_view'] == 'my_assigned':
+        school_name_query = school_name_query.filter(src.c.assigned_staff_id == current_user.id)
+    school_name_query = school_name_query.group_by(School.id).order_by(func.count(src.c.id).desc(), School.name)
+    paginated_schools = db.paginate(school_name_query, page=ctx['page_school'], per_page=10, error_out=False)
+    current_page_school_names = [item.name for item in paginated_schools.items]
+
+    if current_page_school_names:
+        school_summary_details_query = db.session.query(
+            School.name.label('school_name'),
             Service.name.label('service_name'),
             Service.id.label('service_id'),
-            func.count(Ticket.id).label('total'),
-            func.sum(case((Ticket.status == 'Resolved', 1), else_=0)).label('resolved_count')
-        ).select_from(Ticket).join(Service, Ticket.service_id == Service.id).join(Department, Service.department_id == Department.id)
-        dept_summary_query = dept_summary_query.filter(extract('year', Ticket.date_posted) == selected_year)
-        if selected_quarter in quarters:
-            start_date, end_date = quarters[selected_quarter]
-            dept_summary_query = dept_summary_query.filter(Ticket.date_posted.between(start_date, end_date))
-        if managed_service_ids is not None:
-             dept_summary_query = dept_summary_query.filter(Service.id.in_(managed_service_ids))
-        if filter_view == 'my_assigned':
-            dept_summary_query = dept_summary_query.filter(Ticket.assigned_staff_id == current_user.id)
-        dept_summary_data = dept_summary_query.group_by(Department.name, Service.name, Service.id).all()
-        if current_user.role == 'Admin':
-            all_departments = Department.query.options(db.joinedload(Department.services)).order_by(Department.name).all()
-        else: # Staff
-            all_departments = Department.query.join(Service).filter(Service.id.in_(managed_service_ids)).options(db.joinedload(Department.services.and_(Service.id.in_(managed_service_ids)))).order_by(Department.name).distinct().all()
-        color_palette = ['#FE9321', '#6FE3CC', '#185D7A', '#C8DB2A', '#EF4687', '#5BC0DE', '#F0AD4E', '#D9534F']
-        for dept in all_departments:
-            dept_services_data = []
-            department_total_tickets = 0
-            services_in_dept = sorted([s for s in dept.services if managed_service_ids is None or s.id in managed_service_ids], key=lambda s: s.name)
-            for i, service in enumerate(services_in_dept):
-                found = next((row for row in dept_summary_data if row.dept_name == dept.name and row.service_id == service.id), None)
-                if found:
-                    res, tot = found.resolved_count, found.total; act = tot - res
-                    dept_services_data.append({'name': service.name, 'active': act, 'resolved': res, 'total': tot,'resolved_percent': int(res / tot * 100) if tot else 0,'color': color_palette[i % len(color_palette)]})
-                    department_total_tickets += tot
-                else:
-                    dept_services_data.append({'name': service.name, 'active': 0, 'resolved': 0, 'total': 0, 'resolved_percent': 0, 'color': color_palette[i % len(color_palette)]})
-            if dept_services_data:
-                dashboard_summary[dept.name] = {'services': dept_services_data,'department_total': department_total_tickets,'service_count': len(dept_services_data)}
-
-        # === School Summary ===
-        # (Walang binago dito)
-        school_name_query = db.session.query(School). \
-            select_from(Ticket).join(School, Ticket.school_id == School.id). \
-            join(Service, Ticket.service_id == Service.id)
-        school_name_query = school_name_query.filter(extract('year', Ticket.date_posted) == selected_year)
-        if selected_quarter in quarters:
-            start_date, end_date = quarters[selected_quarter]
-            school_name_query = school_name_query.filter(Ticket.date_posted.between(start_date, end_date))
+            func.count(src.c.id).label('total'),
+            func.sum(case((src.c.status == 'Resolved', 1), else_=0)).label('resolved_count')
+        ).select_from(src).join(Service, src.c.service_id == Service.id).join(School, src.c.school_id == School.id)
+        school_summary_details_query = school_summary_details_query.filter(extract('year', src.c.date_posted) == ctx['selected_year'])
+        if ctx['quarter_range']:
+            school_summary_details_query = school_summary_details_query.filter(src.c.date_posted.between(*ctx['quarter_range']))
         if managed_service_ids is not None:
-            school_name_query = school_name_query.filter(Service.id.in_(managed_service_ids))
-        if filter_view == 'my_assigned':
-            school_name_query = school_name_query.filter(Ticket.assigned_staff_id == current_user.id)
-        school_name_query = school_name_query.group_by(School.id).order_by(func.count(Ticket.id).desc(), School.name)
-        paginated_schools = db.paginate(school_name_query, page=page_school, per_page=10, error_out=False)
-        current_page_school_names = [item.name for item in paginated_schools.items]
-
-        if current_page_school_names:
-            school_summary_details_query = db.session.query(
-                School.name.label('school_name'),
-                Service.name.label('service_name'),
-                Service.id.label('service_id'),
-                func.count(Ticket.id).label('total'),
-                func.sum(case((Ticket.status == 'Resolved', 1), else_=0)).label('resolved_count')
-            ).select_from(Ticket).join(Service, Ticket.service_id == Service.id).join(School, Ticket.school_id == School.id)
-            school_summary_details_query = school_summary_details_query.filter(extract('year', Ticket.date_posted) == selected_year)
-            if selected_quarter in quarters:
-                start_date, end_date = quarters[selected_quarter]
-                school_summary_details_query = school_summary_details_query.filter(Ticket.date_posted.between(start_date, end_date))
-            if managed_service_ids is not None:
-                school_summary_details_query = school_summary_details_query.filter(Service.id.in_(managed_service_ids))
-            if filter_view == 'my_assigned':
-                school_summary_details_query = school_summary_details_query.filter(Ticket.assigned_staff_id == current_user.id)
-            school_summary_details_query = school_summary_details_query.filter(School.name.in_(current_page_school_names))
-            school_summary_data_flat = school_summary_details_query.group_by(School.name, Service.name, Service.id).order_by(School.name, Service.name).all()
-            for school_obj in paginated_schools.items:
-                school_summary[school_obj.name] = {'total_school_tickets': 0, 'services': []}
-            for row in school_summary_data_flat:
-                s_name = row.school_name
-                if s_name in school_summary: 
-                    res, tot = row.resolved_count, row.total; act = tot - res
-                    school_summary[s_name]['services'].append({'name': row.service_name, 'active': act, 'resolved': res, 'total': tot})
-                    school_summary[s_name]['total_school_tickets'] += tot
-        
-    else: 
-         paginated_schools = db.paginate(db.select(School).where(db.false()), page=1, per_page=10, error_out=False)
- 
-
-    # ====================================================================
-    # === SIMULA NG BAGONG AYOS (Pagkuha ng tamang latest timestamp) ===
-    # ====================================================================
-    
-    # Hanapin ang pinakabagong timestamp para sa polling
-    # Gagamitin natin ang 'ticket_base_query' bago ito i-paginate
-    # Ito ay sumusunod sa LAHAT ng filters (year, quarter, search, role)
-    latest_ticket_in_view = ticket_base_query.order_by(Ticket.date_posted.desc()).first()
-    
-    if latest_ticket_in_view:
-        # Ito ang pinakabagong ticket na nakikita ng user base sa filters
-        # Kailangan nating tiyakin na ito ay UTC at may "Z" (Zulu time)
-        latest_timestamp_utc = latest_ticket_in_view.date_posted.replace(tzinfo=timezone.utc)
-        initial_latest_timestamp = latest_timestamp_utc.isoformat().replace('+00:00', 'Z')
+            school_summary_details_query = school_summary_details_query.filter(Service.id.in_(managed_service_ids))
+        if ctx['filter_view'] == 'my_assigned':
+            school_summary_details_query = school_summary_details_query.filter(src.c.assigned_staff_id == current_user.id)
+        school_summary_details_query = school_summary_details_query.filter(School.name.in_(current_page_school_names))
+        school_summary_data_flat = school_summary_details_query.group_by(School.name, Service.name, Service.id).order_by(School.name, Service.name).all()
+        for school_obj in paginated_schools.items:
+            school_summary[school_obj.name] = {'total_school_tickets': 0, 'services': []}
+        for row in school_summary_data_flat:
+            s_name = row.school_name
+            if s_name in school_summary:
+                res, tot = row.resolved_count, row.total; act = tot - res
+                school_summary[s_name]['services'].append({'name': row.service_name, 'active': act, 'resolved': res, 'total': tot})
+                school_summary[s_name]['total_school_tickets'] += tot
+    return paginated_schools, school_summary
+
+
+_DASHBOARD_TAB_BUILDERS = {'tickets': _dashboard_tickets_tab, 'dept': _dashboard_dept_summary_tab,
+                           'school': _dashboard_school_summary_tab}
+_DASHBOARD_TAB_TEMPLATES = {'tickets': '_dashboard_tickets.html', 'dept': '_dashboard_dept_summary.html',
+                            'school': '_dashboard_school_summary.html'}
+
+
+def _filter_archived_tickets(query, managed_service_ids, filter_view, search_query, selected_year, quarter_range, detail=None):
+    """Applies the same role/search/date/details filters as the dashboard to an ArchivedTicket query."""
+    if managed_service_ids is not None:
+        query = query.filter(ArchivedTicket.service_id.in_(managed_service_ids))
+    if filter_view == 'my_assigned':
+        query = query.filter(ArchivedTicket.assigned_staff_id == current_user.id)
+    if search_query:
+        search_term = f"%{search_query}%"
+        query = query.join(School, ArchivedTicket.school_id == School.id, isouter=True).filter(
+            or_(ArchivedTicket.ticket_number.ilike(search_term), ArchivedTicket.requester_name.ilike(search_term), School.name.ilike(search_term)))
     else:
-        # Kung walang ticket, magsimula sa pinaka-unang petsa
-        initial_latest_timestamp = datetime.min.replace(tzinfo=timezone.utc).isoformat().replace('+00:00', 'Z')
-
-    # ==================================================================
-    # === TAPOS NG BAGONG AYOS ===
-    # ==================================================================
-
-
-    # === ITO NA ANG IISANG FINAL RETURN ===
-    return render_template(
-        'staff_dashboard.html', 
-        title=title, 
-        active_tickets=active_tickets,
-        resolved_tickets=resolved_tickets,
-        paginated_schools=paginated_schools,
-        school_summary=school_summary,
-        dashboard_summary=dashboard_summary,
-        available_years=available_years,
-        selected_year=selected_year,
-        selected_quarter=selected_quarter,
-        search_query=search_query,
-        filter_view=filter_view,
-        active_tab=active_tab,
-        initial_latest_timestamp=initial_latest_timestamp  # <--- HETO NA ANG TAMANG TIMESTAMP
-    )
-
+        query = query.filter(extract('year', ArchivedTicket.date_posted) == selected_year)
+        if quarter_range:
+            query = query.filter(ArchivedTicket.date_posted.between(*quarter_range))
+    if detail:
+        query = query.filter(detail_criteria(ArchivedTicket.__table__, detail))
+    return query
+
+
+# === BULK TICKET ACTIONS (Staff/Admin) ===
+
+def _build_bulk_action_form(managed_service_ids):
+    """Builds the bulk action form with staff and canned response choices for the current user."""
+    form = BulkTicketActionForm()
+    staff_query = User.query.filter(User.role.in_(['Admin', 'Staff']))
+    system_query = CannedResponse.query
+    if managed_service_ids is not None:
+        # Staff: mga kasama lang sa managed services at canned responses ng mga department nila
+        staff_query = staff_query.join(user_service_association, User.id == user_service_association.c.user_id) \
+            .filter(user_service_association.c.service_id.in_(managed_service_ids)).distinct()
+        managed_dept_ids = select(Service.department_id).where(Service.id.in_(managed_service_ids))
+        system_query = system_query.filter(CannedResponse.department_id.in_(managed_dept_ids),
+                                           or_(CannedResponse.service_id == None, CannedResponse.service_id.in_(managed_service_ids)))
+    form.assigned_staff.choices += [(u.id, u.name) for u in staff_query.order_by(User.name).all()]
+    personal = PersonalCannedResponse.query.filter_by(user_id=current_user.id).order_by(PersonalCannedResponse.title).all()
+    form.canned_response.choices += [(f'personal-{r.id}', f'My: {r.title}') for r in personal]
+    form.canned_response.choices += [(f'system-{r.id}', r.title) for r in system_query.order_by(CannedResponse.title).all()]
+    return form
+
+
+@admin_bp.route('/tickets/bulk-action', methods=['POST'])
+@login_required
+@staff_or_admin_required
+def bulk_ticket_action():
+    form = BulkTicketActionForm()
+    redirect_target = request.referrer or url_for('admin.staff_dashboard')
+
+    if not form.validate_on_submit():
+        flash('Invalid bulk action request. Please try again.', 'danger')
+        return redirect(redirect_target)
+
+    ticket_ids = request.form.getlist('ticket_ids', type=int)
+    if not ticket_ids:
+        flash('No tickets selected.', 'warning')
+        return redirect(redirect_target)
+
+    new_status = form.status.data or None
+    new_staff_id = form.assigned_staff.data if form.assigned_staff.data is not None else -1
+    canned_key = form.canned_response.data or ''
+    is_internal = bool(form.is_internal.data)
+    if not new_status and new_staff_id == -1 and not canned_key:
+        flash('No bulk action selected.', 'info')
+        return redirect(redirect_target)
+
+    # --- Permission Filter (ginagamit sa lahat ng UPDATE/SELECT sa ibaba) ---
+    permitted = [Ticket.id.in_(ticket_ids)]
+    if current_user.role == 'Staff':
+        my_service_ids = select(user_service_association.c.service_id).where(user_service_association.c.user_id == current_user.id)
+        permitted.append(Ticket.service_id.in_(my_service_ids))
+
+    # --- Resolve Canned Response ---
+    canned_body = None
+    canned_filter = []
+    if canned_key:
+        kind, _, raw_id = canned_key.partition('-')
+        canned_obj = None
+        if raw_id.isdigit() and kind == 'system':
+            canned_obj = db.session.get(CannedResponse, int(raw_id))
+            if canned_obj:
+                canned_filter.append(Ticket.department_id == canned_obj.department_id)
+                if canned_obj.service_id is not None:
+                    canned_filter.append(Ticket.service_id == canned_obj.service_id)
+        elif raw_id.isdigit() and kind == 'personal':
+            canned_obj = db.session.get(PersonalCannedResponse, int(raw_id))
+            if canned_obj and canned_obj.user_id != current_user.id:
+                canned_obj = None
+        if not canned_obj:
+            flash('Invalid canned response selected.', 'danger')
+            return redirect(redirect_target)
+        canned_body = canned_obj.body
 
+    try:
+        # Kunin muna ang mga tickets na mare-resolve (para sa emails) bago ang UPDATE
+        resolved_rows = []
+        if new_status == 'Resolved':
+            resolved_rows = db.session.execute(
+                select(Ticket.id, Ticket.ticket_number, Ticket.requester_name, Ticket.requester_email,
+                       Service.name.label('service_name'))
+                .join(Service, Ticket.service_id == Service.id)
+                .where(*permitted, Ticket.status != 'Resolved')
+            ).all()
+
+        now = datetime.utcnow()
+        status_count = 0
+        if new_status:
+            # Status history, turnaround samples at audit (kailangan ang lumang status/resolved_at)
+            status_rows = activity_rows(*permitted, Ticket.status != new_status)
+            record_bulk_status_change(status_rows, new_status, current_user.id, now)
+            record_bulk_load_changes(status_rows, status=new_status)
+            for row in status_rows:
+                audit.record_event(audit.TICKET_STATUS_CHANGED, row, from_status=row.status, to_status=new_status, bulk=True)
+            status_count = Ticket.query.filter(*permitted, Ticket.status != new_status) \
+                .update(status_values(new_status, now), synchronize_session=False)
+
+        assign_count = 0
+        assign_filter = None
+        if new_staff_id == 0:
+            assign_filter = [*permitted, Ticket.assigned_staff_id != None]
+        elif new_staff_id > 0:
+            # Ma-a-assign lang sa tickets ng services na hawak ng napiling staff
+            staff_service_ids = select(user_service_association.c.service_id).where(user_service_association.c.user_id == new_staff_id)
+            assign_filter = [*permitted, Ticket.service_id.in_(staff_service_ids),
+                             or_(Ticket.assigned_staff_id == None, Ticket.assigned_staff_id != new_staff_id)]
+        if assign_filter is not None:
+            new_assignee = new_staff_id or None
+            assign_rows = db.session.execute(
+                select(Ticket.id, Ticket.ticket_number, Ticket.status, Ticket.assigned_staff_id).where(*assign_filter)).all()
+            record_bulk_load_changes(assign_rows, assigned_staff_id=new_assignee)
+            for row in assign_rows:
+                audit.record_event(audit.TICKET_ASSIGNED, row, from_staff_id=row.assigned_staff_id, to_staff_id=new_assignee, bulk=True)
+            assign_count = Ticket.query.filter(*assign_filter) \
+                .update({Ticket.assigned_staff_id: new_assignee}, synchronize_session=False)
+
+        replied_ticket_ids = []
+        if canned_body:
+            replied_rows = activity_rows(*permitted, *canned_filter)
+            replied_ticket_ids = [row.id for row in replied_rows]
+            if replied_ticket_ids:
+                if not is_internal:
+                    record_bulk_first_responses(replied_rows, now)
+                db.session.execute(insert(TicketResponse), [
+                    {'body': canned_body, 'is_internal': is_internal, 'date_posted': now,
+                     'user_id': current_user.id, 'ticket_id': ticket_id}
+                    for ticket_id in replied_ticket_ids
+                ])
+                # Activity columns sa parehong transaction (isang UPDATE para sa lahat ng replied tickets)
+                Ticket.query.filter(Ticket.id.in_(replied_ticket_ids)) \
+                    .update(response_values(now, staff_reply=not is_internal), synchronize_session=False)
+                reply_action = audit.TICKET_INTERNAL_NOTE if is_internal else audit.TICKET_REPLIED
+                for row in replied_rows:
+                    audit.record_event(reply_action, row, excerpt=audit.excerpt(canned_body), bulk=True)
 
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error applying bulk action by {current_user.email}: {e}", exc_info=True)
+        flash('An error occurred while applying the bulk action. Please try again.', 'danger')
+        return redirect(redirect_target)
+
+    current_app.logger.info(f"Bulk action by {current_user.email} on {len(ticket_ids)} ticket(s): status={new_status} ({status_count}), "
+                            f"assigned_staff={new_staff_id} ({assign_count}), replies={len(replied_ticket_ids)}")
+
+    if new_status == 'Resolved':
+        record_tickets_resolved(status_count, source='bulk')
+
+    if resolved_rows:
+        response_bodies = {}
+        if canned_body and not is_internal:
+            response_bodies = {ticket_id: canned_body for ticket_id in replied_ticket_ids}
+        send_bulk_resolution_emails(resolved_rows, response_bodies)
+
+    messages = []
+    if new_status:
+        messages.append(f'{status_count} ticket(s) set to {new_status}')
+    if new_staff_id == 0:
+        messages.append(f'{assign_count} ticket(s) unassigned')
+    elif new_staff_id > 0:
+        messages.append(f'{assign_count} ticket(s) assigned')
+    if canned_body:
+        messages.append(f'{len(replied_ticket_ids)} ticket(s) replied to')
+    flash('Bulk action applied: ' + ', '.join(messages) + '.', 'success')
+    return redirect(redirect_target)
 
 
 # === TICKET EXPORT (ADMIN) ===
 
+EXPORT_CHUNK_ROWS = 500
+
 @admin_bp.route('/export-tickets')
+@replica_read
 @login_required
 @admin_required # Use the decorator imported from ..decorators
 def export_tickets():
     search_query = request.args.get('search', '').strip()
     selected_year = request.args.get('year', datetime.utcnow().year, type=int)
     selected_quarter = request.args.get('quarter', 0, type=int)
+    detail = parse_detail_filter(request.args.get('detail'))
 
     export_query = Ticket.query.options(
         joinedload(Ticket.school),
-        joinedload(Ticket.service_type).joinedload(Service.department) # Load relationships
+        joinedload(Ticket.service_type).joinedload(Service.department), # Load relationships
+        joinedload(Ticket.assigned_staff) # Naka-load na lahat bago mag-stream (walang DB access sa generator)
     ).order_by(Ticket.date_posted.desc())
 
     # Apply filters matching dashboard (without pagination)
@@ -288,27 +616,43 @@ def export_tickets():
         if selected_quarter in quarters:
             start_date, end_date = quarters[selected_quarter]
             export_query = export_query.filter(Ticket.date_posted.between(start_date, end_date))
+    if detail:
+        export_query = export_query.filter(detail_criteria(Ticket.__table__, detail))
 
     tickets_to_export = export_query.all()
 
-    output = io.StringIO()
-    writer = csv.writer(output)
+    # Isama ang archived tickets kung kailangan ng napiling taon (o kung nag-search)
+    if search_query or year_needs_archive(selected_year):
+        archived_query = _filter_archived_tickets(
+            ArchivedTicket.query.options(joinedload(ArchivedTicket.school), joinedload(ArchivedTicket.service_type).joinedload(Service.department), joinedload(ArchivedTicket.assigned_staff)),
+            None, None, search_query, selected_year,
+            quarters.get(selected_quarter) if not search_query else None, detail)
+        tickets_to_export += archived_query.order_by(ArchivedTicket.date_posted.desc()).all()
+
     header = ['Ticket Number', 'Status', 'Requester Name', 'Requester Email', 'School/Office', 'Department', 'Service', 'Date Submitted', 'Assigned Staff'] # Added Assigned Staff
-    writer.writerow(header)
-
-    for ticket in tickets_to_export:
-        row = [
-            ticket.ticket_number, ticket.status, ticket.requester_name, ticket.requester_email,
-            ticket.school.name if ticket.school else 'N/A',
-            ticket.service_type.department.name if ticket.service_type and ticket.service_type.department else 'N/A', # Check if loaded
-            ticket.service_type.name if ticket.service_type else 'N/A', # Check if loaded
-            ticket.date_posted.strftime('%Y-%m-%d %H:%M:%S'),
-            ticket.assigned_staff.name if ticket.assigned_staff else 'Unassigned' # Get assigned staff name
-        ]
-        writer.writerow(row)
-
-    output.seek(0)
-    response = Response(output.getvalue(), mimetype='text/csv')
+
+    def generate_csv():
+        # Streamed: isang chunk bawat EXPORT_CHUNK_ROWS rows (sapat ang laki para sa compression)
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(header)
+        for index, ticket in enumerate(tickets_to_export, start=1):
+            row = [
+                ticket.ticket_number, ticket.status, ticket.requester_name, ticket.requester_email,
+                ticket.school.name if ticket.school else 'N/A',
+                ticket.service_type.department.name if ticket.service_type and ticket.service_type.department else 'N/A', # Check if loaded
+                ticket.service_type.name if ticket.service_type else 'N/A', # Check if loaded
+                ticket.date_posted.strftime('%Y-%m-%d %H:%M:%S'),
+                ticket.assigned_staff.name if ticket.assigned_staff else 'Unassigned' # Get assigned staff name
+            ]
+            writer.writerow(row)
+            if index % EXPORT_CHUNK_ROWS == 0:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+        yield output.getvalue()
+
+    response = Response(generate_csv(), mimetype='text/csv')
     # Generate filename with date/time
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     response.headers["Content-Disposition"] = f"attachment;filename=tickets_export_{timestamp}.csv"
@@ -324,6 +668,9 @@ def delete_ticket(ticket_id):
     ticket_to_delete = db.session.get(Ticket, ticket_id)
     if ticket_to_delete:
         ticket_number = ticket_to_delete.ticket_number
+        record_ticket_deleted(ticket_to_delete) # Turnaround samples at status history
+        audit.record_event(audit.TICKET_DELETED, ticket_to_delete, status=ticket_to_delete.status,
+                           requester_email=ticket_to_delete.requester_email)
         db.session.delete(ticket_to_delete) # Cascade should handle related items
         db.session.commit()
         current_app.logger.info(f"Admin {current_user.email} deleted ticket {ticket_number}")
@@ -346,6 +693,80 @@ def admin_dashboard():
     return render_template('admin/dashboard.html', title='Admin Dashboard')
 
 
+@admin_bp.route('/pool-stats')
+@login_required
+@admin_required
+def pool_stats():
+    """JSON stats ng database connection pool ng worker na ito (para sa pool sizing)."""
+    return jsonify({
+        'profile': current_app.config.get('DB_POOL_PROFILE'),
+        'engine_options': {key: value for key, value in current_app.config['SQLALCHEMY_ENGINE_OPTIONS'].items() if key != 'poolclass'},
+        'pools': pool_stats_snapshot(current_app),
+        'replica': replica_status(current_app),
+    })
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d') if value else None
+    except ValueError:
+        return None
+
+
+@admin_bp.route('/audit-log')
+@login_required
+@admin_required
+def audit_log():
+    """Audit search (time range + ticket/actor/action) o timeline ng isang ticket (?ticket_id=)."""
+    ticket_id = request.args.get('ticket_id', type=int)
+    if ticket_id:
+        ticket = db.session.get(Ticket, ticket_id)
+        return render_template('admin/audit_log.html', timeline=audit.ticket_timeline(ticket_id), ticket=ticket,
+                               ticket_id=ticket_id, action_labels=audit.ACTION_LABELS, title='Audit Trail')
+
+    filters = {
+        'ticket_number': request.args.get('ticket_number', '').strip(),
+        'actor_email': request.args.get('actor_email', '').strip(),
+        'action': request.args.get('action', '') if request.args.get('action') in audit.ACTION_LABELS else '',
+    }
+    # Default na range: huling 30 araw (maliban kung ticket number ang hinahanap)
+    date_from = _parse_date(request.args.get('date_from'))
+    date_to = _parse_date(request.args.get('date_to'))
+    if date_from is None and not filters['ticket_number']:
+        date_from = (datetime.utcnow() - timedelta(days=30)).replace(hour=0, minute=0, second=0, microsecond=0)
+    end = date_to + timedelta(days=1) if date_to else None
+
+    events = db.paginate(audit.search_events(date_from, end, **{key: value or None for key, value in filters.items()}),
+                         page=request.args.get('page', 1, type=int),
+                         per_page=current_app.config['AUDIT_EVENTS_PER_PAGE'], error_out=False)
+    search_args = dict(filters, date_from=date_from.strftime('%Y-%m-%d') if date_from else '',
+                       date_to=date_to.strftime('%Y-%m-%d') if date_to else '')
+    writer = current_app.extensions.get('audit_writer')
+    return render_template('admin/audit_log.html', events=events, search_args=search_args,
+                           action_labels=audit.ACTION_LABELS, writer_stats=writer.stats() if writer else None,
+                           title='Audit Log')
+
+
+@admin_bp.route('/request-stats', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def request_stats():
+    """Per-endpoint latency at SQL stats ng worker na ito (galing sa request_metrics)."""
+    stats = current_app.extensions.get('request_stats')
+    if request.method == 'POST' and stats:
+        stats.reset()
+        flash('Request stats have been reset for this worker.', 'success')
+        return redirect(url_for('admin.request_stats'))
+    rows = request_stats_snapshot(current_app)
+    if request.args.get('format') == 'json':
+        return jsonify({'since': stats.since if stats else None, 'endpoints': rows})
+    return render_template('admin/request_stats.html', rows=rows,
+                           since=datetime.fromtimestamp(stats.since) if stats else None,
+                           slow_request_ms=current_app.config['SLOW_REQUEST_MS'],
+                           slow_request_queries=current_app.config['SLOW_REQUEST_QUERIES'],
+                           title='Request Stats')
+
+
 # === USER MANAGEMENT (ADMIN) ===
 
 @admin_bp.route('/users')
@@ -389,6 +810,7 @@ def edit_user(user_id):
         user.managed_services = services # Assign the list of service objects
 
         db.session.commit()
+        invalidate_recipient_directory()
         current_app.logger.info(f"Admin {current_user.email} updated user profile for {user.email}")
         flash(f'User {user.name} updated successfully!', 'success')
         return redirect(url_for('admin.manage_users')) # Correct redirect endpoint
@@ -410,6 +832,7 @@ def delete_user(user_id):
         # Consider what happens to tickets assigned to this user (set to NULL due to model definition)
         db.session.delete(user)
         db.session.commit()
+        invalidate_recipient_directory()
         current_app.logger.info(f"Admin {current_user.email} deleted user {user_email}")
         flash(f'User {user.name} deleted.', 'success')
     elif user and user.id == current_user.id:
@@ -656,6 +1079,7 @@ def edit_service(service_id):
                     service.name = form.name.data
                     service.department_id = form.department_id.data
                     db.session.commit()
+                    invalidate_recipient_directory() # Service name sa staff notifications
                     current_app.logger.info(f"Admin {current_user.email} updated service ID {service_id}")
                     flash(f'Service "{service.name}" updated.', 'success')
                     return redirect(url_for('admin.manage_services'))
@@ -678,7 +1102,7 @@ def delete_service(service_id):
     if service:
         service_name = service.name
         # Check dependencies
-        if service.tickets:
+        if service.tickets or service.archived_tickets.first():
             flash(f'Cannot delete "{service_name}": has tickets.', 'danger')
             current_app.logger.warning(f"Admin {current_user.email} failed delete service '{service_name}': has tickets.")
         elif service.canned_responses: # Check system canned responses
@@ -691,6 +1115,7 @@ def delete_service(service_id):
             # CannedResponse.query.filter_by(service_id=service_id).delete() # Already handled? Check model.
             db.session.delete(service)
             db.session.commit()
+            invalidate_recipient_directory()
             current_app.logger.info(f"Admin {current_user.email} deleted service: {service_name}")
             flash(f'Service "{service_name}" deleted.', 'success')
             return redirect(url_for('admin.manage_services'))
@@ -739,6 +1164,7 @@ def add_canned_response():
                     new_response = CannedResponse(title=form.title.data, body=form.body.data, department_id=form.department_id.data, service_id=service_id_val)
                     db.session.add(new_response)
                     db.session.commit()
+                    invalidate_canned_responses(new_response.department_id)
                     current_app.logger.info(f"Admin {current_user.email} added canned response: '{form.title.data}'")
                     flash(f'Canned response "{form.title.data}" created.', 'success')
                     return redirect(url_for('admin.manage_canned_responses')) # Correct endpoint
@@ -812,12 +1238,14 @@ def edit_canned_response(response_id):
                         return render_template('admin/add_edit_canned_response.html', form=form, title='Edit Canned Response', response_id=response_id)
                 
                 # 3. Kung walang duplicate (o kung body lang ang nagbago), i-save na lahat.
+                old_department_id = response_obj.department_id
                 response_obj.title = form.title.data
                 response_obj.body = form.body.data
                 response_obj.department_id = form.department_id.data
                 response_obj.service_id = service_id_val
                 
                 db.session.commit()  # <-- Ito na ang magse-save ng pagbabago sa body
+                invalidate_canned_responses(old_department_id, response_obj.department_id)
                 
                 current_app.logger.info(f"Admin {current_user.email} updated canned response ID {response_id}")
                 flash(f'Canned response "{form.title.data}" updated.', 'success')
@@ -856,8 +1284,10 @@ def delete_canned_response(response_id):
     response_obj = db.session.get(CannedResponse, response_id)
     if response_obj:
         response_title = response_obj.title
+        department_id = response_obj.department_id
         db.session.delete(response_obj)
         db.session.commit()
+        invalidate_canned_responses(department_id)
         current_app.logger.info(f"Admin {current_user.email} deleted canned response: '{response_title}'")
         flash(f'Canned response "{response_title}" deleted.', 'success')
     else:
@@ -959,6 +1389,7 @@ def delete_my_response(response_id):
 # === AJAX Endpoint for Polling ===
 
 @admin_bp.route('/check-new-tickets')
+@replica_read
 @login_required
 @staff_or_admin_required # Only staff/admin need to poll
 def check_new_tickets():
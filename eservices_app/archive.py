@@ -0,0 +1,138 @@
+# eservices_app/archive.py
+
+# Hot/Cold archival ng mga lumang resolved tickets.
+# Ang 'ticket', 'response' at 'attachment' tables ang "hot" data na ginagamit ng
+# dashboard araw-araw. Ang mga lumang resolved tickets ay inililipat (in batches)
+# sa 'archived_*' tables para hindi na sila kasama sa bawat COUNT at summary.
+
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, insert, delete, func, literal, union_all
+
+from . import db
+from .models import (Ticket, Attachment, Response as TicketResponse,
+                     ArchivedTicket, ArchivedAttachment, ArchivedResponse)
+from .ticket_details import detail_criteria
+
+logger = logging.getLogger(__name__)
+
+# Mga columns na pareho sa hot at archive tables (para sa INSERT ... SELECT)
+TICKET_COLUMNS = [c.name for c in Ticket.__table__.columns]
+RESPONSE_COLUMNS = [c.name for c in TicketResponse.__table__.columns]
+ATTACHMENT_COLUMNS = [c.name for c in Attachment.__table__.columns]
+
+# Mga columns na kailangan ng summaries (ginagamit ng ticket_source)
+SUMMARY_COLUMNS = ['id', 'status', 'date_posted', 'department_id', 'service_id', 'school_id', 'assigned_staff_id']
+
+
+def archive_cutoff(older_than_days):
+    """Returns the date before which resolved tickets may be archived.
+
+    Hindi kailanman kasama ang kasalukuyang taon, dahil ang ticket number
+    sequence (e.g. ICT-2025-0001) ay kinukuha mula sa 'ticket' table lang.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    start_of_year = datetime(datetime.utcnow().year, 1, 1)
+    return min(cutoff, start_of_year)
+
+
+def archive_resolved_tickets(older_than_days, batch_size=500, max_batches=None, dry_run=False):
+    """Moves resolved tickets older than the cutoff (with responses and attachments) into the archive tables.
+
+    Bawat batch ay isang transaction: INSERT ... SELECT papunta sa archive, tapos
+    DELETE sa hot tables. Returns the number of tickets archived.
+    """
+    cutoff = archive_cutoff(older_than_days)
+    eligible = select(Ticket.id).where(Ticket.status == 'Resolved', Ticket.date_posted < cutoff)
+
+    if dry_run:
+        count = db.session.scalar(select(func.count()).select_from(eligible.subquery()))
+        logger.info(f"Archive dry run: {count} resolved tickets older than {cutoff:%Y-%m-%d} would be archived")
+        return count
+
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        ticket_ids = db.session.scalars(eligible.order_by(Ticket.id).limit(batch_size)).all()
+        if not ticket_ids:
+            break
+        now = datetime.utcnow()
+        try:
+            db.session.execute(insert(ArchivedTicket.__table__).from_select(
+                TICKET_COLUMNS + ['archived_at'],
+                select(*[Ticket.__table__.c[name] for name in TICKET_COLUMNS], literal(now, type_=db.DateTime))
+                .where(Ticket.__table__.c.id.in_(ticket_ids))
+            ))
+            db.session.execute(insert(ArchivedResponse.__table__).from_select(
+                RESPONSE_COLUMNS,
+                select(*[TicketResponse.__table__.c[name] for name in RESPONSE_COLUMNS])
+                .where(TicketResponse.__table__.c.ticket_id.in_(ticket_ids))
+            ))
+            db.session.execute(insert(ArchivedAttachment.__table__).from_select(
+                ATTACHMENT_COLUMNS,
+                select(*[Attachment.__table__.c[name] for name in ATTACHMENT_COLUMNS])
+                .where(Attachment.__table__.c.ticket_id.in_(ticket_ids))
+            ))
+            # Burahin ang children bago ang tickets (foreign keys)
+            db.session.execute(delete(TicketResponse.__table__).where(TicketResponse.__table__.c.ticket_id.in_(ticket_ids)))
+            db.session.execute(delete(Attachment.__table__).where(Attachment.__table__.c.ticket_id.in_(ticket_ids)))
+            db.session.execute(delete(Ticket.__table__).where(Ticket.__table__.c.id.in_(ticket_ids)))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error archiving batch starting at ticket ID {ticket_ids[0]}: {e}", exc_info=True)
+            raise
+        total += len(ticket_ids)
+        batches += 1
+        logger.info(f"Archived batch {batches}: {len(ticket_ids)} tickets (total {total})")
+
+    return total
+
+
+def archive_year_range():
+    """Returns (min_year, max_year) of the archived tickets, or None if the archive is empty.
+
+    MIN/MAX lang sa naka-index na date_posted, kaya mabilis kahit malaki ang archive.
+    """
+    min_date, max_date = db.session.execute(
+        select(func.min(ArchivedTicket.date_posted), func.max(ArchivedTicket.date_posted))
+    ).one()
+    if min_date is None:
+        return None
+    return min_date.year, max_date.year
+
+
+def archive_years(year_range=None):
+    """Returns the list of years that may have archived tickets (newest first)."""
+    year_range = year_range if year_range is not None else archive_year_range()
+    if not year_range:
+        return []
+    return list(range(year_range[1], year_range[0] - 1, -1))
+
+
+def year_needs_archive(year, year_range=None):
+    """True kung ang napiling taon ay may tickets na nasa archive."""
+    year_range = year_range if year_range is not None else archive_year_range()
+    if not year_range:
+        return False
+    return year_range[0] <= year <= year_range[1]
+
+
+def ticket_source(include_archive, detail=None):
+    """Returns the selectable that summaries should count tickets from.
+
+    Kung hindi kailangan ang archive (at walang details filter), ang 'ticket' table
+    mismo ang ibinabalik. Kung kailangan, UNION ALL ng hot at archived tickets
+    (summary columns lang); ang details filter ay nasa loob ng bawat SELECT para
+    magamit ang index nito.
+    """
+    if not include_archive and detail is None:
+        return Ticket.__table__
+    parts = []
+    for table in (Ticket.__table__, ArchivedTicket.__table__) if include_archive else (Ticket.__table__,):
+        part = select(*[table.c[name] for name in SUMMARY_COLUMNS])
+        if detail is not None:
+            part = part.where(detail_criteria(table, detail))
+        parts.append(part)
+    return (union_all(*parts) if len(parts) > 1 else parts[0]).subquery('ticket_source')
@@ -0,0 +1,275 @@
+# eservices_app/assets.py
+
+# Self-hosted, fingerprinted at precompressed na static assets.
+#
+# 'flask build-assets':
+#   1. Dina-download (vendor) ang Bootstrap, Bootstrap Icons at Chart.js papunta sa
+#      static/vendor/ (isang beses lang; --refresh para i-download ulit). Kapag may
+#      SRI integrity ang asset, chine-check ito bago i-save.
+#   2. Kinokopya ang lahat ng files sa static/ (maliban sa uploads/ at dist/) papunta
+#      sa ASSETS_DIR na may content hash sa filename (style.css -> style.1a2b3c4d5e6f.css),
+#      kasama ang .gz at .br (kung naka-install ang 'brotli') na variants. Ang url(...)
+#      sa CSS ay nire-rewrite papunta sa hashed filenames (e.g. Bootstrap Icons fonts).
+#   3. Isinusulat ang manifest.json (logical path -> hashed path, encodings, integrity).
+#
+# Sa app: ang '/assets/<hashed path>' ay sine-serve na may 'immutable' far-future
+# Cache-Control (nagbabago ang URL kapag nagbago ang laman) at ang .br/.gz variant
+# kapag tanggap ng browser. Sa templates, gamitin ang asset_url('css/style.css')
+# (parehong filename gaya ng url_for('static', filename=...)). Kung wala pang build,
+# ang asset_url ay babalik sa url_for('static', ...) o sa CDN URL ng vendor asset.
+#
+# Ang manifest ay binabasa isang beses sa startup; i-restart ang app pagkatapos ng build.
+
+import base64
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import tempfile
+import urllib.request
+
+from flask import current_app, abort, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError: # Optional; kung wala, .gz lang ang precompressed variant
+    brotli = None
+
+MANIFEST_NAME = 'manifest.json'
+# Mga folder sa static/ na hindi kasama sa build (user uploads at ang build output mismo)
+EXCLUDED_DIRS = ('uploads', 'dist')
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.map', '.ttf', '.eot')
+MIN_COMPRESS_BYTES = 512
+CSS_URL_PATTERN = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+# Vendor assets: logical path (sa static/) -> CDN source at SRI integrity (kung alam)
+VENDOR_ASSETS = {
+    'vendor/bootstrap/css/bootstrap.min.css': {
+        'url': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css',
+        'integrity': 'sha384-QWTKZyjpPEjISv5WaRU9OFeRpok6YctnYmDr5pNlyT2bRjXh0JMhjY6hW+ALEwIH',
+    },
+    'vendor/bootstrap/js/bootstrap.bundle.min.js': {
+        'url': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js',
+        'integrity': 'sha384-YvpcrYf0tY3lHB60NNkmXc5s9fDVZLESaAA55NDzOxhy9GkcIdslK1eN7N6jIeHz',
+    },
+    'vendor/bootstrap-icons/bootstrap-icons.min.css': {
+        'url': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/bootstrap-icons.min.css',
+    },
+    # Nire-reference ng bootstrap-icons.min.css bilang ./fonts/...
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff2': {
+        'url': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff2',
+    },
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff': {
+        'url': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff',
+    },
+    'vendor/chart.js/chart.umd.js': {
+        'url': 'https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.js',
+    },
+}
+
+
+def sri_hash(data):
+    return 'sha384-' + base64.b64encode(hashlib.sha384(data).digest()).decode('ascii')
+
+
+def fingerprinted_name(path, data):
+    """'css/style.css' -> 'css/style.<12 hex chars of sha256>.css'."""
+    root, ext = posixpath.splitext(path)
+    return f"{root}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+# --- Vendoring ---
+
+def vendor_assets(static_dir, refresh=False, timeout=30):
+    """Downloads the VENDOR_ASSETS into static_dir. Returns the list of downloaded logical paths."""
+    downloaded = []
+    for logical_path, source in VENDOR_ASSETS.items():
+        target = os.path.join(static_dir, *logical_path.split('/'))
+        if os.path.exists(target) and not refresh:
+            continue
+        with urllib.request.urlopen(source['url'], timeout=timeout) as response:
+            data = response.read()
+        if source.get('integrity') and sri_hash(data) != source['integrity']:
+            raise ValueError(f"Integrity check failed for {source['url']}")
+        _write_atomic(target, data)
+        downloaded.append(logical_path)
+    return downloaded
+
+
+# --- Build ---
+
+def _iter_static_files(static_dir):
+    for dirpath, dirnames, filenames in os.walk(static_dir):
+        if dirpath == static_dir:
+            dirnames[:] = [d for d in dirnames if d not in EXCLUDED_DIRS]
+        for filename in filenames:
+            if filename.startswith('.'):
+                continue
+            full_path = os.path.join(dirpath, filename)
+            yield os.path.relpath(full_path, static_dir).replace(os.sep, '/'), full_path
+
+
+def _rewrite_css_urls(css, css_path, files):
+    """Points relative url(...) references in a CSS file to the fingerprinted names."""
+    css_dir = posixpath.dirname(css_path)
+
+    def replace(match):
+        quote, url = match.group(1), match.group(2).strip()
+        if url.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        target_path, _, fragment = url.partition('#')
+        target_path = target_path.split('?', 1)[0] # ang ?v=... cache buster ay hindi na kailangan
+        logical = posixpath.normpath(posixpath.join(css_dir, target_path))
+        entry = files.get(logical)
+        if entry is None:
+            return match.group(0)
+        new_url = posixpath.relpath(entry['path'], css_dir) + (f'#{fragment}' if fragment else '')
+        return f"url({quote}{new_url}{quote})"
+
+    return CSS_URL_PATTERN.sub(replace, css)
+
+
+def _write_variants(output_dir, hashed_path, data):
+    target = os.path.join(output_dir, *hashed_path.split('/'))
+    _write_atomic(target, data)
+    encodings = []
+    if hashed_path.endswith(COMPRESSIBLE_EXTENSIONS) and len(data) >= MIN_COMPRESS_BYTES:
+        if brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+            if len(compressed) < len(data) * 0.95:
+                _write_atomic(target + '.br', compressed)
+                encodings.append('br')
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) < len(data) * 0.95:
+            _write_atomic(target + '.gz', compressed)
+            encodings.append('gzip')
+    return encodings
+
+
+def build_assets(static_dir, output_dir):
+    """Writes fingerprinted copies (+ .gz/.br) of the static files and the manifest. Returns the manifest."""
+    sources = dict(_iter_static_files(static_dir))
+    files = {}
+    # Unahin ang non-CSS files para alam na ang hashed names kapag nire-rewrite ang CSS
+    ordered = sorted(sources, key=lambda path: (path.endswith('.css'), path))
+    for logical_path in ordered:
+        with open(sources[logical_path], 'rb') as f:
+            data = f.read()
+        if logical_path.endswith('.css'):
+            data = _rewrite_css_urls(data.decode('utf-8'), logical_path, files).encode('utf-8')
+        hashed_path = fingerprinted_name(logical_path, data)
+        files[logical_path] = {
+            'path': hashed_path,
+            'size': len(data),
+            'integrity': sri_hash(data),
+            'encodings': _write_variants(output_dir, hashed_path, data),
+        }
+
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    previous = load_manifest(manifest_path)
+    manifest = {'files': files}
+    _write_atomic(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    _prune_old_builds(output_dir, manifest, previous)
+    return manifest
+
+
+def _prune_old_builds(output_dir, manifest, previous):
+    """Deletes hashed files that are in neither the new nor the previous build.
+
+    Ang files ng previous build ay iniiwan para sa mga naka-open (o naka-cache) na
+    pages na luma pa ang asset URLs habang nagde-deploy.
+    """
+    keep = {MANIFEST_NAME}
+    for build in (manifest, previous):
+        for entry in build.get('files', {}).values():
+            keep.add(entry['path'])
+            keep.update(entry['path'] + ext for ext in ('.gz', '.br'))
+    for logical_path, full_path in list(_iter_static_files(output_dir)):
+        if logical_path not in keep:
+            os.remove(full_path)
+
+
+def load_manifest(manifest_path):
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# --- Runtime ---
+
+class AssetManifest:
+    """Maps static filenames to their fingerprinted URLs and serves the built files."""
+
+    def __init__(self, static_dir, output_dir, max_age):
+        self.static_dir = static_dir
+        self.output_dir = output_dir
+        self.max_age = max_age
+        self.files = load_manifest(os.path.join(output_dir, MANIFEST_NAME)).get('files', {})
+        self.by_hashed_path = {entry['path']: entry for entry in self.files.values()}
+        # Vendor assets na hindi pa na-download: sa CDN muna kinukuha
+        self.cdn_fallbacks = {
+            logical_path: source for logical_path, source in VENDOR_ASSETS.items()
+            if logical_path not in self.files and not os.path.exists(os.path.join(static_dir, *logical_path.split('/')))
+        }
+
+    def url(self, filename, **values):
+        entry = self.files.get(filename)
+        if entry is not None:
+            return url_for('assets', filename=entry['path'], **values)
+        if filename in self.cdn_fallbacks:
+            return self.cdn_fallbacks[filename]['url']
+        return url_for('static', filename=filename, **values)
+
+    def integrity(self, filename):
+        entry = self.files.get(filename) or self.cdn_fallbacks.get(filename) or {}
+        return entry.get('integrity', '')
+
+    def serve(self, filename):
+        entry = self.by_hashed_path.get(filename)
+        if entry is None:
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if encoding in entry['encodings'] and request.accept_encodings[encoding]:
+                response = send_from_directory(self.output_dir, filename + suffix, mimetype=mimetype, max_age=self.max_age)
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_from_directory(self.output_dir, filename, mimetype=mimetype, max_age=self.max_age)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        if entry['encodings']:
+            response.vary.add('Accept-Encoding')
+        return response
+
+
+def asset_url(filename, **values):
+    """url_for('static', filename=...) na fingerprinted kapag na-build na ang asset."""
+    return current_app.extensions['assets'].url(filename, **values)
+
+
+def asset_integrity(filename):
+    """SRI hash ng asset (para sa integrity="..."), o '' kung hindi alam."""
+    return current_app.extensions['assets'].integrity(filename)
+
+
+def init_assets(app):
+    """Loads the asset manifest, registers the '/assets/' route and the asset_url/asset_integrity template helpers."""
+    assets = AssetManifest(app.static_folder, app.config['ASSETS_DIR'], app.config['ASSETS_MAX_AGE'])
+    app.extensions['assets'] = assets
+    app.add_url_rule(f"{app.config['ASSETS_URL_PATH']}/<path:filename>", 'assets', assets.serve)
+    app.jinja_env.globals.update(asset_url=asset_url, asset_integrity=asset_integrity)
+    return assets
@@ -0,0 +1,250 @@
+# eservices_app/audit.py
+
+# Append-only audit trail ng ticket actions ('audit_event' table), para ang
+# "sino ang nagbago nito?" ay isang query na lang at hindi grep sa rotated logs.
+#
+# Write-behind:
+#   1. record_event(...) sa loob ng request: naiipon lang sa db.session.info
+#      (kasama ng kasalukuyang transaction; walang DB write).
+#   2. after_commit: ang events ay ipinapasa sa AuditWriter queue. Kapag rollback,
+#      itinatapon (walang audit ng hindi natuloy na action).
+#   3. AuditWriter thread: isang multi-row INSERT bawat AUDIT_BATCH_SIZE events o
+#      bawat AUDIT_FLUSH_INTERVAL seconds, sa sariling connection (labas sa request).
+#      Kapag pumalya ang INSERT, uulitin sa susunod na flush (hanggang
+#      AUDIT_MAX_PENDING events; ang sobra ay dina-drop at nilo-log).
+#
+# Sa exit ng process (atexit) ay fina-flush ang natitirang events. Ang thread ay
+# sinisimulan sa unang event (hindi sa create_app), kaya ok lang sa forked workers.
+# AUDIT_WRITE_BEHIND=false: diretsong INSERT pagkatapos ng commit (e.g. sa tests/CLI).
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app, g, has_request_context
+from flask_login import current_user
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from . import db
+from .models import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+# --- Actions ---
+TICKET_CREATED = 'ticket.created'
+TICKET_STATUS_CHANGED = 'ticket.status_changed'
+TICKET_ASSIGNED = 'ticket.assigned'
+TICKET_REPLIED = 'ticket.replied'
+TICKET_INTERNAL_NOTE = 'ticket.internal_note'
+TICKET_ATTACHMENT_ADDED = 'ticket.attachment_added'
+TICKET_DELETED = 'ticket.deleted'
+
+ACTION_LABELS = {
+    TICKET_CREATED: 'Ticket created',
+    TICKET_STATUS_CHANGED: 'Status changed',
+    TICKET_ASSIGNED: 'Assignment changed',
+    TICKET_REPLIED: 'Reply posted',
+    TICKET_INTERNAL_NOTE: 'Internal note added',
+    TICKET_ATTACHMENT_ADDED: 'Attachment added',
+    TICKET_DELETED: 'Ticket deleted',
+}
+
+EXCERPT_LENGTH = 200
+_SESSION_KEY = 'audit_events'
+_STOP = object()
+
+
+def excerpt(text):
+    text = (text or '').strip()
+    return text if len(text) <= EXCERPT_LENGTH else text[:EXCERPT_LENGTH - 3] + '...'
+
+
+def record_event(action, ticket=None, ticket_id=None, ticket_number=None, actor=None, **details):
+    """Queues an audit event; isusulat lang kapag na-commit ang kasalukuyang transaction.
+
+    'ticket' ay Ticket object o row na may id at ticket_number. Ang actor ay ang
+    naka-login na user kung hindi ibinigay.
+    """
+    if ticket is not None:
+        if ticket.id is None:
+            db.session.flush() # Bagong ticket: kailangan ang id
+        ticket_id, ticket_number = ticket.id, ticket.ticket_number
+    if actor is None and has_request_context() and current_user.is_authenticated:
+        actor = current_user
+    db.session.info.setdefault(_SESSION_KEY, []).append({
+        'occurred_at': datetime.utcnow(),
+        'action': action,
+        'actor_id': actor.id if actor is not None else None,
+        'actor_email': actor.email if actor is not None else None,
+        'ticket_id': ticket_id,
+        'ticket_number': ticket_number,
+        'details': details or None,
+        'request_id': g.get('request_id') if has_request_context() else None,
+    })
+
+
+# --- Write-behind Writer ---
+
+class AuditWriter:
+    """Background thread na nagsusulat ng audit events in batches."""
+
+    def __init__(self, engine, batch_size=200, flush_interval=1.0, max_pending=10000, write_behind=True):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.write_behind = write_behind
+        self._queue = queue.SimpleQueue()
+        self._retry = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.written = 0
+        self.dropped = 0
+        self.failed_batches = 0
+
+    def submit(self, events):
+        if not self.write_behind:
+            self._write(list(events))
+            return
+        for audit_event in events:
+            self._queue.put(audit_event)
+        self._ensure_started()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        """Naghihintay ng hanggang flush_interval para mapuno ang batch. Returns (batch, stop)."""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        while True:
+            batch, stop = self._next_batch()
+            if batch or self._retry:
+                self._write(batch)
+            if stop:
+                # Isulat ang natitira bago huminto
+                remaining = []
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _STOP:
+                        remaining.append(item)
+                for start in range(0, len(remaining), self.batch_size):
+                    self._write(remaining[start:start + self.batch_size])
+                return
+
+    def _write(self, batch):
+        rows = self._retry + batch
+        if not rows:
+            return
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(insert(AuditEvent.__table__), rows)
+        except Exception as e:
+            self.failed_batches += 1
+            overflow = max(0, len(rows) - self.max_pending)
+            self._retry = rows[overflow:]
+            self.dropped += overflow
+            logger.error(f"Audit writer: could not write {len(rows)} event(s), will retry ({overflow} dropped): {e}")
+            return
+        self._retry = []
+        self.written += len(rows)
+
+    def stop(self, timeout=5.0):
+        """Flushes the queued events and stops the thread (ok lang kahit tawagin nang dalawang beses)."""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid() or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self):
+        return {'mode': 'write-behind' if self.write_behind else 'synchronous',
+                'running': bool(self._thread and self._thread.is_alive()),
+                'queued': self._queue.qsize(), 'retrying': len(self._retry),
+                'written': self.written, 'dropped': self.dropped, 'failed_batches': self.failed_batches}
+
+
+# --- Session Events ---
+
+def _submit_committed_events(session):
+    events = session.info.pop(_SESSION_KEY, None)
+    if not events:
+        return
+    writer = current_app.extensions.get('audit_writer')
+    if writer is not None:
+        writer.submit(events)
+
+
+def _discard_events(session):
+    session.info.pop(_SESSION_KEY, None)
+
+
+# --- Queries ---
+
+def ticket_timeline(ticket_id):
+    """All audit events of one ticket, oldest first (gamit ang (ticket_id, occurred_at) index)."""
+    return AuditEvent.query.filter(AuditEvent.ticket_id == ticket_id) \
+        .order_by(AuditEvent.occurred_at, AuditEvent.id).all()
+
+
+def search_events(start=None, end=None, ticket_number=None, actor_email=None, action=None):
+    """Audit events sa [start, end), pinakabago muna.
+
+    Bawat filter ay may index na (column, occurred_at) o (occurred_at); ang admin page
+    ay laging may time range maliban kung ticket number ang hinahanap.
+    """
+    query = AuditEvent.query
+    if start is not None:
+        query = query.filter(AuditEvent.occurred_at >= start)
+    if end is not None:
+        query = query.filter(AuditEvent.occurred_at < end)
+    if ticket_number:
+        query = query.filter(AuditEvent.ticket_number == ticket_number)
+    if actor_email:
+        query = query.filter(AuditEvent.actor_email == actor_email)
+    if action:
+        query = query.filter(AuditEvent.action == action)
+    return query.order_by(AuditEvent.occurred_at.desc(), AuditEvent.id.desc())
+
+
+# --- Setup ---
+
+def init_audit(app):
+    """Creates the audit writer and registers the commit/rollback listeners."""
+    writer = AuditWriter(db.engine, batch_size=app.config['AUDIT_BATCH_SIZE'],
+                         flush_interval=app.config['AUDIT_FLUSH_INTERVAL'],
+                         max_pending=app.config['AUDIT_MAX_PENDING'],
+                         write_behind=app.config['AUDIT_WRITE_BEHIND'])
+    app.extensions['audit_writer'] = writer
+    atexit.register(writer.stop)
+    if not event.contains(Session, 'after_commit', _submit_committed_events):
+        event.listen(Session, 'after_commit', _submit_committed_events)
+        event.listen(Session, 'after_rollback', _discard_events)
+    return writer
@@ -0,0 +1,135 @@
+# eservices_app/canned_responses.py
+
+# Canned responses para sa reply composer ng ticket_detail.
+#
+# Hindi na kasama sa HTML ng ticket page ang mga canned responses; kinukuha sila
+# ng composer (JSON, tickets.canned_responses) sa unang focus lang, kaya walang
+# dagdag na queries kapag hindi ginamit ang reply box.
+#
+#   - System responses: naka-cache per (department_id, service_id) sa worker na ito
+#     (CANNED_RESPONSE_CACHE_TTL seconds). Ang add/edit/delete routes sa admin/routes.py
+#     ay tumatawag ng invalidate_canned_responses(); sa ibang workers, ang ttl ang
+#     limit ng staleness.
+#   - Personal responses: hindi naka-cache (iilan lang bawat user, isang query).
+#   - Prefix search (?q=): bisect sa naka-sort na lowercase titles ng cached entry,
+#     para mabilis kahit daan-daan ang templates ng department. Hanggang
+#     CANNED_RESPONSE_SEARCH_LIMIT ang ibinabalik bawat group.
+
+import bisect
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import or_
+
+from .models import CannedResponse, PersonalCannedResponse
+
+SERVICE_GROUP = 'service'
+GENERAL_GROUP = 'general'
+
+
+class CannedResponseSet:
+    """Responses ng isang group na naka-sort ayon sa title (case-insensitive), para sa prefix search."""
+
+    def __init__(self, responses):
+        entries = sorted(({'id': r.id, 'title': r.title, 'body': r.body} for r in responses),
+                         key=lambda entry: (entry['title'].lower(), entry['id']))
+        self.entries = entries
+        self._keys = [entry['title'].lower() for entry in entries]
+
+    def search(self, prefix='', limit=None):
+        """(matches, truncated): mga entries na nagsisimula ang title sa prefix."""
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self._keys, prefix)
+        end = bisect.bisect_left(self._keys, prefix + '\uffff') if prefix else len(self._keys)
+        if limit is not None and end - start > limit:
+            return self.entries[start:start + limit], True
+        return self.entries[start:end], False
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class CannedResponseCache:
+    """Per-worker cache ng system responses, key = (department_id, service_id)."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._generation = 0 # Para hindi ma-cache ang na-load bago ang invalidate
+        self.hits = self.misses = self.invalidations = 0
+
+    def get(self, department_id, service_id):
+        key = (department_id, service_id)
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[0] > time.monotonic():
+                self.hits += 1
+                return item[1]
+            self.misses += 1
+            generation = self._generation
+        groups = _load_system_responses(department_id, service_id)
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (time.monotonic() + self.ttl, groups)
+        return groups
+
+    def invalidate(self, *department_ids):
+        """Tinatanggal ang entries ng mga department na ito (lahat kapag walang ibinigay)."""
+        with self._lock:
+            if department_ids:
+                for key in [key for key in self._entries if key[0] in department_ids]:
+                    del self._entries[key]
+            else:
+                self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'ttl': self.ttl, 'hits': self.hits,
+                    'misses': self.misses, 'invalidations': self.invalidations}
+
+
+def _load_system_responses(department_id, service_id):
+    responses = CannedResponse.query.filter(
+        CannedResponse.department_id == department_id,
+        or_(CannedResponse.service_id == service_id, CannedResponse.service_id == None)
+    ).all()
+    return {
+        SERVICE_GROUP: CannedResponseSet(r for r in responses if r.service_id is not None),
+        GENERAL_GROUP: CannedResponseSet(r for r in responses if r.service_id is None),
+    }
+
+
+# --- Lookups (ginagamit ng tickets/routes.py) ---
+
+def system_canned_responses(department_id, service_id):
+    """{group: CannedResponseSet} ng department/service, galing sa cache kapag naka-enable."""
+    cache = current_app.extensions.get('canned_response_cache')
+    if cache is None:
+        return _load_system_responses(department_id, service_id)
+    return cache.get(department_id, service_id)
+
+
+def personal_canned_responses(user_id):
+    return CannedResponseSet(PersonalCannedResponse.query.filter_by(user_id=user_id).all())
+
+
+def invalidate_canned_responses(*department_ids):
+    """Tinatawag pagkatapos ng commit ng add/edit/delete ng system canned response."""
+    cache = current_app.extensions.get('canned_response_cache')
+    if cache is not None:
+        cache.invalidate(*department_ids)
+
+
+# --- Setup ---
+
+def init_canned_responses(app):
+    """Creates the per-worker system canned response cache; walang cache kapag 0 ang CANNED_RESPONSE_CACHE_TTL."""
+    if app.config['CANNED_RESPONSE_CACHE_TTL'] <= 0:
+        return None
+    cache = CannedResponseCache(app.config['CANNED_RESPONSE_CACHE_TTL'])
+    app.extensions['canned_response_cache'] = cache
+    return cache
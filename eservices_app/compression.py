@@ -0,0 +1,144 @@
+# eservices_app/compression.py
+
+# Response compression (gzip, at brotli kung naka-install ang 'brotli').
+#
+# Ang after_request hook ay nagco-compress ng responses na:
+#   - text na content type (HTML, JSON, CSV, atbp.; tingnan ang COMPRESS_MIMETYPES)
+#   - hindi bababa sa COMPRESS_MIN_SIZE bytes (ang streamed responses ay laging
+#     kasama dahil hindi pa alam ang laki)
+#   - wala pang Content-Encoding (e.g. ang precompressed /assets/ files) at hindi
+#     send_file / direct_passthrough
+#   - tinatanggap ng browser (Accept-Encoding); br muna bago gzip kapag pareho
+#
+# Streamed responses (generator): bawat chunk ay kino-compress at fina-flush agad,
+# kaya tuloy-tuloy pa rin ang pagdating ng data sa browser. Mag-yield ng malalaking
+# chunks (hindi isang linya bawat yield) para hindi masira ang compression ratio.
+#
+# Ang ETag ay ginagawang weak (W/"...") dahil iba na ang bytes; gumagana pa rin ang
+# If-None-Match / 304 (weak comparison).
+
+import gzip
+import zlib
+
+from flask import request
+
+from .metrics import record_compression
+
+try:
+    import brotli
+except ImportError: # Optional; gzip lang kapag wala
+    brotli = None
+
+DEFAULT_MIMETYPES = frozenset({
+    'text/html', 'text/csv', 'text/plain', 'text/css', 'text/javascript', 'text/xml',
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+})
+
+
+class StreamCompressor:
+    """Incremental gzip/brotli compressor for streamed response bodies."""
+
+    def __init__(self, encoding, gzip_level, br_quality):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=br_quality)
+        else:
+            # wbits=31: gzip header at trailer (hindi raw deflate)
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress_chunk(self, chunk):
+        if self.encoding == 'br':
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+def compress_bytes(data, encoding, gzip_level, br_quality):
+    if encoding == 'br':
+        return brotli.compress(data, quality=br_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def _compressed_stream(chunks, compressor):
+    raw_bytes = compressed_bytes = 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if not chunk:
+                continue
+            raw_bytes += len(chunk)
+            out = compressor.compress_chunk(chunk)
+            compressed_bytes += len(out)
+            yield out
+        tail = compressor.finish()
+        compressed_bytes += len(tail)
+        yield tail
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+        record_compression(compressor.encoding, raw_bytes, compressed_bytes)
+
+
+def choose_encoding(accept_encodings):
+    """Returns 'br', 'gzip' or None based on the request's Accept-Encoding."""
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return accept_encodings.best_match(offered)
+
+
+def _is_compressible(response, config):
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return False
+    if response.mimetype not in config['COMPRESS_MIMETYPES']:
+        return False
+    if response.cache_control.no_transform:
+        return False
+    if not response.is_streamed and (response.content_length or 0) < config['COMPRESS_MIN_SIZE']:
+        return False
+    return True
+
+
+def compress_response(response, config):
+    """Compresses the response in place kung pasok sa rules at tanggap ng client."""
+    if not _is_compressible(response, config):
+        return response
+    # Kahit hindi i-compress para sa client na ito, iba-iba ang response ayon sa Accept-Encoding
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    gzip_level, br_quality = config['COMPRESS_GZIP_LEVEL'], config['COMPRESS_BR_QUALITY']
+    if response.is_streamed:
+        compressor = StreamCompressor(encoding, gzip_level, br_quality)
+        response.response = _compressed_stream(response.response, compressor)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        compressed = compress_bytes(data, encoding, gzip_level, br_quality)
+        if len(compressed) >= len(data):
+            return response
+        response.set_data(compressed)
+        record_compression(encoding, len(data), len(compressed))
+
+    response.headers['Content-Encoding'] = encoding
+    etag, is_weak = response.get_etag()
+    if etag and not is_weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """Registers the response compression hook (kapag COMPRESS_ENABLED)."""
+    if not app.config['COMPRESS_ENABLED']:
+        return
+
+    @app.after_request
+    def compress(response):
+        return compress_response(response, app.config)
@@ -0,0 +1,213 @@
+# eservices_app/db_pool.py
+
+# SQLAlchemy connection pool configuration at pool metrics.
+# Ang pool settings ay galing sa isang "profile" (depende sa deployment) at
+# pwedeng i-override ng environment variables (DB_POOL_SIZE, atbp.).
+# Ang stats ay per-process, kaya bawat gunicorn worker ay may sariling numbers.
+
+import os
+import threading
+import time
+
+import click
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+
+# --- Pool Profiles ---
+# pool_recycle: dapat mas mababa sa MySQL 'wait_timeout' para hindi tayo gumamit
+# ng connection na sinarado na ng server. pool_pre_ping: i-check ang connection bago gamitin.
+POOL_PROFILES = {
+    'development': {'pool_size': 2, 'max_overflow': 2, 'pool_recycle': 280, 'pool_pre_ping': True, 'pool_timeout': 10},
+    'production': {'pool_size': 5, 'max_overflow': 10, 'pool_recycle': 280, 'pool_pre_ping': True, 'pool_timeout': 30},
+    # Para sa maraming threads per worker (e.g. gunicorn --threads 8)
+    'production-threaded': {'pool_size': 10, 'max_overflow': 10, 'pool_recycle': 280, 'pool_pre_ping': True, 'pool_timeout': 30},
+    # Para sa 'flask' CLI commands at cron jobs (isang connection lang ang kailangan); default sa 'flask' commands maliban sa 'flask run'
+    'cli': {'pool_size': 1, 'max_overflow': 2, 'pool_recycle': 280, 'pool_pre_ping': True, 'pool_timeout': 30},
+}
+DEFAULT_POOL_PROFILE = 'production'
+CLI_POOL_PROFILE = 'cli'
+DEV_SERVER_POOL_PROFILE = 'development' # 'flask run'
+
+# Environment overrides: (env var, option name, converter)
+POOL_ENV_OVERRIDES = [
+    ('DB_POOL_SIZE', 'pool_size', int),
+    ('DB_MAX_OVERFLOW', 'max_overflow', int),
+    ('DB_POOL_RECYCLE', 'pool_recycle', int),
+    ('DB_POOL_TIMEOUT', 'pool_timeout', int),
+    ('DB_POOL_PRE_PING', 'pool_pre_ping', lambda value: value.lower() in ('1', 'true', 'yes', 'on')),
+]
+
+# Ang checkout na mas matagal dito ay binibilang bilang "slow wait"
+SLOW_CHECKOUT_WAIT_MS = 100
+
+
+def _flask_cli_command():
+    """Pangalan ng 'flask' command na naglo-load ng app (e.g. 'run', 'seed-load'), o None kapag hindi galing sa 'flask' CLI."""
+    if os.getenv('FLASK_RUN_FROM_CLI') != 'true':
+        return None
+    # 'flask run' ay naglo-load ng app sa loob ng sariling command context; ang ibang
+    # commands ay habang hinahanap pa ang command (group context, e.g. 'flask')
+    ctx = click.get_current_context(silent=True)
+    return ctx.command.name if ctx is not None else ''
+
+
+def default_pool_profile():
+    """DB_POOL_PROFILE env > 'development' sa 'flask run' > 'cli' sa ibang 'flask' commands > 'production'."""
+    if os.getenv('DB_POOL_PROFILE'):
+        return os.getenv('DB_POOL_PROFILE')
+    command = _flask_cli_command()
+    if command == 'run':
+        return DEV_SERVER_POOL_PROFILE # Web server ito (tabs, polling, replica), hindi one-shot command
+    if command is not None:
+        return CLI_POOL_PROFILE
+    return DEFAULT_POOL_PROFILE
+
+
+def pool_options(profile_name, database_uri):
+    """Returns the SQLAlchemy pool options for a profile, with environment overrides applied."""
+    if profile_name not in POOL_PROFILES:
+        raise ValueError(f"Unknown DB_POOL_PROFILE '{profile_name}' ({', '.join(POOL_PROFILES)}).")
+    options = dict(POOL_PROFILES[profile_name])
+    for env_name, option_name, convert in POOL_ENV_OVERRIDES:
+        value = os.getenv(env_name)
+        if value not in (None, ''):
+            options[option_name] = convert(value)
+    if database_uri.startswith('sqlite'):
+        # Ang SQLite ay walang server-side timeout; pool_pre_ping lang ang may silbi
+        options = {'pool_pre_ping': options['pool_pre_ping']}
+    return options
+
+
+class PoolStats:
+    """Thread-safe counters for one engine's connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.engine = None
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.peak_overflow = 0
+        self.wait_count = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.slow_waits = 0
+
+    # --- Event Listeners ---
+    def on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            pool = self.engine.pool if self.engine is not None else None
+            if pool is not None and hasattr(pool, 'overflow'):
+                self.peak_overflow = max(self.peak_overflow, pool.overflow())
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+    def on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def record_wait(self, wait_ms):
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            if wait_ms >= SLOW_CHECKOUT_WAIT_MS:
+                self.slow_waits += 1
+
+    def snapshot(self):
+        """Returns the current counters plus live pool numbers as a dict."""
+        with self._lock:
+            data = {
+                'pid': os.getpid(),
+                'checkouts': self.checkouts,
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+                'in_use': self.in_use,
+                'peak_in_use': self.peak_in_use,
+                'peak_overflow': self.peak_overflow,
+                'checkout_wait': {
+                    'count': self.wait_count,
+                    'avg_ms': round(self.wait_total_ms / self.wait_count, 3) if self.wait_count else 0.0,
+                    'max_ms': round(self.wait_max_ms, 3),
+                    'slow_count': self.slow_waits,
+                    'slow_threshold_ms': SLOW_CHECKOUT_WAIT_MS,
+                },
+            }
+        pool = self.engine.pool if self.engine is not None else None
+        if pool is not None and hasattr(pool, 'size'):
+            data.update({
+                'pool_size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': pool.overflow(),
+            })
+        return data
+
+
+def instrumented_pool_class(stats):
+    """Returns a QueuePool subclass that times how long each checkout waits for a connection.
+
+    Ang 'recreate()' ng QueuePool ay gumagamit ng self.__class__, kaya nananatili
+    ang instrumentation kahit mag-dispose ang engine.
+    """
+    class InstrumentedQueuePool(QueuePool):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                stats.record_wait((time.perf_counter() - start) * 1000)
+
+    return InstrumentedQueuePool
+
+
+def configure_pool(app, profile_name):
+    """Sets SQLALCHEMY_ENGINE_OPTIONS for the app. Call before db.init_app()."""
+    database_uri = app.config['SQLALCHEMY_DATABASE_URI']
+    options = pool_options(profile_name, database_uri)
+    stats = PoolStats()
+    if not database_uri.startswith('sqlite'):
+        options['poolclass'] = instrumented_pool_class(stats)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'].update(options)
+    app.config['DB_POOL_PROFILE'] = profile_name
+    app.extensions['pool_stats'] = {'default': stats}
+    return stats
+
+
+def configure_replica_pool(app, profile_name, replica_uri):
+    """Adds the 'replica' bind (read replica, tingnan ang db_routing.py) with the same pool profile. Call before db.init_app()."""
+    options = pool_options(profile_name, replica_uri)
+    stats = PoolStats()
+    if not replica_uri.startswith('sqlite'):
+        options['poolclass'] = instrumented_pool_class(stats)
+    app.config.setdefault('SQLALCHEMY_BINDS', {})
+    app.config['SQLALCHEMY_BINDS']['replica'] = dict(options, url=replica_uri)
+    app.extensions['pool_stats']['replica'] = stats
+    return stats
+
+
+def attach_pool_listeners(engine, stats):
+    """Registers the pool event listeners on an engine. Call after db.init_app()."""
+    stats.engine = engine
+    event.listen(engine, 'connect', stats.on_connect)
+    event.listen(engine, 'checkout', stats.on_checkout)
+    event.listen(engine, 'checkin', stats.on_checkin)
+    event.listen(engine, 'invalidate', stats.on_invalidate)
+
+
+def pool_stats_snapshot(app):
+    """Returns {bind name: stats dict} for every instrumented engine of the app."""
+    return {name: stats.snapshot() for name, stats in app.extensions.get('pool_stats', {}).items()}
@@ -0,0 +1,193 @@
+# eservices_app/db_routing.py
+
+# Read/write routing: ang read-only pages (dashboards, exports, summaries,
+# polling) ay pwedeng basahin mula sa MySQL read replica para hindi sila
+# kaagaw ng ticket writes sa primary.
+#
+#   - DB_REPLICA_URL: ang replica ('replica' bind). Kapag wala, lahat ay sa primary.
+#   - @replica_read: nilalagay sa view na puro SELECT. Ang GET/HEAD requests nito
+#     ay sa replica; ang flush, DML (UPDATE/INSERT/DELETE) at sessions na may
+#     pending changes ay laging sa primary.
+#   - Lag-aware: bawat DB_REPLICA_CHECK_INTERVAL seconds (per worker) ay tinitingnan
+#     ang lag ng replica (SHOW REPLICA STATUS). Kapag lampas sa DB_REPLICA_MAX_LAG,
+#     hindi tumatakbo ang replication o hindi maabot ang replica, primary muna.
+#   - Read-your-writes: pagkatapos ng sariling POST ng user, ang replica_read pages
+#     ay sa primary muna sa loob ng DB_REPLICA_STICKY_SECONDS (naka-save sa session
+#     cookie, kaya gumagana kahit ibang worker ang sumagot).
+#
+# Local testing gamit ang dalawang SQLite files (walang replication, kaya ang
+# replica ay kopya lang ng primary; laging 0 ang lag):
+#     cp eservices.db eservices_replica.db
+#     DATABASE_URL=sqlite:///eservices.db DB_REPLICA_URL=sqlite:///eservices_replica.db flask run
+# O dalawang local MySQL instances (ang standalone server na hindi replica ay 0 ang lag).
+
+import logging
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import event, exc
+
+from .metrics import record_db_route
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND = 'replica'
+_STICKY_KEY = '_db_primary_until'
+_SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# (statement, lag column): MySQL 8.0.22+ muna, tapos ang lumang syntax
+_REPLICA_STATUS_QUERIES = (
+    ('SHOW REPLICA STATUS', 'Seconds_Behind_Source'),
+    ('SHOW SLAVE STATUS', 'Seconds_Behind_Master'),
+)
+
+
+class RoutingSession(FlaskSession):
+    """Session na nagbabasa sa replica kapag pinili ng replica_read para sa request."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and _replica_selected() and not self._flushing
+                and not getattr(clause, 'is_dml', False)
+                and not (self.new or self.dirty or self.deleted)):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _replica_selected():
+    return has_request_context() and g.get('db_route') == REPLICA_BIND
+
+
+def routed_to_replica():
+    """True kapag ang request na ito ay nagbabasa sa replica (pwedeng luma ng hanggang DB_REPLICA_MAX_LAG)."""
+    return _replica_selected()
+
+
+# --- Replica Lag ---
+
+def replica_lag(connection):
+    """Seconds behind the primary; 0 para sa SQLite at standalone MySQL. None kapag hindi tumatakbo ang replication."""
+    if connection.dialect.name != 'mysql':
+        connection.exec_driver_sql('SELECT 1')
+        return 0.0
+    for statement, column in _REPLICA_STATUS_QUERIES:
+        try:
+            row = connection.exec_driver_sql(statement).mappings().first()
+        except exc.ProgrammingError:
+            continue # Lumang MySQL: walang SHOW REPLICA STATUS
+        if row is None:
+            return 0.0 # Hindi replica (e.g. pangalawang local MySQL para sa testing)
+        lag = row.get(column)
+        return float(lag) if lag is not None else None
+    return 0.0
+
+
+class ReplicaRouter:
+    """Per-worker na lag check ng replica, para malaman kung pwede itong basahin."""
+
+    def __init__(self, engine, max_lag=5.0, check_interval=5.0):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self.lag = None
+        self.error = None
+        self.checked_at = None
+        self._next_check = 0.0
+
+    def usable(self):
+        """True kapag maabot ang replica at ang lag ay nasa max_lag; ang check ay ginagawa ng isang thread lang."""
+        if time.monotonic() >= self._next_check and self._lock.acquire(blocking=False):
+            try:
+                self.check()
+            finally:
+                self._lock.release()
+        return self.error is None and self.lag is not None and self.lag <= self.max_lag
+
+    def check(self):
+        try:
+            with self.engine.connect() as connection:
+                lag = replica_lag(connection)
+        except Exception as e:
+            self.lag, self.error = None, str(e)
+            logger.warning(f"Replica check failed, reading from the primary: {e}")
+        else:
+            self.lag, self.error = lag, None if lag is not None else 'replication is not running'
+            if lag is None or lag > self.max_lag:
+                logger.warning(f"Replica is not usable (lag: {lag}), reading from the primary")
+        self.checked_at = time.time()
+        self._next_check = time.monotonic() + self.check_interval
+
+    def mark_failed(self, error):
+        """Primary muna hanggang sa susunod na check (e.g. nawalan ng connection sa gitna ng request)."""
+        self.lag, self.error = None, str(error)
+        self.checked_at = time.time()
+        self._next_check = time.monotonic() + self.check_interval
+
+    def snapshot(self):
+        return {'max_lag': self.max_lag, 'lag': self.lag, 'error': self.error,
+                'checked_at': self.checked_at, 'check_interval': self.check_interval}
+
+
+# --- Routing ---
+
+def _choose_route():
+    router = current_app.extensions.get('db_replica')
+    if router is None or request.method not in _SAFE_METHODS:
+        return
+    if session.get(_STICKY_KEY, 0) > time.time():
+        reason = 'sticky'
+    elif not router.usable():
+        reason = 'replica_unavailable'
+    else:
+        g.db_route = REPLICA_BIND
+        reason = 'replica'
+    record_db_route(request.endpoint, reason)
+
+
+def replica_read(view):
+    """Binabasa ang view mula sa replica (GET/HEAD lang; tingnan ang itaas ng file)."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        _choose_route()
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def _stick_to_primary(response):
+    # Read-your-writes: ang susunod na replica_read pages ng user na ito ay sa primary muna
+    if request.method not in _SAFE_METHODS and response.status_code < 500:
+        session[_STICKY_KEY] = time.time() + current_app.config['DB_REPLICA_STICKY_SECONDS']
+    return response
+
+
+# --- Setup ---
+
+def init_db_routing(app, engines):
+    """Creates the replica router and the stickiness hook; walang ginagawa kapag walang DB_REPLICA_URL."""
+    engine = engines.get(REPLICA_BIND)
+    if engine is None:
+        return None
+    router = ReplicaRouter(engine, max_lag=app.config['DB_REPLICA_MAX_LAG'],
+                           check_interval=app.config['DB_REPLICA_CHECK_INTERVAL'])
+    app.extensions['db_replica'] = router
+
+    @event.listens_for(engine, 'handle_error')
+    def _replica_error(context):
+        if context.is_disconnect:
+            router.mark_failed(context.original_exception)
+
+    app.after_request(_stick_to_primary)
+    return router
+
+
+def replica_status(app):
+    """Lag check state ng worker na ito (para sa pool-stats page); None kapag walang replica."""
+    router = app.extensions.get('db_replica')
+    return router.snapshot() if router is not None else None
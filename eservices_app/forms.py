@@ -1,6 +1,6 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, SelectField, SubmitField, PasswordField, TextAreaField, DateField, BooleanField
-from wtforms.validators import DataRequired, Email, Length, Optional, ValidationError, EqualTo
+from wtforms import StringField, SelectField, SubmitField, PasswordField, TextAreaField, DateField, BooleanField, IntegerField, HiddenField
+from wtforms.validators import DataRequired, Email, Length, Optional, ValidationError, EqualTo, NumberRange
 from flask_wtf.file import FileField, FileRequired, FileAllowed
 from sqlalchemy import case
 from flask_login import current_user
@@ -8,6 +8,8 @@ from flask_login import current_user
 
 # Import all necessary models
 from .models import School, AuthorizedEmail, User, Department, Service
+from .notifications import NOTIFY_MODES
+from .ticket_submissions import new_submission_token
 
 # ======================================================
 # === CUSTOM VALIDATOR =================================
@@ -90,8 +92,14 @@ class GeneralTicketForm(FlaskForm):
     requester_email = StringField('Email Address', validators=[DataRequired(), Email()], render_kw={'readonly': True})
     requester_contact = StringField('Contact Number')
     school = SelectField('School/Office', coerce=int, validators=[DataRequired(message="Please select your school or office.")])
+    # Bagong token bawat bukas ng form; para sa idempotent submission (tingnan ang ticket_submissions.py)
+    submission_token = HiddenField(default=new_submission_token)
     submit = SubmitField('Submit Ticket')
 
+    # Mga details keys na may indexed column para sa dashboard/export filters (tingnan ang ticket_details.py).
+    # Kapag nagdagdag dito, gumawa rin ng migration na tumatawag sa add_detail_columns().
+    indexed_details = ()
+
     def __init__(self, *args, **kwargs):
         super(GeneralTicketForm, self).__init__(*args, **kwargs)
         custom_order = case((School.name == "Division Office", 0), else_=1)
@@ -116,26 +124,40 @@ class UpdateTicketForm(FlaskForm):
     submit = SubmitField('Submit Update')
     assigned_staff = SelectField('Assign to', coerce=int, validators=[Optional()])
     is_internal = BooleanField('Internal Note (Check if this response should NOT be seen by the requester)')
-   
+
     submit = SubmitField('Update Ticket')
 
 
+class BulkTicketActionForm(FlaskForm):
+    """Form para sa bulk actions sa staff dashboard (status, assignment, canned reply)."""
+    # Ang ticket_ids ay kinukuha gamit ang request.form.getlist('ticket_ids')
+    status = SelectField('Set Status', choices=[('', '-- No Change --'), ('Open', 'Open'), ('In Progress', 'In Progress'), ('Resolved', 'Resolved')], validators=[Optional()])
+    # validate_choice=False: ang permission check ay ginagawa sa route (per ticket service)
+    assigned_staff = SelectField('Assign to', coerce=int, choices=[(-1, '-- No Change --'), (0, '-- Unassigned --')], validators=[Optional()], validate_choice=False)
+    canned_response = SelectField('Reply with Canned Response', choices=[('', '-- No Reply --')], validators=[Optional()], validate_choice=False)
+    is_internal = BooleanField('Internal Note')
+    submit_bulk = SubmitField('Apply to Selected')
+
+
 # ======================================================
 # === ICT DEPARTMENT FORMS =============================
 # ======================================================
 
 class IssuanceForm(GeneralTicketForm):
+    indexed_details = ('document_type',)
     document_title = StringField('Title of Document/Material', validators=[DataRequired()])
     document_type = SelectField('Type of Document', choices=[('', '-- Select Type of Document --'), ('Division Memorandum', 'Division Memorandum'), ('Division Advisory', 'Division Advisory'), ('Office Memorandum', 'Office Memorandum'), ('Other', 'Other')], validators=[DataRequired()])
     document_type_other = StringField('If Other, please specify', validators=[Optional()])
     attachment = FileField('Issuance Attachment (PDF Only, max 25MB)', validators=[FileRequired(), FileAllowed(['pdf'], 'Invalid file type. Only PDF files are allowed.')])
 
 class RepairForm(GeneralTicketForm):
+    indexed_details = ('device_type',)
     device_type = SelectField('Device Type', choices=[('', '-- Select Device Type --'), ('Laptop', 'Laptop'), ('Desktop', 'Desktop'), ('Printer', 'Printer'), ('Other', 'Other')], validators=[DataRequired()])
     device_type_other = StringField('If Other, please specify', validators=[Optional()])
     description = TextAreaField('Please provide a brief description of your request/concern.', validators=[DataRequired()])
 
 class EmailAccountForm(GeneralTicketForm):
+    indexed_details = ('remarks',)
     school_id = StringField('School ID', validators=[DataRequired()])
     teacher_name = StringField('Complete Name of Teacher or Personnel', validators=[DataRequired()])
     sex = SelectField('Sex', choices=[('', '-- Select Sex --'), ('Male', 'Male'), ('Female', 'Female')], validators=[DataRequired()])
@@ -147,6 +169,7 @@ class EmailAccountForm(GeneralTicketForm):
     attachment = FileField('Certification (DepEd ID or Appointment Paper, PDF Only, max 25MB)', validators=[FileRequired(), FileAllowed(['pdf'], 'Invalid file type. Only PDF files are allowed.')])
 
 class DpdsForm(GeneralTicketForm):
+    indexed_details = ('remarks',)
     school_id = StringField('School ID', validators=[DataRequired()])
     remarks = SelectField('Remarks', choices=[('', '-- Select Remarks --'), ('Password Reset', 'Password Reset'), ('Forgot Account', 'Forgot Account')], validators=[DataRequired()])
 
@@ -163,6 +186,7 @@ class OtherIctForm(GeneralTicketForm):
 # ======================================================
 
 class LeaveApplicationForm(GeneralTicketForm):
+    indexed_details = ('type_of_leave', 'classification')
     type_of_leave = SelectField('Type of Leave', choices=[('', '-- Select Type of Leave --'), ('Vacation Leave', 'Vacation Leave'), ('Mandatory/Forced Leave', 'Mandatory/Forced Leave'), ('Sick Leave', 'Sick Leave'), ('Maternity Leave', 'Maternity Leave'), ('Paternity Leave', 'Paternity Leave'), ('Special Privilege Leave', 'Special Privilege Leave'), ('Solo Parent Leave', 'Solo Parent Leave'), ('Study Leave', 'Study Leave'), ('10-Day VAWC Leave', '10-Day VAWC Leave'), ('Rehabilitation Privilege', 'Rehabilitation Privilege'), ('Special Leave Benefits for Women', 'Special Leave Benefits for Women'), ('Special Emergency (Calamity) Leave', 'Special Emergency (Calamity) Leave'), ('Adoption Leave', 'Adoption Leave'), ('Monetization of Leave Credits', 'Monetization of Leave Credits'), ('Compensatory time off (CTO)', 'Compensatory time off (CTO)'), ('Other', 'Other')], validators=[DataRequired()])
     type_of_leave_other = StringField('If Other, please specify', validators=[Optional()])
     classification = SelectField('Classification', choices=[('', '-- Select Classification --'), ('Teaching Personnel', 'Teaching Personnel'), ('Non-Teaching Personnel', 'Non-Teaching Personnel')], validators=[DataRequired()])
@@ -171,6 +195,7 @@ class LeaveApplicationForm(GeneralTicketForm):
     supporting_docs_attachment = FileField('Please upload any supporting documents, if any (PDF Only, max 25MB)', validators=[Optional(), FileAllowed(['pdf'], 'PDF documents only!')])
 
 class CoeForm(GeneralTicketForm):
+    indexed_details = ('remarks',)
     first_day_of_service = DateField('1st Day of Service', format='%Y-%m-%d', validators=[DataRequired()])
     basic_salary = StringField('Basic Salary', validators=[DataRequired()])
     position = StringField('Position / Designation', validators=[DataRequired()])
@@ -182,6 +207,7 @@ class CoeForm(GeneralTicketForm):
     coe_w_comp_attachment = FileField('Please upload a copy of your COE with compensation, prepared by your School AO II (PDF Only)', validators=[Optional(), FileAllowed(['pdf'], 'PDF documents only!')])
 
 class ServiceRecordForm(GeneralTicketForm):
+    indexed_details = {'delivery_method': 'Service Record Delivery'}
     position = StringField('Position / Designation', validators=[DataRequired()])
     birth_date = DateField('Birthdate', format='%Y-%m-%d', validators=[DataRequired()])
     place_of_birth = StringField('Place of Birth', validators=[DataRequired()])
@@ -189,6 +215,7 @@ class ServiceRecordForm(GeneralTicketForm):
     delivery_method = SelectField('How would you like to receive your service record?', choices=[('', '-- Select a method --'), ('Hard copy (printed)', 'Hard copy (printed)'), ('Soft copy (digital/PDF)', 'Soft copy (digital/PDF)')], validators=[DataRequired()])
 
 class GsisForm(GeneralTicketForm):
+    indexed_details = {'employment_status': 'GSIS Employment Status'}
     address_street = StringField('Street/ Barangay/ Village (CAPSLOCK)', validators=[DataRequired()])
     address_city = StringField('Municipality/ City/ Province (CAPSLOCK)', validators=[DataRequired()])
     postal_code = StringField('Postal Code', validators=[DataRequired()])
@@ -245,6 +272,7 @@ class AdmForm(GeneralTicketForm):
 # ======================================================
 
 class ProvidentFundForm(GeneralTicketForm):
+    indexed_details = {'query': 'Provident Fund Query'}
     position = StringField('Position / Designation', validators=[DataRequired()])
     employee_number = StringField('Employee Number', validators=[DataRequired()])
     station_no = StringField('Station No.', validators=[DataRequired()])
@@ -355,3 +383,13 @@ class ChangePasswordForm(FlaskForm):
         if not current_user.check_password(current_password.data):
             raise ValidationError('Incorrect current password.')
 
+
+class NotificationPreferencesForm(FlaskForm):
+    """Form para sa staff notification preferences (tingnan ang notifications.py)."""
+    notify_mode = SelectField('Ticket Reply Emails', choices=NOTIFY_MODES, validators=[DataRequired()])
+    notify_digest_minutes = IntegerField('Digest Window (minutes)', validators=[
+        Optional(),
+        NumberRange(min=5, max=1440, message='Digest window must be between 5 and 1440 minutes.')
+    ])
+    submit_notifications = SubmitField('Save Preferences')
+
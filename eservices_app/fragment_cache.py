@@ -0,0 +1,183 @@
+# eservices_app/fragment_cache.py
+
+# Fragment cache para sa Jinja templates: {% cache key, ttl %} ... {% endcache %}
+#
+# Ang laman ng block ay nire-render lang kapag wala pa sa cache (kaya pati ang
+# data na kinukuha SA LOOB ng block, e.g. {% set data = load_summary() %}, ay
+# hindi na kinukuha sa cache hit). Ang ttl (seconds) ay optional; default ang
+# FRAGMENT_CACHE_TTL. Kapag None ang key, walang caching (laging nire-render).
+#
+# Ang cache ay in-process LRU na may byte budget (FRAGMENT_CACHE_MAX_BYTES).
+# Ang "stats version" ay awtomatikong kasama sa bawat key at nag-iiba tuwing may
+# commit na sumusulat sa tickets (ORM o bulk UPDATE/DELETE/INSERT) o sa
+# Department/Service/School. Per worker ang version, kaya ang ttl ang limit ng
+# staleness kapag sa ibang worker nangyari ang write. Ang fragments na na-render
+# habang sa replica nagbabasa ang request (db_routing.py) ay hindi sine-save, dahil
+# ang lag ng replica ay magiging isang buong ttl ng lumang data.
+
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .db_routing import routed_to_replica
+
+# Tables na kapag nagbago ay luma na ang cached summaries
+STATS_TABLES = frozenset({'ticket', 'archived_ticket', 'department', 'service', 'school'})
+
+
+class ByteBudgetLRU:
+    """Thread-safe LRU cache bounded by the total size (bytes) of its values."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[0] < time.time():
+                self._remove(key)
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value, ttl):
+        size = len(value.encode('utf-8')) + len(key)
+        if size > self.max_bytes:
+            return # Mas malaki pa sa buong budget; hindi na kina-cache
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.time() + ttl, value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def _remove(self, key):
+        _expires, _value, size = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.current_bytes, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+class FragmentCache:
+    """Versioned fragment store used by the {% cache %} tag."""
+
+    def __init__(self, max_bytes, default_ttl):
+        self.store = ByteBudgetLRU(max_bytes)
+        self.default_ttl = default_ttl
+        self.version = 0
+        self._version_lock = threading.Lock()
+
+    def bump_version(self):
+        with self._version_lock:
+            self.version += 1
+
+    def get_or_render(self, key, ttl, render):
+        full_key = repr((self.version, key))
+        value = self.store.get(full_key)
+        if value is None:
+            value = str(render())
+            # Pwedeng luma ng hanggang DB_REPLICA_MAX_LAG ang render mula sa replica; huwag i-save
+            if not routed_to_replica():
+                self.store.set(full_key, value, ttl or self.default_ttl)
+        return Markup(value)
+
+
+class FragmentCacheExtension(Extension):
+    """Adds the {% cache key, ttl %} ... {% endcache %} block tag."""
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_cache_support', args), [], [], body).set_lineno(lineno)
+
+    def _cache_support(self, key, ttl, caller):
+        fragment_cache = self.environment.fragment_cache
+        if fragment_cache is None or key is None:
+            return caller()
+        return fragment_cache.get_or_render(key, ttl, caller)
+
+
+# --- Invalidation (SQLAlchemy session events) ---
+
+def _track_orm_changes(session, flush_context):
+    changed = [*session.new, *session.deleted, *(obj for obj in session.dirty if session.is_modified(obj))]
+    for obj in changed:
+        table = getattr(obj, '__table__', None)
+        if table is not None and table.name in STATS_TABLES:
+            session.info['fragment_cache_dirty'] = True
+            return
+
+
+def _track_bulk_statements(orm_execute_state):
+    # Set-based Query.update / session.execute(update|delete|insert(...)) ay hindi dumadaan sa flush
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None and getattr(table, 'name', None) in STATS_TABLES:
+            orm_execute_state.session.info['fragment_cache_dirty'] = True
+
+
+def _bump_after_commit(session):
+    if session.info.pop('fragment_cache_dirty', False) and has_app_context():
+        fragment_cache = current_app.extensions.get('fragment_cache')
+        if fragment_cache is not None:
+            fragment_cache.bump_version()
+
+
+def _forget_after_rollback(session, previous_transaction):
+    session.info.pop('fragment_cache_dirty', None)
+
+
+# --- Setup ---
+
+def init_fragment_cache(app):
+    """Registers the {% cache %} extension on the app's Jinja environment and the invalidation listeners."""
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    if not app.config['FRAGMENT_CACHE_ENABLED']:
+        return None
+    fragment_cache = FragmentCache(app.config['FRAGMENT_CACHE_MAX_BYTES'], app.config['FRAGMENT_CACHE_TTL'])
+    app.jinja_env.fragment_cache = fragment_cache
+    app.extensions['fragment_cache'] = fragment_cache
+
+    if not event.contains(Session, 'after_flush', _track_orm_changes):
+        event.listen(Session, 'after_flush', _track_orm_changes)
+        event.listen(Session, 'do_orm_execute', _track_bulk_statements)
+        event.listen(Session, 'after_commit', _bump_after_commit)
+        event.listen(Session, 'after_soft_rollback', _forget_after_rollback)
+    return fragment_cache
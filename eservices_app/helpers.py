@@ -13,6 +13,10 @@ logger = logging.getLogger(__name__) # Pwede ring from flask import current_app
 
 # Maaaring kailanganin ding i-import ang models dito kung gagamitin
 from .models import User, Ticket, Response as TicketResponse, Service # Idinagdag ang Service
+from .metrics import email_timer
+from .notifications import route_staff_notification, KIND_REQUESTER_REPLY
+from .recipient_directory import recipient_snapshot
+from .mail_outbox import queue_mail
 
 
 # === EMAIL SENDING FUNCTIONS ===
@@ -42,39 +46,37 @@ Thank you,
 TCSD e-Services Team
 """
     try:
-        mail.send(msg)
+        with email_timer('new_ticket'):
+            mail.send(msg)
         logger.info(f"New ticket email sent successfully to {ticket.requester_email} for ticket {ticket.ticket_number}")
     except Exception as e:
         logger.error(f"Error sending new ticket email to {ticket.requester_email} for ticket {ticket.ticket_number}: {e}", exc_info=True) # exc_info=True para sa traceback
 
 def send_staff_notification_email(ticket, response):
-    # Siguraduhing na-load ang relationships
-    # Ito ay posibleng kailangan kung ang 'ticket' object ay galing sa ibang session o detached
-    try:
-        managers = ticket.service_type.managers.all() # Kunin muna lahat
-    except Exception as e:
-        logger.error(f"Error accessing managers for service ID {ticket.service_id}: {e}", exc_info=True)
-        managers = []
+    # Managers ng service + lahat ng Admins, galing sa recipient directory (walang queries, tingnan ang recipient_directory.py)
+    directory = recipient_snapshot()
+    users = directory.staff_recipients(ticket.service_id)
 
-    recipients = {manager.email for manager in managers}
-    admins = User.query.filter_by(role='Admin').all()
-    for admin in admins:
-        recipients.add(admin.email)
+    if not users:
+        logger.warning(f"No recipients found for staff notification for ticket {ticket.ticket_number}")
+        return
 
+    # Digest/immediate/off bawat recipient at urgent bypass (tingnan ang notifications.py)
+    recipients = sorted({user.email for user in route_staff_notification(ticket, users, KIND_REQUESTER_REPLY, response.body)})
     if not recipients:
-        logger.warning(f"No recipients found for staff notification for ticket {ticket.ticket_number}")
+        logger.info(f"Staff notification for ticket {ticket.ticket_number} queued for the digests")
         return
 
     sender_tuple = ('TCSD e-Services', current_app.config['MAIL_USERNAME'])
     msg = Message(f'New Response on Ticket #{ticket.ticket_number}',
                   sender=sender_tuple,
-                  recipients=list(recipients))
+                  recipients=recipients)
     msg.body = f"""
 Hi Team,
 A new response has been added to Ticket #{ticket.ticket_number} by the requester.
 
 Ticket Details:
-- Service: {ticket.service_type.name}
+- Service: {directory.service_names.get(ticket.service_id) or ticket.service_type.name}
 - Requester: {ticket.requester_name}
 
 New Response:
@@ -89,7 +91,8 @@ Thank you,
 e-Services Notifier
 """
     try:
-        mail.send(msg)
+        with email_timer('staff_notification'):
+            mail.send(msg)
         logger.info(f"Staff notification email sent successfully for ticket {ticket.ticket_number}")
     except Exception as e:
         logger.error(f"Error sending staff notification email for ticket {ticket.ticket_number}: {e}", exc_info=True)
@@ -104,7 +107,8 @@ If you did not make this request then simply ignore this email and no changes wi
 This link is valid for 30 minutes.
 """
     try:
-        mail.send(msg)
+        with email_timer('password_reset'):
+            mail.send(msg)
         logger.info(f"Password reset email sent successfully to {user.email}")
     except Exception as e:
         logger.error(f"Error sending password reset email to {user.email}: {e}", exc_info=True)
@@ -129,7 +133,48 @@ Thank you,
 TCSD e-Services Team
 """
     try:
-        mail.send(msg)
+        with email_timer('resolution'):
+            mail.send(msg)
         logger.info(f"Resolution email sent successfully to {ticket.requester_email} for ticket {ticket.ticket_number}")
     except Exception as e:
-        logger.error(f"Error sending resolution email to {ticket.requester_email} for ticket {ticket.ticket_number}: {e}", exc_info=True)
\ No newline at end of file
+        logger.error(f"Error sending resolution email to {ticket.requester_email} for ticket {ticket.ticket_number}: {e}", exc_info=True)
+
+def send_bulk_resolution_emails(resolved_rows, response_bodies=None):
+    """Sends ONE resolution email per requester for a bulk resolve.
+
+    `resolved_rows` ay listahan ng rows na may id, ticket_number, requester_name,
+    requester_email at service_name. Ang `response_bodies` ay dict ng ticket id -> final
+    response; default ay "Your ticket has been resolved.". Ang messages ay binubuo dito
+    at ipinapadala ng mail outbox sa background, sa iisang SMTP connection.
+    Returns the number of emails queued.
+    """
+    response_bodies = response_bodies or {}
+    tickets_by_requester = {}
+    for row in resolved_rows:
+        tickets_by_requester.setdefault(row.requester_email, []).append(row)
+
+    sender_tuple = ('TCSD e-Services', current_app.config['MAIL_USERNAME'])
+    messages = []
+    for requester_email, rows in tickets_by_requester.items():
+        ticket_sections = "\n".join([f"""Ticket #{row.ticket_number} regarding "{row.service_name}":
+--------------------------------------------------
+{response_bodies.get(row.id, 'Your ticket has been resolved.')}
+--------------------------------------------------
+""" for row in rows])
+        subject = (f'Update on your Ticket: #{rows[0].ticket_number} - RESOLVED' if len(rows) == 1
+                   else f'Update on your Tickets: {len(rows)} tickets RESOLVED')
+        msg = Message(subject, sender=sender_tuple, recipients=[requester_email])
+        msg.body = f"""
+Hi {rows[0].requester_name},
+The following ticket(s) have been marked as RESOLVED. Here is the final response from our team:
+
+{ticket_sections}
+If you have further questions, please create a new ticket.
+
+Thank you,
+TCSD e-Services Team
+"""
+        messages.append(msg)
+
+    # Ipinapadala ng mail outbox thread, hindi sa request (tingnan ang mail_outbox.py)
+    return queue_mail(messages, 'bulk_resolution')
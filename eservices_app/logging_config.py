@@ -0,0 +1,154 @@
+# eservices_app/logging_config.py
+
+# Non-blocking, structured (JSON) logging.
+# Ang request thread ay naglalagay lang ng LogRecord sa isang queue (QueueHandler);
+# ang QueueListener thread ang nagfo-format at nagsusulat/nagro-rotate ng log file.
+# Bawat record ay may request_id, user_id, endpoint, method at path (kung nasa request).
+#
+# Lazy formatting: gumamit ng %-style args (logger.info("Saved %s", name)) sa hot
+# paths para ang string formatting ay sa listener thread na mangyari, at hindi na
+# mangyayari kung na-drop ang record (level o sampling).
+# Sampling: logger.info(..., extra={'sample_every': 10}) = isa lang sa bawat 10 ang
+# isusulat (per message template). Pwede ring i-set sa config na LOG_SAMPLING.
+#
+# TANDAAN (gunicorn --preload): ang listener thread ay hindi kasama sa fork, kaya
+# dapat tawagin ang create_app() sa bawat worker (default na ganito kung walang --preload).
+
+import atexit
+import json
+import logging
+import queue
+import threading
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import g, request, has_request_context
+from flask.logging import default_handler
+
+CONTEXT_FIELDS = ('request_id', 'user_id', 'endpoint', 'method', 'path')
+
+
+class RequestContextFilter(logging.Filter):
+    """Adds request id, user id, endpoint, method and path to records logged inside a request.
+
+    Tumatakbo sa request thread (bago pumasok sa queue), kaya dito kinukuha ang context.
+    Hindi nito nilo-load ang user; ang naka-cache lang ng Flask-Login sa 'g' ang ginagamit.
+    """
+
+    def filter(self, record):
+        if has_request_context():
+            # Isang LocalProxy lookup lang; ang request fields ay kinukuha isang beses per request
+            request_globals = g._get_current_object()
+            context = getattr(request_globals, 'log_context', None)
+            if context is None:
+                context = request_globals.log_context = {
+                    'request_id': getattr(request_globals, 'request_id', None),
+                    'endpoint': request.endpoint, 'method': request.method, 'path': request.path,
+                }
+            record.__dict__.update(context)
+            user = getattr(request_globals, '_login_user', None)
+            record.user_id = user.get_id() if user is not None and user.is_authenticated else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only 1 of every N records per message template for high-volume messages."""
+
+    def __init__(self, rules=None):
+        super().__init__()
+        self.rules = dict(rules or {})
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        every = getattr(record, 'sample_every', None) or self.rules.get(record.msg)
+        if not every or every <= 1:
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        record.sample_every = every
+        return count % every == 0
+
+
+class LazyQueueHandler(QueueHandler):
+    """QueueHandler na hindi nagfo-format sa request thread.
+
+    Ang default na prepare() ay nagfo-format ng message (at traceback) bago i-queue;
+    dito ay ipinapasa ang record as-is at ang listener thread na ang bahala.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line."""
+
+    def format(self, record):
+        data = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if getattr(record, 'sample_every', None):
+            data['sampled_1_in'] = record.sample_every
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exc_info'] = record.exc_text
+        return json.dumps(data, default=str)
+
+
+def init_request_id(app):
+    """Gives every request an id (X-Request-ID header kung meron) and echoes it in the response."""
+
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex[:16]
+
+    @app.after_request
+    def add_request_id_header(response):
+        if 'request_id' in g:
+            response.headers['X-Request-ID'] = g.request_id
+        return response
+
+
+def stop_queue_logging(listener):
+    """Stops the listener after it writes the queued records (ok lang kahit tawagin nang dalawang beses)."""
+    if listener._thread is not None:
+        listener.stop()
+
+
+def setup_queue_logging(app, log_file, max_bytes=10240000, backup_count=5, level=logging.INFO):
+    """Attaches the queue-based JSON file logging to app.logger and starts the listener thread."""
+    log_queue = queue.SimpleQueue()
+
+    file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count)
+    file_handler.setFormatter(JsonFormatter())
+    file_handler.setLevel(level)
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.setLevel(level)
+    queue_handler.addFilter(SamplingFilter(app.config.get('LOG_SAMPLING')))
+    queue_handler.addFilter(RequestContextFilter())
+
+    # Ang default stderr handler ng Flask ay synchronous din; ang log file na ang destination
+    app.logger.removeHandler(default_handler)
+    app.logger.addHandler(queue_handler)
+    app.logger.setLevel(level)
+    listener.start()
+    # I-flush ang natitirang records bago mag-exit ang process
+    atexit.register(stop_queue_logging, listener)
+    app.extensions['log_listener'] = listener
+    return listener
@@ -0,0 +1,125 @@
+# eservices_app/mail_outbox.py
+
+# Background sending ng emails na hindi kailangang hintayin ng request.
+#
+# Ang bulk resolve sa staff dashboard ay dati nagpapadala ng isang email bawat
+# requester sa loob ng POST (isang SMTP round trip bawat isa), kaya ang pag-resolve
+# ng daan-daang tickets ay nakaharang sa request thread. Ngayon:
+#   1. queue_mail(messages, kind) sa request: ang ready na Message objects ay
+#      ipinapasa lang sa MailOutbox queue (walang SMTP sa request).
+#   2. MailOutbox thread: bawat batch ay ipinapadala sa iisang SMTP connection,
+#      sa loob ng app context. Ang pumalyang message ay nilo-log at binibilang
+#      (EMAIL_FAILURES) gaya ng dati; hindi inuulit.
+#
+# Gaya ng AuditWriter (audit.py): ang thread ay sinisimulan sa unang batch (ok lang
+# sa forked workers) at sa exit ng process (atexit) ay ipinapadala ang natitira.
+# Nasa memory lang ang queue, kaya ang emails na hindi pa naipadala kapag na-kill
+# ang worker ay mawawala (parehong best-effort gaya ng dating send sa request).
+# MAIL_OUTBOX_ASYNC=false: diretsong send sa caller (e.g. sa tests/CLI).
+
+import atexit
+import logging
+import os
+import queue
+import threading
+
+from flask import current_app
+
+from . import mail
+from .metrics import email_timer
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class MailOutbox:
+    """Background thread na nagpapadala ng naka-queue na email batches."""
+
+    def __init__(self, app, send_async=True):
+        self.app = app
+        self.send_async = send_async
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.sent = 0
+        self.failed = 0
+
+    def submit(self, messages, kind):
+        if not self.send_async:
+            self._send(messages, kind)
+            return
+        self._queue.put((list(messages), kind))
+        self._ensure_started()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='mail-outbox', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            messages, kind = item
+            with self.app.app_context():
+                self._send(messages, kind)
+
+    def _send(self, messages, kind):
+        """Sends one batch over a single SMTP connection. Returns the number sent."""
+        sent = 0
+        try:
+            with mail.connect() as conn:
+                for msg in messages:
+                    try:
+                        with email_timer(kind):
+                            conn.send(msg)
+                        sent += 1
+                    except Exception as e:
+                        logger.error(f"Error sending {kind} email to {', '.join(msg.recipients)}: {e}", exc_info=True)
+        except Exception as e:
+            logger.error(f"Error opening mail connection for {len(messages)} {kind} email(s): {e}", exc_info=True)
+        self.sent += sent
+        self.failed += len(messages) - sent
+        logger.info(f"Mail outbox: sent {sent} of {len(messages)} {kind} email(s)")
+        return sent
+
+    def stop(self, timeout=10.0):
+        """Sends the queued batches and stops the thread (ok lang kahit tawagin nang dalawang beses)."""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid() or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self):
+        return {'mode': 'background' if self.send_async else 'synchronous',
+                'running': bool(self._thread and self._thread.is_alive()),
+                'queued': self._queue.qsize(), 'sent': self.sent, 'failed': self.failed}
+
+
+def queue_mail(messages, kind):
+    """Ipinapasa ang ready na Message objects sa outbox (o diretsong send kapag walang outbox)."""
+    if not messages:
+        return 0
+    outbox = current_app.extensions.get('mail_outbox')
+    if outbox is None:
+        outbox = MailOutbox(current_app._get_current_object(), send_async=False)
+    outbox.submit(messages, kind)
+    return len(messages)
+
+
+# --- Setup ---
+
+def init_mail_outbox(app):
+    """Creates the per-process mail outbox; sinisimulan ang thread sa unang batch."""
+    outbox = MailOutbox(app, send_async=app.config['MAIL_OUTBOX_ASYNC'])
+    app.extensions['mail_outbox'] = outbox
+    atexit.register(outbox.stop)
+    return outbox
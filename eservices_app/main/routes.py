@@ -26,15 +26,17 @@ def home():
 
 # --- Ilipat din natin dito 'yung profile() route ---
 # (Kailangan natin i-import ang forms at db dito)
-from flask import request, flash # Import request at flash
+from flask import request, flash, current_app # Import request at flash
 from .. import db # '..' ibig sabihin ay "umakyat sa parent package" (eservices_app)
-from ..forms import UpdateProfileForm, ChangePasswordForm # Import forms
+from ..forms import UpdateProfileForm, ChangePasswordForm, NotificationPreferencesForm # Import forms
+from ..recipient_directory import invalidate_recipient_directory
 
 @main_bp.route('/profile', methods=['GET', 'POST'])
 @login_required
 def profile():
     profile_form = UpdateProfileForm()
     password_form = ChangePasswordForm()
+    notifications_form = NotificationPreferencesForm() if current_user.role in ('Staff', 'Admin') else None
 
     # Note: Kailangan i-access ang app.logger sa ibang paraan or mag-import ng logging
     # For now, tatanggalin ko muna ang logging dito para simple
@@ -53,10 +55,53 @@ def profile():
         # logger.info(...)
         flash('Your password has been changed successfully.', 'success')
         return redirect(url_for('main.profile')) # Gamitin ang 'main.profile'
+    elif notifications_form and 'submit_notifications' in request.form and notifications_form.validate_on_submit():
+        current_user.notify_mode = notifications_form.notify_mode.data
+        current_user.notify_digest_minutes = notifications_form.notify_digest_minutes.data # None = default window
+        db.session.commit()
+        invalidate_recipient_directory()
+        flash('Your notification preferences have been updated.', 'success')
+        return redirect(url_for('main.profile'))
 
     if request.method == 'GET' or ('submit_profile' in request.form and not profile_form.validate()):
         profile_form.name.data = current_user.name
         profile_form.email.data = current_user.email
+    if notifications_form and (request.method == 'GET' or 'submit_notifications' not in request.form):
+        notifications_form.notify_mode.data = current_user.notify_mode
+        notifications_form.notify_digest_minutes.data = current_user.notify_digest_minutes
 
     # Kailangan i-import ang render_template dito
-    return render_template('profile.html', title='My Profile', profile_form=profile_form, password_form=password_form)
\ No newline at end of file
+    return render_template('profile.html', title='My Profile', profile_form=profile_form, password_form=password_form,
+                           notifications_form=notifications_form,
+                           default_digest_minutes=current_app.config['NOTIFY_DIGEST_MINUTES'])
+
+# --- Yearly Summary Report ---
+# Galing sa precomputed aggregates (ticket_monthly_stat), hindi sa ticket table (tingnan ang ticket_stats.py)
+from datetime import datetime
+from flask import jsonify
+from ..decorators import staff_or_admin_required
+from ..ticket_stats import yearly_summary, available_years
+from ..ticket_sla import turnaround_summary
+from ..db_routing import replica_read
+
+@main_bp.route('/summary')
+@replica_read
+@login_required
+@staff_or_admin_required
+def summary():
+    current_year = datetime.utcnow().year
+    selected_year = request.args.get('year', current_year, type=int)
+    return render_template('summary.html', summary=yearly_summary(selected_year), turnaround=turnaround_summary(selected_year),
+                           selected_year=selected_year, available_years=available_years(current_year))
+
+
+@main_bp.route('/summary/data')
+@replica_read
+@login_required
+@staff_or_admin_required
+def summary_data():
+    """JSON form ng yearly summary (para sa charts ng summary.html)."""
+    selected_year = request.args.get('year', datetime.utcnow().year, type=int)
+    response = jsonify(dict(yearly_summary(selected_year), turnaround=turnaround_summary(selected_year)))
+    response.headers['Cache-Control'] = 'private, max-age=60'
+    return response
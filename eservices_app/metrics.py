@@ -0,0 +1,156 @@
+# eservices_app/metrics.py
+
+# Prometheus metrics para sa monitoring stack ('/metrics' endpoint).
+#
+# Multi-process (gunicorn) mode: i-set ang PROMETHEUS_MULTIPROC_DIR sa isang
+# writable, EMPTY na directory BAGO i-start ang gunicorn (halimbawa, sa systemd
+# unit o sa start script). Bawat worker ay nagsusulat sa sariling mmap files doon
+# at ang '/metrics' ay nag-a-aggregate ng lahat ng workers. Kung wala ito, ang
+# metrics ay sa kasalukuyang process lang (ok para sa 'flask run').
+#
+# Access: kapag may METRICS_TOKEN, kailangan ang 'Authorization: Bearer <token>'.
+# Kapag wala, localhost lang (at hindi proxied) ang pwedeng mag-scrape.
+#
+# Mura ang pag-record (counter/histogram update lang, walang I/O o lock contention
+# sa request path); ang pag-aggregate ay ginagawa lang kapag may nag-scrape.
+
+import hmac
+import os
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, request, abort
+from prometheus_client import (CollectorRegistry, Counter, Histogram, CONTENT_TYPE_LATEST,
+                               REGISTRY, generate_latest, multiprocess)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UPLOAD_SIZE_BUCKETS = (10 * 1024, 100 * 1024, 512 * 1024, 1024 ** 2, 5 * 1024 ** 2, 10 * 1024 ** 2, 25 * 1024 ** 2)
+
+# --- Metric Definitions ---
+REQUEST_LATENCY = Histogram('eservices_request_latency_seconds', 'Request latency per endpoint.',
+                            ['endpoint', 'method'], buckets=LATENCY_BUCKETS)
+REQUESTS_TOTAL = Counter('eservices_requests_total', 'Requests per endpoint and status code.',
+                         ['endpoint', 'method', 'status'])
+REQUEST_DB_TIME = Histogram('eservices_request_db_seconds', 'Time spent in SQL statements per request.',
+                            ['endpoint'], buckets=LATENCY_BUCKETS)
+EMAIL_SEND_LATENCY = Histogram('eservices_email_send_seconds', 'Email send latency.', ['kind'], buckets=LATENCY_BUCKETS)
+EMAIL_FAILURES = Counter('eservices_email_failures_total', 'Failed email sends.', ['kind'])
+UPLOAD_BYTES = Histogram('eservices_upload_bytes', 'Size of saved uploads.', buckets=UPLOAD_SIZE_BUCKETS)
+UPLOAD_DURATION = Histogram('eservices_upload_save_seconds', 'Time to save an upload to disk.', buckets=LATENCY_BUCKETS)
+RATE_LIMITED = Counter('eservices_rate_limited_total', 'Requests rejected by the rate limiter (429).', ['endpoint'])
+TICKETS_CREATED = Counter('eservices_tickets_created_total', 'Tickets created.', ['department'])
+TICKETS_RESOLVED = Counter('eservices_tickets_resolved_total', 'Tickets marked as resolved.', ['source'])
+PAGE_CACHE_LOOKUPS = Counter('eservices_page_cache_lookups_total', 'Page cache lookups (hit/miss) per endpoint.',
+                             ['endpoint', 'result'])
+COMPRESSION_BYTES = Counter('eservices_compression_bytes_total', 'Response bytes before (raw) and after (compressed) compression.',
+                            ['encoding', 'stage'])
+STAFF_NOTIFICATIONS = Counter('eservices_staff_notifications_total', 'Staff notifications per recipient by delivery (immediate, digest or off).',
+                              ['kind', 'delivery'])
+AUTO_ASSIGNMENTS = Counter('eservices_tickets_auto_assigned_total', 'New tickets by auto-assignment result (assigned, sticky or no_staff).',
+                           ['strategy', 'result'])
+DUPLICATE_SUBMISSIONS = Counter('eservices_duplicate_ticket_submissions_total', 'Duplicate ticket form POSTs absorbed (returned or pending original).',
+                                ['result'])
+DB_READ_ROUTES = Counter('eservices_db_read_routes_total', 'Replica-eligible requests by where they were read from (replica or why not).',
+                         ['endpoint', 'route'])
+
+
+# --- Recording Helpers (ginagamit ng routes at helpers.py) ---
+
+@contextmanager
+def email_timer(kind):
+    """Times an email send and counts it as a failure if the block raises (the exception is re-raised)."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        EMAIL_FAILURES.labels(kind).inc()
+        raise
+    finally:
+        EMAIL_SEND_LATENCY.labels(kind).observe(time.perf_counter() - start)
+
+
+def observe_upload(size_bytes, seconds):
+    UPLOAD_BYTES.observe(size_bytes)
+    UPLOAD_DURATION.observe(seconds)
+
+
+def record_rate_limited(endpoint):
+    RATE_LIMITED.labels(endpoint or '<unmatched>').inc()
+
+
+def record_ticket_created(department_name):
+    TICKETS_CREATED.labels(department_name).inc()
+
+
+def record_tickets_resolved(count=1, source='single'):
+    if count:
+        TICKETS_RESOLVED.labels(source).inc(count)
+
+
+def record_page_cache(endpoint, result):
+    PAGE_CACHE_LOOKUPS.labels(endpoint or '<unmatched>', result).inc()
+
+
+def record_compression(encoding, raw_bytes, compressed_bytes):
+    COMPRESSION_BYTES.labels(encoding, 'raw').inc(raw_bytes)
+    COMPRESSION_BYTES.labels(encoding, 'compressed').inc(compressed_bytes)
+
+
+def record_db_route(endpoint, route):
+    DB_READ_ROUTES.labels(endpoint or '<unmatched>', route).inc()
+
+
+def record_staff_notifications(kind, delivery, count=1):
+    if count:
+        STAFF_NOTIFICATIONS.labels(kind, delivery).inc(count)
+
+
+def record_auto_assignment(strategy, result):
+    AUTO_ASSIGNMENTS.labels(strategy, result).inc()
+
+
+def record_duplicate_submission(result):
+    DUPLICATE_SUBMISSIONS.labels(result).inc()
+
+
+# --- Setup ---
+
+LOCAL_ADDRESSES = ('127.0.0.1', '::1') # Pwedeng mag-scrape kapag walang METRICS_TOKEN
+
+
+def metrics_registry():
+    """Returns the registry to expose: lahat ng workers kung multi-process mode, itong process lang kung hindi."""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def init_metrics(app):
+    """Registers the request latency hook and the '/metrics' endpoint."""
+
+    @app.after_request
+    def record_request_metrics(response):
+        # Ang start time at DB time ay galing sa request_metrics.py (iisang timer lang per request)
+        start = g.get('request_metrics_start')
+        if start is not None:
+            endpoint = request.endpoint or '<unmatched>'
+            REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - start)
+            REQUEST_DB_TIME.labels(endpoint).observe(g.get('request_metrics_db_ms', 0.0) / 1000)
+            REQUESTS_TOTAL.labels(endpoint, request.method, str(response.status_code)).inc()
+        return response
+
+    def metrics_view():
+        token = app.config.get('METRICS_TOKEN')
+        if token:
+            # Constant-time compare (bytes, para hindi mag-TypeError sa non-ASCII na header)
+            if not hmac.compare_digest(request.headers.get('Authorization', '').encode('utf-8'),
+                                       f'Bearer {token}'.encode('utf-8')):
+                abort(401)
+        elif request.remote_addr not in LOCAL_ADDRESSES or 'X-Forwarded-For' in request.headers:
+            # Walang token: direktang request mula sa server lang (hindi dumaan sa reverse proxy)
+            abort(403)
+        return Response(generate_latest(metrics_registry()), mimetype=CONTENT_TYPE_LATEST)
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -43,6 +43,13 @@ class User(db.Model, UserMixin):
         lazy=True
     )
 
+    # Staff notification preferences (tingnan ang notifications.py):
+    # 'digest' = isang email bawat window, 'immediate' = isang email bawat reply, 'off' = wala.
+    # notify_digest_minutes: sariling window; None = NOTIFY_DIGEST_MINUTES ng app.
+    notify_mode = db.Column(db.String(20), nullable=False, default='digest', server_default='digest')
+    notify_digest_minutes = db.Column(db.Integer, nullable=True)
+    notification_events = db.relationship('NotificationEvent', lazy=True, cascade="all, delete-orphan")
+
 
     def get_reset_token(self):
         s = Serializer(current_app.config['SECRET_KEY'])
@@ -120,8 +127,19 @@ class Ticket(db.Model):
     # Ito ang column sa database na maglalaman ng ID ng naka-assign na staff
     assigned_staff_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
 
-
-
+    # Denormalized activity columns (tingnan ang ticket_activity.py), para ang "recently updated"
+    # at "awaiting reply" views ay hindi na kailangang mag-join/aggregate sa 'response' table
+    last_activity_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    response_count = db.Column(db.Integer, nullable=False, default=0)
+    first_staff_response_at = db.Column(db.DateTime, nullable=True)
+    resolved_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_ticket_requester_email_last_activity_at', 'requester_email', 'last_activity_at'),
+        db.Index('ix_ticket_last_activity_at', 'last_activity_at'),
+        db.Index('ix_ticket_status_first_staff_response_at', 'status', 'first_staff_response_at'),
+        db.Index('ix_ticket_service_id_school_id', 'service_id', 'school_id'), # sticky_school auto-assignment
+    )
 
     def __repr__(self):
         return f"Ticket('{self.ticket_number}', Status: '{self.status}')"
@@ -175,3 +193,188 @@ class PersonalCannedResponse(db.Model):
     def __repr__(self):
         return f"PersonalCannedResponse('{self.title}' by User {self.user_id})"
 
+
+# --- ARCHIVE TABLES (Hot/Cold storage para sa lumang resolved tickets) ---
+# Pareho ang columns ng Ticket/Response/Attachment para magamit ang INSERT ... SELECT
+# sa archive job (tingnan ang archive.py). May dagdag lang na 'archived_at'.
+class ArchivedTicket(db.Model):
+    __tablename__ = 'archived_ticket'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False) # Parehong ID noong nasa 'ticket' pa
+    ticket_number = db.Column(db.String(20), unique=True, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='Resolved')
+    date_posted = db.Column(db.DateTime, nullable=False, index=True)
+    requester_name = db.Column(db.String(100), nullable=False)
+    requester_email = db.Column(db.String(120), nullable=False, index=True)
+    requester_contact = db.Column(db.String(50), nullable=True)
+    details = db.Column(db.JSON, nullable=True)
+    department_id = db.Column(db.Integer, db.ForeignKey('department.id'), nullable=False)
+    service_id = db.Column(db.Integer, db.ForeignKey('service.id'), nullable=False)
+    school_id = db.Column(db.Integer, db.ForeignKey('school.id'), nullable=True)
+    assigned_staff_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+    last_activity_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    response_count = db.Column(db.Integer, nullable=False, default=0)
+    first_staff_response_at = db.Column(db.DateTime, nullable=True)
+    resolved_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # Read-only relationships para magamit ang parehong templates/export code ng Ticket
+    ticket_department = db.relationship('Department', viewonly=True)
+    service_type = db.relationship('Service', backref=db.backref('archived_tickets', lazy='dynamic', viewonly=True), viewonly=True)
+    school = db.relationship('School', viewonly=True)
+    assigned_staff = db.relationship('User', viewonly=True)
+    attachments = db.relationship('ArchivedAttachment', backref='ticket', lazy=True, viewonly=True)
+    responses = db.relationship('ArchivedResponse', backref='ticket', lazy=True, viewonly=True)
+
+    def __repr__(self):
+        return f"ArchivedTicket('{self.ticket_number}')"
+
+class ArchivedAttachment(db.Model):
+    __tablename__ = 'archived_attachment'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    filename = db.Column(db.String(200), nullable=False)
+    ticket_id = db.Column(db.Integer, db.ForeignKey('archived_ticket.id'), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"ArchivedAttachment('{self.filename}')"
+
+class ArchivedResponse(db.Model):
+    __tablename__ = 'archived_response'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    body = db.Column(db.Text, nullable=False)
+    is_internal = db.Column(db.Boolean, nullable=False, default=False)
+    date_posted = db.Column(db.DateTime, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    ticket_id = db.Column(db.Integer, db.ForeignKey('archived_ticket.id'), nullable=False, index=True)
+
+    author = db.relationship('User', viewonly=True)
+
+    def __repr__(self):
+        return f"ArchivedResponse on Ticket {self.ticket_id}"
+
+
+# Precomputed na bilang ng tickets per buwan x department x service x school, para sa
+# yearly summary report (tingnan ang ticket_stats.py). Kasama ang archived tickets.
+# Ang school_id na 0 ay para sa tickets na walang school (para gumana ang upsert sa PK).
+class TicketMonthlyStat(db.Model):
+    __tablename__ = 'ticket_monthly_stat'
+    year = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    month = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    department_id = db.Column(db.Integer, db.ForeignKey('department.id'), primary_key=True, autoincrement=False)
+    service_id = db.Column(db.Integer, db.ForeignKey('service.id'), primary_key=True, autoincrement=False)
+    school_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    ticket_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"TicketMonthlyStat({self.year}-{self.month:02d}, service {self.service_id}, school {self.school_id}: {self.ticket_count})"
+
+
+# History ng bawat status change (sino, kailan, mula saan papunta saan).
+# Walang foreign key sa 'ticket' para hindi na kailangang ilipat ang history kapag
+# na-archive ang ticket (pareho ang ticket id sa archived_ticket).
+class TicketStatusChange(db.Model):
+    __tablename__ = 'ticket_status_change'
+    id = db.Column(db.Integer, primary_key=True)
+    ticket_id = db.Column(db.Integer, nullable=False, index=True)
+    from_status = db.Column(db.String(20), nullable=False)
+    to_status = db.Column(db.String(20), nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    changed_by_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+
+    changed_by = db.relationship('User', viewonly=True)
+
+    def __repr__(self):
+        return f"TicketStatusChange(Ticket {self.ticket_id}: '{self.from_status}' -> '{self.to_status}')"
+
+
+# Fixed histograms ng turnaround times (first response at resolution) per taon x
+# service x school, para sa SLA percentiles (tingnan ang ticket_sla.py). Ang year ay
+# ng date_posted ng ticket; ang school_id na 0 ay para sa tickets na walang school.
+class TicketSlaStat(db.Model):
+    __tablename__ = 'ticket_sla_stat'
+    year = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    metric = db.Column(db.String(20), primary_key=True)
+    service_id = db.Column(db.Integer, db.ForeignKey('service.id'), primary_key=True, autoincrement=False)
+    school_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    bucket = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    sample_count = db.Column(db.Integer, nullable=False, default=0)
+    total_minutes = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"TicketSlaStat({self.year} {self.metric}, service {self.service_id}, school {self.school_id}, bucket {self.bucket}: {self.sample_count})"
+
+
+# Append-only audit trail ng ticket actions (tingnan ang audit.py). Isinusulat ng
+# background writer in batches, kaya walang foreign keys (ang ticket o user ay
+# pwedeng na-archive o nabura na) at may kopya ng ticket_number at actor_email.
+class AuditEvent(db.Model):
+    __tablename__ = 'audit_event'
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    occurred_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    action = db.Column(db.String(40), nullable=False)
+    actor_id = db.Column(db.Integer, nullable=True)
+    actor_email = db.Column(db.String(120), nullable=True)
+    ticket_id = db.Column(db.Integer, nullable=True)
+    ticket_number = db.Column(db.String(20), nullable=True)
+    details = db.Column(db.JSON, nullable=True)
+    request_id = db.Column(db.String(64), nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_audit_event_occurred_at', 'occurred_at'),
+        db.Index('ix_audit_event_ticket_id_occurred_at', 'ticket_id', 'occurred_at'),
+        db.Index('ix_audit_event_ticket_number_occurred_at', 'ticket_number', 'occurred_at'),
+        db.Index('ix_audit_event_actor_email_occurred_at', 'actor_email', 'occurred_at'),
+        db.Index('ix_audit_event_action_occurred_at', 'action', 'occurred_at'),
+    )
+
+    def __repr__(self):
+        return f"AuditEvent({self.action}, Ticket {self.ticket_number}, by {self.actor_email})"
+
+
+# Bilang ng hindi pa Resolved na tickets na naka-assign sa bawat staff, para sa
+# auto-assignment (tingnan ang ticket_assignment.py). Incremental na ina-update sa
+# parehong transaction ng write. Walang foreign key sa 'user' para hindi pumalya
+# ang upsert sa parehong flush ng pag-delete ng user (inaalis ang row nila doon).
+class StaffTicketLoad(db.Model):
+    __tablename__ = 'staff_ticket_load'
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    open_count = db.Column(db.Integer, nullable=False, default=0)
+    last_auto_assigned_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"StaffTicketLoad(User {self.user_id}: {self.open_count} open)"
+
+
+# Naiipong staff notifications na hindi pa naipapadala (digest). Isang row bawat
+# recipient bawat event; binubura kapag naipadala na ang digest (tingnan ang
+# notifications.py). Walang foreign key sa 'ticket' (pwedeng na-archive na).
+class NotificationEvent(db.Model):
+    __tablename__ = 'notification_event'
+    id = db.Column(db.Integer, primary_key=True)
+    recipient_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    kind = db.Column(db.String(40), nullable=False)
+    ticket_id = db.Column(db.Integer, nullable=True)
+    ticket_number = db.Column(db.String(20), nullable=True)
+    summary = db.Column(db.Text, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_notification_event_recipient_id_created_at', 'recipient_id', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f"NotificationEvent({self.kind}, Ticket {self.ticket_number}, to User {self.recipient_id})"
+
+
+# Idempotency keys ng bagong ticket submissions (token ng form o fingerprint ng
+# laman), may maikling TTL. Pending habang walang ticket_number (tingnan ang
+# ticket_submissions.py).
+class TicketSubmission(db.Model):
+    __tablename__ = 'ticket_submission'
+    key = db.Column(db.String(80), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    ticket_number = db.Column(db.String(20), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"TicketSubmission({self.key}, Ticket {self.ticket_number or 'pending'})"
@@ -0,0 +1,199 @@
+# eservices_app/notifications.py
+
+# Staff notifications (reply ng requester sa ticket) na naka-digest.
+#
+# Dati, bawat reply ay isang email sa lahat ng managers ng service at lahat ng
+# Admins. Ngayon, bawat recipient ay may preference sa User (notify_mode):
+#   - digest (default): ang event ay naiipon sa 'notification_event' (kasama sa
+#     transaction ng reply) at ipinapadala bilang ISANG email bawat recipient kapag
+#     ang pinakalumang event ay lampas na sa window niya (notify_digest_minutes o
+#     NOTIFY_DIGEST_MINUTES). Ang 'flask send-digests' ang nagpapadala; i-schedule
+#     sa cron (e.g. bawat 5 minuto).
+#   - immediate: isang email bawat event (ang dating behavior).
+#   - off: walang email.
+#
+# Urgent bypass (diretsong email kahit digest ang recipient):
+#   - ang recipient ang naka-assign sa ticket (NOTIFY_ASSIGNEE_IMMEDIATE)
+#   - may urgent keyword ang reply (NOTIFY_URGENT_KEYWORDS, e.g. "urgent", "asap")
+#   - wala pang reply ang staff at lampas na sa NOTIFY_URGENT_WAITING_HOURS ang ticket
+
+import logging
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from flask import current_app, url_for
+from flask_mail import Message
+from sqlalchemy import select, func, delete
+
+from . import db, mail
+from .models import User, NotificationEvent
+from .metrics import email_timer, record_staff_notifications
+from .recipient_directory import recipient_snapshot
+
+logger = logging.getLogger(__name__)
+
+MODE_DIGEST = 'digest'
+MODE_IMMEDIATE = 'immediate'
+MODE_OFF = 'off'
+NOTIFY_MODES = [(MODE_DIGEST, 'Digest (one email per window)'),
+                (MODE_IMMEDIATE, 'Immediately (one email per reply)'),
+                (MODE_OFF, 'Off')]
+
+KIND_REQUESTER_REPLY = 'requester_reply'
+KIND_LABELS = {KIND_REQUESTER_REPLY: 'Requester reply'}
+SUMMARY_LENGTH = 300
+
+
+def digest_minutes(user):
+    if user.notify_digest_minutes is not None:
+        return user.notify_digest_minutes
+    return current_app.config['NOTIFY_DIGEST_MINUTES']
+
+
+@lru_cache(maxsize=8)
+def _keyword_pattern(keywords):
+    words = [word.strip() for word in keywords.split(',') if word.strip()]
+    if not words:
+        return None
+    return re.compile(r'\b(?:' + '|'.join(map(re.escape, words)) + r')\b', re.IGNORECASE)
+
+
+def urgent_reason(ticket, recipient, body, now):
+    """Bakit dapat ipadala agad (assignee, keyword, waiting); None kapag pwedeng i-digest."""
+    config = current_app.config
+    if config['NOTIFY_ASSIGNEE_IMMEDIATE'] and ticket.assigned_staff_id == recipient.id:
+        return 'assignee'
+    pattern = _keyword_pattern(config['NOTIFY_URGENT_KEYWORDS'])
+    if pattern is not None and body and pattern.search(body):
+        return 'keyword'
+    waiting_hours = config['NOTIFY_URGENT_WAITING_HOURS']
+    if (waiting_hours and ticket.first_staff_response_at is None
+            and ticket.date_posted <= now - timedelta(hours=waiting_hours)):
+        return 'waiting'
+    return None
+
+
+def _summary(text):
+    text = ' '.join((text or '').split())
+    return text if len(text) <= SUMMARY_LENGTH else text[:SUMMARY_LENGTH - 3] + '...'
+
+
+def route_staff_notification(ticket, recipients, kind, body, now=None):
+    """Hinahati ang recipients ayon sa preference at urgent rules.
+
+    Ang digest recipients ay nagkakaroon ng NotificationEvent sa db.session (mako-commit
+    kasama ng reply). Returns the users na dapat padalhan ngayon din.
+    """
+    now = now or datetime.utcnow()
+    immediate, queued, muted = [], 0, 0
+    for user in recipients:
+        mode = user.notify_mode or MODE_DIGEST
+        if mode == MODE_OFF:
+            muted += 1
+        elif mode == MODE_IMMEDIATE or digest_minutes(user) <= 0 or urgent_reason(ticket, user, body, now):
+            immediate.append(user)
+        else:
+            db.session.add(NotificationEvent(recipient_id=user.id, created_at=now, kind=kind, ticket_id=ticket.id,
+                                             ticket_number=ticket.ticket_number,
+                                             summary=_summary(f"{ticket.requester_name}: {body}")))
+            queued += 1
+    record_staff_notifications(kind, MODE_IMMEDIATE, len(immediate))
+    record_staff_notifications(kind, MODE_DIGEST, queued)
+    record_staff_notifications(kind, MODE_OFF, muted)
+    return immediate
+
+
+# --- Digests ('flask send-digests') ---
+
+def due_digests(now=None):
+    """[(user, pending event count)] ng recipients na lampas na sa window ang pinakalumang event."""
+    now = now or datetime.utcnow()
+    pending = db.session.execute(
+        select(NotificationEvent.recipient_id, func.min(NotificationEvent.created_at), func.count())
+        .group_by(NotificationEvent.recipient_id)).all()
+    if not pending:
+        return []
+    # Staff/Admin galing sa recipient directory; query lang para sa iba (e.g. na-demote na may naiwang events)
+    users = dict(recipient_snapshot().by_id)
+    missing = [row[0] for row in pending if row[0] not in users]
+    if missing:
+        users.update((user.id, user) for user in User.query.filter(User.id.in_(missing)))
+    due = []
+    for recipient_id, oldest, count in pending:
+        user = users.get(recipient_id)
+        if user is not None and oldest <= now - timedelta(minutes=max(digest_minutes(user), 0)):
+            due.append((user, count))
+    return due
+
+
+def _digest_message(user, events):
+    tickets = {}
+    for event in events:
+        tickets.setdefault((event.ticket_id, event.ticket_number), []).append(event)
+    sections = []
+    for (ticket_id, ticket_number), ticket_events in tickets.items():
+        lines = [f"Ticket #{ticket_number}:"]
+        for event in ticket_events:
+            lines.append(f"  - {event.created_at:%b %d %I:%M %p} UTC, {KIND_LABELS.get(event.kind, event.kind)}: {event.summary}")
+        if ticket_id is not None:
+            lines.append(f"  {url_for('tickets.ticket_detail', ticket_id=ticket_id, _external=True)}")
+        sections.append("\n".join(lines))
+
+    subject = (f'e-Services digest: {len(events)} update(s) on Ticket #{events[0].ticket_number}' if len(tickets) == 1
+               else f'e-Services digest: {len(events)} update(s) on {len(tickets)} tickets')
+    msg = Message(subject, sender=('TCSD e-Services', current_app.config['MAIL_USERNAME']), recipients=[user.email])
+    msg.body = f"""
+Hi {user.name},
+
+Here are the ticket updates since your last digest:
+
+{chr(10).join(sections)}
+
+You can change how often you receive these emails in your profile:
+{url_for('main.profile', _external=True)}
+
+Thank you,
+e-Services Notifier
+"""
+    return msg
+
+
+def send_due_digests(now=None):
+    """Sends one digest email per due recipient (isang SMTP connection). Returns (digests sent, events sent).
+
+    Bawat recipient ay sariling transaction: naka-lock ang events niya habang
+    ipinapadala at binubura pagkatapos maipadala. Kapag pumalya ang send, naiiwan
+    ang events para sa susunod na run (at-least-once). Ang recipients na 'off' na
+    ay binubura lang ang naiwang events.
+    """
+    now = now or datetime.utcnow()
+    due = due_digests(now)
+    db.session.rollback() # Tapusin ang read transaction bago mag-lock bawat recipient
+    if not due:
+        return 0, 0
+
+    digests = sent_events = 0
+    try:
+        with mail.connect() as conn:
+            for user, _count in due:
+                events = NotificationEvent.query.filter(NotificationEvent.recipient_id == user.id,
+                                                        NotificationEvent.created_at <= now) \
+                    .order_by(NotificationEvent.created_at, NotificationEvent.id).with_for_update().all()
+                if events and user.notify_mode != MODE_OFF:
+                    try:
+                        with email_timer('staff_digest'):
+                            conn.send(_digest_message(user, events))
+                    except Exception as e:
+                        db.session.rollback()
+                        logger.error(f"Error sending notification digest to {user.email}: {e}", exc_info=True)
+                        continue
+                    digests += 1
+                    sent_events += len(events)
+                db.session.execute(delete(NotificationEvent).where(NotificationEvent.id.in_([event.id for event in events])))
+                db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error opening mail connection for notification digests: {e}", exc_info=True)
+    logger.info(f"Notification digests sent: {digests} digest(s), {sent_events} event(s)")
+    return digests, sent_events
@@ -0,0 +1,276 @@
+# eservices_app/page_cache.py
+
+# Response cache para sa public ticket-creation pages (select_department,
+# select_service at ang walang-laman na create_ticket_form GET).
+#
+# Anonymous GET requests lang ang kina-cache (walang login, walang pending flash
+# messages), kaya ang cached HTML ay pareho para sa lahat ng bisita. Ang cache
+# key ay may "reference-data version" na binabago tuwing may commit na may
+# Department/Service/School na nadagdag, na-edit o na-delete, kaya hindi na
+# kailangang mag-query sa DB para malaman kung luma na ang cached page.
+#
+# Backends (PAGE_CACHE_BACKEND):
+#   'memory'     - in-process LRU (default). Bawat gunicorn worker ay may sariling
+#                  cache at version; ang PAGE_CACHE_TIMEOUT ang limit ng staleness
+#                  sa ibang workers pagkatapos ng admin edit.
+#   'filesystem' - shared local store sa PAGE_CACHE_DIR; iisang cache at version
+#                  para sa lahat ng workers (at sa 'flask seed-db') sa server.
+#   'none'       - naka-off.
+#
+# CSRF: ang create_ticket_form ay may per-session CSRF token. Sa cached HTML ay
+# placeholder ang naka-save at pinapalitan ito ng token ng bisita sa bawat request.
+# Ganoon din ang submission_token ng form (tingnan ang ticket_submissions.py): bagong
+# token bawat request, hit man o miss, para hindi iisa ang token ng lahat ng bisita.
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, g, request, session, has_app_context
+from flask_login import current_user
+from flask_wtf.csrf import generate_csrf
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .metrics import record_page_cache
+
+VERSION_KEY = 'page-cache:refdata-version'
+CSRF_PLACEHOLDER = '__PAGE_CACHE_CSRF_TOKEN__'
+SUBMISSION_TOKEN_PLACEHOLDER = '__PAGE_CACHE_SUBMISSION_TOKEN__'
+# Models na ginagamit ng cached pages; kapag nagbago ang alinman, bagong version
+REFERENCE_MODELS = ('Department', 'Service', 'School')
+
+
+# --- Backends ---
+
+class MemoryCacheBackend:
+    """Thread-safe in-process LRU cache with per-entry expiry."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires is not None and expires < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        expires = time.time() + timeout if timeout else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FileSystemCacheBackend:
+    """Cache shared by all worker processes on this server (one pickle file per key)."""
+
+    def __init__(self, directory, max_entries=256):
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.cache')
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                expires, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires is not None and expires < time.time():
+            return None
+        return value
+
+    def set(self, key, value, timeout=None):
+        expires = time.time() + timeout if timeout else None
+        # Atomic: isulat sa temp file tapos i-rename, para walang worker na makabasa ng kalahating file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((expires, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+        self._prune()
+
+    def _prune(self):
+        """Removes the oldest entries (by mtime) once the directory has more than max_entries files."""
+        entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.cache')]
+        if len(entries) <= self.max_entries:
+            return
+        version_file = os.path.basename(self._path(VERSION_KEY))
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            if entry.name != version_file:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.cache'):
+                os.remove(entry.path)
+
+
+class PageCache:
+    """Versioned page cache on top of a backend."""
+
+    def __init__(self, backend, timeout=300, max_age=0):
+        self.backend = backend
+        self.timeout = timeout
+        self.max_age = max_age
+
+    def version(self):
+        version = self.backend.get(VERSION_KEY)
+        if version is None:
+            version = self.bump_version()
+        return version
+
+    def bump_version(self):
+        """Invalidates every cached page (ang lumang entries ay mag-e-expire o mapa-prune na lang)."""
+        version = uuid.uuid4().hex[:12]
+        self.backend.set(VERSION_KEY, version)
+        return version
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, entry):
+        self.backend.set(key, entry, self.timeout)
+
+
+# --- Invalidation (SQLAlchemy session events) ---
+
+def _track_reference_changes(session, flush_context):
+    changed = [*session.new, *session.deleted, *(obj for obj in session.dirty if session.is_modified(obj))]
+    for obj in changed:
+        if type(obj).__name__ in REFERENCE_MODELS:
+            session.info['page_cache_dirty'] = True
+            return
+
+
+def _bump_after_commit(session):
+    if session.info.pop('page_cache_dirty', False) and has_app_context():
+        page_cache = current_app.extensions.get('page_cache')
+        if page_cache is not None:
+            page_cache.bump_version()
+            current_app.logger.info("Reference data changed; page cache version bumped.")
+
+
+def _forget_after_rollback(session, previous_transaction):
+    session.info.pop('page_cache_dirty', None)
+
+
+# --- View Decorator ---
+
+def _is_cacheable_request():
+    return (request.method == 'GET'
+            and not current_user.is_authenticated
+            and '_flashes' not in session)
+
+
+def cached_page(view):
+    """Serves the view's response from the page cache for anonymous GET requests.
+
+    Ang na-cache ay 200 responses lang. Ang ETag ay galing sa cached HTML; ang mga
+    page na may CSRF o submission token ay 'no-store' dahil iba-iba ang token.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        page_cache = current_app.extensions.get('page_cache')
+        if page_cache is None or not _is_cacheable_request():
+            return view(*args, **kwargs)
+
+        key = f"page:{page_cache.version()}:{datetime.utcnow().year}:{request.full_path}"
+        entry = page_cache.get(key)
+        if entry is None:
+            record_page_cache(request.endpoint, 'miss')
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+            body = response.get_data(as_text=True)
+            token = g.get('csrf_token')
+            has_csrf = bool(token) and token in body
+            if has_csrf:
+                body = body.replace(token, CSRF_PLACEHOLDER)
+            submission_token = g.get('submission_token')
+            has_submission_token = bool(submission_token) and submission_token in body
+            if has_submission_token:
+                body = body.replace(submission_token, SUBMISSION_TOKEN_PLACEHOLDER)
+            entry = {
+                'body': body,
+                'mimetype': response.mimetype,
+                'etag': hashlib.sha1(body.encode('utf-8')).hexdigest(),
+                'csrf': has_csrf,
+                'submission_token': has_submission_token,
+            }
+            page_cache.set(key, entry)
+            # Ang response ng miss ay i-serve din gaya ng hit (pareho ang headers)
+        else:
+            record_page_cache(request.endpoint, 'hit')
+
+        body = entry['body']
+        if entry['csrf']:
+            body = body.replace(CSRF_PLACEHOLDER, generate_csrf())
+        if entry.get('submission_token'):
+            from .ticket_submissions import new_submission_token # Lazy import: kailangan ng ticket_submissions ang db
+            body = body.replace(SUBMISSION_TOKEN_PLACEHOLDER, new_submission_token())
+        response = current_app.response_class(body, mimetype=entry['mimetype'])
+        if entry['csrf'] or entry.get('submission_token'):
+            response.headers['Cache-Control'] = 'private, no-store'
+        else:
+            response.headers['Cache-Control'] = f'private, max-age={page_cache.max_age}, must-revalidate'
+            response.set_etag(entry['etag'])
+            response.make_conditional(request)
+        response.vary.add('Cookie')
+        return response
+
+    return wrapper
+
+
+# --- Setup ---
+
+def init_page_cache(app):
+    """Creates the configured page cache backend and registers the invalidation listeners."""
+    backend_name = app.config['PAGE_CACHE_BACKEND']
+    if backend_name == 'none':
+        return None
+    max_entries = app.config['PAGE_CACHE_MAX_ENTRIES']
+    if backend_name == 'filesystem':
+        backend = FileSystemCacheBackend(app.config['PAGE_CACHE_DIR'], max_entries=max_entries)
+    elif backend_name == 'memory':
+        backend = MemoryCacheBackend(max_entries=max_entries)
+    else:
+        raise ValueError(f"Unknown PAGE_CACHE_BACKEND '{backend_name}' (memory, filesystem or none).")
+
+    page_cache = PageCache(backend, timeout=app.config['PAGE_CACHE_TIMEOUT'], max_age=app.config['PAGE_CACHE_MAX_AGE'])
+    app.extensions['page_cache'] = page_cache
+
+    # Global ang listeners (lahat ng sessions); isang beses lang i-register kahit ilang apps ang gawin
+    if not event.contains(Session, 'after_flush', _track_reference_changes):
+        event.listen(Session, 'after_flush', _track_reference_changes)
+        event.listen(Session, 'after_commit', _bump_after_commit)
+        event.listen(Session, 'after_soft_rollback', _forget_after_rollback)
+    return page_cache
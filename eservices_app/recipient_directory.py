@@ -0,0 +1,134 @@
+# eservices_app/recipient_directory.py
+
+# In-memory directory ng staff notification recipients.
+#
+# Bawat reply ng requester ay dati nagre-query ng managers ng service at ng lahat
+# ng Admins. Ngayon, isang snapshot (tatlong queries: Staff/Admin users, ang
+# user_service association at service names) ang naka-cache sa worker na ito:
+#   - recipients bawat service: managers + Admins (walang duplicate), naka-precompute
+#   - Admins lang: para sa services na walang managers
+#   - service names: para sa email body
+#   - recipients bawat user id: para sa digests ('flask send-digests')
+# Ang bawat Recipient ay may notify_mode/notify_digest_minutes, kaya ang routing sa
+# notifications.py ay walang dagdag na queries.
+#
+# Ang edit_user/delete_user, edit_service/delete_service at ang notification
+# preferences sa profile ay tumatawag ng invalidate_recipient_directory() pagkatapos
+# ng commit; sa ibang workers, ang RECIPIENT_DIRECTORY_TTL ang limit ng staleness.
+
+import threading
+import time
+from typing import NamedTuple
+
+from flask import current_app
+from sqlalchemy import select
+
+from . import db
+from .models import User, Service, user_service_association
+
+STAFF_ROLES = ('Staff', 'Admin')
+
+
+class Recipient(NamedTuple):
+    id: int
+    email: str
+    name: str
+    notify_mode: str
+    notify_digest_minutes: int
+
+
+class RecipientSnapshot:
+    """Immutable na kopya ng recipients; pinapalitan lang nang buo, hindi binabago."""
+
+    def __init__(self, users, links, service_names):
+        recipients = {user_id: Recipient(user_id, email, name, notify_mode, notify_digest_minutes)
+                      for user_id, email, name, _role, notify_mode, notify_digest_minutes in users}
+        self.by_id = recipients
+        self.admins = tuple(recipients[row[0]] for row in users if row[3] == 'Admin')
+        managers = {}
+        for user_id, service_id in links:
+            if user_id in recipients:
+                managers.setdefault(service_id, []).append(recipients[user_id])
+        self.by_service = {}
+        for service_id, service_managers in managers.items():
+            merged = {recipient.id: recipient for recipient in service_managers + list(self.admins)}
+            self.by_service[service_id] = tuple(merged.values())
+        self.service_names = service_names
+
+    def staff_recipients(self, service_id):
+        return self.by_service.get(service_id, self.admins)
+
+
+def _load_snapshot():
+    users = db.session.execute(
+        select(User.id, User.email, User.name, User.role, User.notify_mode, User.notify_digest_minutes)
+        .where(User.role.in_(STAFF_ROLES)).order_by(User.id)).all()
+    links = db.session.execute(
+        select(user_service_association.c.user_id, user_service_association.c.service_id)
+        .order_by(user_service_association.c.service_id, user_service_association.c.user_id)).all()
+    service_names = dict(db.session.execute(select(Service.id, Service.name)).all())
+    return RecipientSnapshot(users, links, service_names)
+
+
+class RecipientDirectory:
+    """Per-worker cache ng RecipientSnapshot (ttl seconds)."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._snapshot = None
+        self._expires = 0
+        self._lock = threading.Lock()
+        self._generation = 0 # Para hindi ma-cache ang na-load bago ang invalidate
+        self.hits = self.misses = self.invalidations = 0
+
+    def snapshot(self):
+        with self._lock:
+            if self._snapshot is not None and self._expires > time.monotonic():
+                self.hits += 1
+                return self._snapshot
+            self.misses += 1
+            generation = self._generation
+        snapshot = _load_snapshot()
+        with self._lock:
+            if generation == self._generation:
+                self._snapshot, self._expires = snapshot, time.monotonic() + self.ttl
+        return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {'loaded': self._snapshot is not None, 'ttl': self.ttl, 'hits': self.hits,
+                    'misses': self.misses, 'invalidations': self.invalidations}
+
+
+# --- Lookups (ginagamit ng helpers.py) ---
+
+def recipient_snapshot():
+    """Kasalukuyang RecipientSnapshot, galing sa cache kapag naka-enable."""
+    directory = current_app.extensions.get('recipient_directory')
+    if directory is None:
+        return _load_snapshot()
+    return directory.snapshot()
+
+
+def invalidate_recipient_directory():
+    """Tinatawag pagkatapos ng commit ng pagbabago sa staff users, managers, services o preferences."""
+    directory = current_app.extensions.get('recipient_directory')
+    if directory is not None:
+        directory.invalidate()
+
+
+# --- Setup ---
+
+def init_recipient_directory(app):
+    """Creates the per-worker recipient directory; walang cache kapag 0 ang RECIPIENT_DIRECTORY_TTL."""
+    if app.config['RECIPIENT_DIRECTORY_TTL'] <= 0:
+        return None
+    directory = RecipientDirectory(app.config['RECIPIENT_DIRECTORY_TTL'])
+    app.extensions['recipient_directory'] = directory
+    return directory
@@ -0,0 +1,176 @@
+# eservices_app/request_metrics.py
+
+# Per-request SQL instrumentation.
+# Binibilang at tina-time ang bawat SQL statement (before/after_cursor_execute)
+# at ang template rendering ng bawat request. Resulta:
+#   - 'Server-Timing' header (db, render, total) na makikita sa browser DevTools
+#   - warning log para sa mabagal na requests (kasama ang pinakamabagal na statements)
+#   - per-endpoint stats na makikita ng admin sa /admin/request-stats
+# Ang stats ay per-process (bawat gunicorn worker ay may sariling numbers).
+
+import heapq
+import logging
+import threading
+import time
+
+from flask import g, request, has_request_context, template_rendered, before_render_template
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Ilang pinakamabagal na statements ang itatabi per request (para sa slow log)
+SLOWEST_STATEMENTS_KEPT = 5
+STATEMENT_LOG_LENGTH = 300
+
+
+class EndpointStats:
+    """Thread-safe per-endpoint aggregates (count, latency, SQL)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.since = time.time()
+
+    def record(self, endpoint, total_ms, db_ms, render_ms, queries, slow):
+        with self._lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                stats = self._stats[endpoint] = {'count': 0, 'slow_count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                                 'db_ms': 0.0, 'render_ms': 0.0, 'queries': 0, 'max_queries': 0}
+            stats['count'] += 1
+            stats['slow_count'] += 1 if slow else 0
+            stats['total_ms'] += total_ms
+            stats['max_ms'] = max(stats['max_ms'], total_ms)
+            stats['db_ms'] += db_ms
+            stats['render_ms'] += render_ms
+            stats['queries'] += queries
+            stats['max_queries'] = max(stats['max_queries'], queries)
+
+    def snapshot(self):
+        """Returns a list of per-endpoint dicts with averages, slowest (by total time) first."""
+        with self._lock:
+            items = [(endpoint, dict(stats)) for endpoint, stats in self._stats.items()]
+        rows = []
+        for endpoint, stats in items:
+            count = stats['count']
+            rows.append({
+                'endpoint': endpoint,
+                'count': count,
+                'slow_count': stats['slow_count'],
+                'avg_ms': round(stats['total_ms'] / count, 2),
+                'max_ms': round(stats['max_ms'], 2),
+                'avg_db_ms': round(stats['db_ms'] / count, 2),
+                'avg_render_ms': round(stats['render_ms'] / count, 2),
+                'avg_queries': round(stats['queries'] / count, 1),
+                'max_queries': stats['max_queries'],
+                'total_ms': round(stats['total_ms'], 2),
+            })
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.since = time.time()
+
+
+# --- SQLAlchemy Listeners ---
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('request_metrics_start', []).append(time.perf_counter())
+
+
+def _make_after_cursor_execute(slow_query_ms):
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('request_metrics_start')
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        if has_request_context() and 'request_metrics_start' in g:
+            g.request_metrics_queries += 1
+            g.request_metrics_db_ms += elapsed_ms
+            slowest = g.request_metrics_slowest
+            entry = (elapsed_ms, statement)
+            if len(slowest) < SLOWEST_STATEMENTS_KEPT:
+                heapq.heappush(slowest, entry)
+            elif elapsed_ms > slowest[0][0]:
+                heapq.heapreplace(slowest, entry)
+        if elapsed_ms >= slow_query_ms:
+            logger.warning("Slow query (%.1fms): %s", elapsed_ms, ' '.join(statement.split())[:STATEMENT_LOG_LENGTH])
+    return _after_cursor_execute
+
+
+# --- Template Render Timing ---
+
+def _before_render(sender, template, context, **extra):
+    if 'request_metrics_start' in g:
+        g.request_metrics_render_stack.append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    if 'request_metrics_start' in g and g.request_metrics_render_stack:
+        start = g.request_metrics_render_stack.pop()
+        # Nested renders (e.g. render_template sa loob ng template) ay hindi dinodoble
+        if not g.request_metrics_render_stack:
+            g.request_metrics_render_ms += (time.perf_counter() - start) * 1000
+
+
+# --- Setup ---
+
+def instrument_engine(app, engine):
+    """Counts and times the SQL statements of an engine in the current request's stats."""
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _make_after_cursor_execute(app.config['SLOW_QUERY_MS']))
+
+
+def init_request_metrics(app, engine):
+    """Registers the SQL listeners, request hooks and template signals. Call inside an app context."""
+    stats = EndpointStats()
+    app.extensions['request_stats'] = stats
+    slow_request_ms = app.config['SLOW_REQUEST_MS']
+    slow_request_queries = app.config['SLOW_REQUEST_QUERIES']
+    server_timing = app.config['SERVER_TIMING_ENABLED']
+
+    instrument_engine(app, engine)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+
+    @app.before_request
+    def start_request_metrics():
+        g.request_metrics_start = time.perf_counter()
+        g.request_metrics_queries = 0
+        g.request_metrics_db_ms = 0.0
+        g.request_metrics_render_ms = 0.0
+        g.request_metrics_render_stack = []
+        g.request_metrics_slowest = []
+
+    @app.after_request
+    def finish_request_metrics(response):
+        if 'request_metrics_start' not in g:
+            return response
+        total_ms = (time.perf_counter() - g.request_metrics_start) * 1000
+        db_ms = g.request_metrics_db_ms
+        render_ms = g.request_metrics_render_ms
+        queries = g.request_metrics_queries
+        slow = total_ms >= slow_request_ms or queries >= slow_request_queries
+        endpoint = request.endpoint or '<unmatched>'
+
+        stats.record(endpoint, total_ms, db_ms, render_ms, queries, slow)
+        if server_timing:
+            response.headers.add('Server-Timing', f'db;dur={db_ms:.1f};desc="{queries} queries", '
+                                                  f'render;dur={render_ms:.1f}, total;dur={total_ms:.1f}')
+        if slow:
+            slowest = "\n".join(f"    {ms:.1f}ms: {' '.join(statement.split())[:STATEMENT_LOG_LENGTH]}"
+                                for ms, statement in sorted(g.request_metrics_slowest, reverse=True))
+            app.logger.warning("Slow request %s %s (%s): %.1fms total, %s queries in %.1fms, render %.1fms\n"
+                               "  Slowest statements:\n%s",
+                               request.method, request.path, endpoint, total_ms, queries, db_ms, render_ms, slowest)
+        return response
+
+    return stats
+
+
+def request_stats_snapshot(app):
+    """Returns the per-endpoint stats rows of this worker (empty list kung hindi naka-setup)."""
+    stats = app.extensions.get('request_stats')
+    return stats.snapshot() if stats else []
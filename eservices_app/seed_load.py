@@ -0,0 +1,360 @@
+# eservices_app/seed_load.py
+
+# Synthetic "production-scale" data para sa performance testing ('flask seed-load').
+# Gumagawa ng users, tickets (na may makatotohanang 'details' per form), responses,
+# attachment records at assignments, nakakalat sa ilang taon.
+# Lahat ng inserts ay Core executemany batches (walang ORM objects per row), at
+# ang lahat ng random values ay galing sa iisang random.Random(seed), kaya pareho
+# ang resulta kapag pareho ang seed, options at laman ng database.
+
+import logging
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, insert, func, cast, Integer
+from werkzeug.security import generate_password_hash
+
+from . import db
+from .models import (User, Department, Service, School, Ticket, Attachment,
+                     Response as TicketResponse, ArchivedTicket, user_service_association)
+
+logger = logging.getLogger(__name__)
+
+# Pareho sa ticket number generation sa tickets/routes.py
+DEPT_CODE_MAP = {"ICT": "ICT", "Personnel": "PERS", "Legal Services": "LEGAL", "Office of the SDS": "SDS", "Accounting Unit": "ACCT", "Supply Office": "SUP"}
+
+SEED_EMAIL_DOMAIN = 'seed.deped.gov.ph'
+SEED_PASSWORD = 'password123'
+
+FIRST_NAMES = ['Juan', 'Maria', 'Jose', 'Ana', 'Mark', 'Kristine', 'John Paul', 'Angelica', 'Rommel', 'Liza',
+               'Ramon', 'Jocelyn', 'Noel', 'Marites', 'Arnel', 'Rowena', 'Jerome', 'Cherry', 'Dennis', 'Lorna',
+               'Ricardo', 'Maricel', 'Edwin', 'Grace', 'Ronaldo', 'Divina', 'Alvin', 'Joy', 'Ferdinand', 'Rosalie']
+LAST_NAMES = ['Dela Cruz', 'Santos', 'Reyes', 'Garcia', 'Mendoza', 'Bautista', 'Ocampo', 'Navarro', 'Aquino', 'Ramos',
+              'Manalo', 'Pascual', 'Lingat', 'Castillo', 'Villanueva', 'Soriano', 'Dizon', 'Tolentino', 'Gonzales', 'Yap',
+              'Cruz', 'Lopez', 'David', 'Sison', 'Mercado', 'Salazar', 'Canlas', 'Manansala', 'Tiglao', 'Lacson']
+POSITIONS = ['Teacher I', 'Teacher II', 'Teacher III', 'Master Teacher I', 'Master Teacher II', 'Head Teacher III',
+             'School Principal I', 'School Principal II', 'Administrative Officer II', 'Administrative Assistant III',
+             'Project Development Officer II', 'Education Program Supervisor', 'Guidance Counselor I', 'Nurse II']
+TOWNS = ['TARLAC CITY, TARLAC', 'CONCEPCION, TARLAC', 'CAPAS, TARLAC', 'GERONA, TARLAC', 'VICTORIA, TARLAC', 'LA PAZ, TARLAC']
+BARANGAYS = ['SAN VICENTE', 'SAN NICOLAS', 'MALIWALO', 'SAN ROQUE', 'ARMENIA', 'BALIBAGO I', 'CUT-CUT I', 'MATATALAIB']
+PURPOSES = ['Loan application', 'Scholarship requirement', 'Promotion / reclassification', 'Travel abroad',
+            'Bank requirement', 'Application for a new position', 'Retirement', 'GSIS requirement']
+CONCERNS = ['Cannot connect to the school Wi-Fi after the latest update.', 'The printer shows a paper jam error even without paper inside.',
+            'Laptop does not power on; charging light is blinking.', 'Projector in the AVR has no display when connected via HDMI.',
+            'Slow internet connection in the faculty room since last week.', 'Need help installing the LIS offline tool.',
+            'DCP laptop battery no longer holds a charge.', 'Request for technical assistance during the division webinar.']
+
+STAFF_REPLIES = ['We have received your request and are now processing it.', 'Please send the missing requirements so we can proceed.',
+                 'Your request has been forwarded to the concerned unit.', 'Kindly check your email for the updated document.',
+                 'Transaction completed. Thank you.', 'Your document is ready for pick-up at the Records Section.']
+REQUESTER_REPLIES = ['Thank you po!', 'Following up on this request, thank you.', 'I have attached the requested document.',
+                     'Noted po, maraming salamat.', 'May I know the status of my request?']
+INTERNAL_NOTES = ['Verified with the school head.', 'Waiting for the signature of the SDS.', 'Checked the records, all complete.',
+                  'Forwarded to Records for printing.']
+
+
+# --- Details Generators (per form type) ---
+# Ang keys ay pareho sa fields ng bawat form sa forms.py (hindi kasama ang FileFields),
+# kasama ang '*_other' fields gaya ng pag-save ng create_ticket_form.
+
+def _date(rng, start_year, end_year):
+    return datetime(rng.randint(start_year, end_year), rng.randint(1, 12), rng.randint(1, 28)).strftime('%Y-%m-%d')
+
+
+def _choice_with_other(rng, choices, other_values):
+    value = rng.choice(choices + ['Other'])
+    return value, (rng.choice(other_values) if value == 'Other' else '')
+
+
+def _issuance_details(rng, ctx):
+    doc_type, other = _choice_with_other(rng, ['Division Memorandum', 'Division Advisory', 'Office Memorandum'], ['Regional Memorandum', 'Bulletin'])
+    return {'document_title': f"{doc_type if doc_type != 'Other' else other} No. {rng.randint(1, 650)}, s. {ctx['year']}",
+            'document_type': doc_type, 'document_type_other': other}
+
+
+def _repair_details(rng, ctx):
+    device, other = _choice_with_other(rng, ['Laptop', 'Desktop', 'Printer'], ['Projector', 'Smart TV', 'Router'])
+    return {'device_type': device, 'device_type_other': other, 'description': rng.choice(CONCERNS)}
+
+
+def _email_account_details(rng, ctx):
+    remarks, other = _choice_with_other(rng, ['NEW ACCOUNT - DepEd Email (Gmail)', 'NEW ACCOUNT - Microsoft Account',
+                                              'PASSWORD RESET - DepEd Email (Gmail)', 'REACTIVATE - DepEd Email (Gmail)',
+                                              'Remove Two-factor Authentication (2FA) - DepEd - Gmail (Google)'], ['Change of name'])
+    is_new = remarks.startswith('NEW')
+    return {'school_id': ctx['school_code'], 'teacher_name': ctx['name'].upper(), 'sex': rng.choice(['Male', 'Female']),
+            'birth_date': _date(rng, 1965, 2000), 'position': rng.choice(POSITIONS),
+            'existing_email': 'N/A' if is_new else ctx['email'], 'remarks': remarks, 'remarks_other': other}
+
+
+def _school_id_details(rng, ctx):
+    return {'school_id': ctx['school_code'], 'remarks': rng.choice(['Password Reset', 'Forgot Account'])}
+
+
+def _school_concern_details(rng, ctx):
+    return {'school_id': ctx['school_code'], 'description': rng.choice(CONCERNS)}
+
+
+def _leave_details(rng, ctx):
+    leave, other = _choice_with_other(rng, ['Vacation Leave', 'Mandatory/Forced Leave', 'Sick Leave', 'Maternity Leave',
+                                            'Special Privilege Leave', 'Solo Parent Leave', 'Study Leave',
+                                            'Compensatory time off (CTO)'], ['Wellness Leave'])
+    return {'type_of_leave': leave, 'type_of_leave_other': other,
+            'classification': rng.choice(['Teaching Personnel', 'Non-Teaching Personnel']), 'position': rng.choice(POSITIONS)}
+
+
+def _coe_details(rng, ctx):
+    return {'first_day_of_service': _date(rng, 1990, ctx['year']), 'basic_salary': f"{rng.randint(27000, 90000):,}.00",
+            'position': rng.choice(POSITIONS), 'specific_purpose': rng.choice(PURPOSES),
+            'remarks': rng.choice(['With Compensation', 'Without Compensation'])}
+
+
+def _service_record_details(rng, ctx):
+    return {'position': rng.choice(POSITIONS), 'birth_date': _date(rng, 1965, 2000), 'place_of_birth': rng.choice(TOWNS).title(),
+            'specific_purpose': rng.choice(PURPOSES),
+            'delivery_method': rng.choice(['Hard copy (printed)', 'Soft copy (digital/PDF)'])}
+
+
+def _gsis_details(rng, ctx):
+    civil_status, other = _choice_with_other(rng, ['SINGLE', 'MARRIED', 'WIDOWED', 'SEPARATED'], ['ANNULLED'])
+    previous = rng.choice(['No', 'No', 'Yes'])
+    return {'address_street': f"{rng.randint(1, 999)} {rng.choice(BARANGAYS)}", 'address_city': rng.choice(TOWNS),
+            'postal_code': str(rng.randint(2300, 2320)), 'gender': rng.choice(['Male', 'Female']),
+            'civil_status': civil_status, 'civil_status_other': other, 'birth_date': _date(rng, 1965, 2000),
+            'place_of_birth': rng.choice(TOWNS).title(), 'basic_salary': f"{rng.randint(27000, 90000):,}.00",
+            'effective_date_from': _date(rng, ctx['year'] - 1, ctx['year']), 'effective_date_to': 'N/A',
+            'employment_status': rng.choice(['PERMANENT', 'PERMANENT', 'PROVISIONAL', 'SUBSTITUTE']),
+            'position': rng.choice(POSITIONS), 'previous_gsis_bp': str(rng.randint(10 ** 10, 10 ** 11)) if previous == 'Yes' else '',
+            'previous_appointment': previous, 'previous_agency': 'DPWH' if previous == 'Yes' else ''}
+
+
+def _no_pending_case_details(rng, ctx):
+    return {'position': rng.choice(POSITIONS), 'purpose': rng.choice(PURPOSES)}
+
+
+def _position_details(rng, ctx):
+    return {'position': rng.choice(POSITIONS)}
+
+
+def _provident_fund_details(rng, ctx):
+    return {'position': rng.choice(POSITIONS), 'employee_number': str(rng.randint(4000000, 4999999)),
+            'station_no': str(rng.randint(100, 999)),
+            'query': rng.choice(['Application for a Provident Loan (1st time Borrower)',
+                                 'Application for a Provident Loan (10K-100K) - old applicant',
+                                 'Application for a Provident Loan (Additional 100K)', 'Status of Application',
+                                 'Statement of Account', 'Request for Provident Loan Accountability Clearance'])}
+
+
+# service name -> (details generator, attachment field names na karaniwang may laman)
+FORM_PROFILES = {
+    'Issuances and Online Materials': (_issuance_details, ['attachment']),
+    'Repair, Maintenance and Troubleshoot of IT Equipment': (_repair_details, []),
+    'DepEd Email Account': (_email_account_details, ['attachment']),
+    'DPDS - DepEd Partnership Database System': (_school_id_details, []),
+    'DCP - DepEd Computerization Program: After-sales': (_school_concern_details, []),
+    'other ICT - Technical Assistance Needed': (_school_concern_details, []),
+    'Application for Leave of Absence': (_leave_details, ['form6_attachment', 'supporting_docs_attachment']),
+    'Certificate of Employment': (_coe_details, ['first_day_cert_attachment', 'payslip_attachment']),
+    'Service Record': (_service_record_details, []),
+    'GSIS BP Number': (_gsis_details, ['attachment']),
+    'Certificate of NO-Pending Case': (_no_pending_case_details, ['attachment']),
+    'Request for Approval of Locator Slip': (_position_details, ['attachment']),
+    'Request for Approval of Authority to Travel': (_position_details, ['attachment']),
+    'Request for Designation of Officer-in-Charge at the School': (_position_details, ['attachment']),
+    'Request for Substitute Teacher': (_position_details, ['attachment']),
+    'Alternative Delivery Mode': (_position_details, ['attachment']),
+    'DepEd TCSD Provident Fund': (_provident_fund_details, ['attachment_status']),
+    'Submission of Inventory Custodian Slip – ICS': (_position_details, ['attachment']),
+}
+DEFAULT_FORM_PROFILE = (lambda rng, ctx: {}, [])
+
+
+# --- Helpers ---
+
+def _ticket_sequences(prefixes):
+    """Returns {prefix: last sequence number} from the hot and archive tables, para walang duplicate ticket_number.
+
+    Isang query bawat prefix at table: numeric MAX ng sequence (ang text pagkatapos ng
+    "prefix-"), hindi string MAX, dahil ang 'ICT-2026-9999' ay mas mataas sa
+    'ICT-2026-10000' bilang string.
+    """
+    sequences = {}
+    for model in (Ticket, ArchivedTicket):
+        for prefix in prefixes:
+            seq = cast(func.substr(model.ticket_number, len(prefix) + 2), Integer)
+            number = db.session.scalar(select(func.max(seq)).where(model.ticket_number.like(f'{prefix}-%')))
+            if number:
+                sequences[prefix] = max(sequences.get(prefix, 0), int(number))
+    return sequences
+
+
+def _flush(table, rows):
+    """Executemany INSERT ng isang listahan ng dicts, tapos i-clear ang listahan."""
+    if rows:
+        db.session.execute(insert(table), rows)
+        rows.clear()
+
+
+def _status_for_age(rng, age_days):
+    """Mas luma ang ticket, mas malamang na resolved na."""
+    if age_days > 60:
+        return 'Resolved' if rng.random() < 0.97 else 'In Progress'
+    if age_days > 7:
+        return rng.choices(['Resolved', 'In Progress', 'Open'], weights=[70, 20, 10])[0]
+    return rng.choices(['Resolved', 'In Progress', 'Open'], weights=[20, 30, 50])[0]
+
+
+# --- Main Generator ---
+
+def generate_load_data(num_users, num_tickets, years=3, num_staff=20, seed=42, batch_size=5000, end_date=None, progress=None):
+    """Generates synthetic users, staff, tickets, responses and attachment records.
+
+    Kailangan na naka-seed na ang catalogue ('flask seed-db'). Ang tickets ay
+    ginagawa in chronological order (tumataas ang id kasabay ng date_posted).
+    Returns a dict of row counts per table.
+    """
+    rng = random.Random(seed)
+    end_date = end_date or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    start_date = datetime(end_date.year - years + 1, 1, 1)
+    span_seconds = (end_date - start_date).total_seconds()
+
+    services = db.session.execute(
+        select(Service.id, Service.name, Service.department_id, Department.name.label('department_name'))
+        .join(Department, Service.department_id == Department.id).order_by(Service.id)
+    ).all()
+    schools = db.session.execute(select(School.id, School.name, School.school_id_code).order_by(School.id)).all()
+    if not services or not schools:
+        raise ValueError("No services or schools found. Run 'flask seed-db' first.")
+
+    # Mas maraming tickets sa ICT at Personnel, gaya sa production
+    service_weights = [5 if s.department_name in ('ICT', 'Personnel') else 1 for s in services]
+    school_codes = {s.id: s.school_id_code or str(rng.randint(100000, 399999)) for s in schools}
+
+    # IDs ay tayo ang nag-a-assign para hindi na kailangan ng RETURNING per row
+    next_user_id = (db.session.scalar(select(func.max(User.id))) or 0) + 1
+    next_ticket_id = max(db.session.scalar(select(func.max(Ticket.id))) or 0,
+                         db.session.scalar(select(func.max(ArchivedTicket.id))) or 0) + 1
+
+    counts = {'users': 0, 'staff': 0, 'user_service': 0, 'tickets': 0, 'responses': 0, 'attachments': 0}
+    password_hash = generate_password_hash(SEED_PASSWORD) # Isang hash lang para sa lahat (mabagal ang hashing)
+
+    # --- Users at Staff ---
+    user_rows, requesters, staff_ids, link_rows = [], [], [], []
+    for i in range(num_staff + num_users):
+        user_id = next_user_id + i
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        is_staff = i < num_staff
+        email = f"{'staff' if is_staff else 'user'}{user_id}@{SEED_EMAIL_DOMAIN}"
+        user_rows.append({'id': user_id, 'email': email, 'name': name, 'password_hash': password_hash,
+                          'role': 'Staff' if is_staff else 'User'})
+        if is_staff:
+            staff_ids.append(user_id)
+        else:
+            requesters.append((user_id, name, email, f"09{rng.randint(100000000, 999999999)}"))
+        if len(user_rows) >= batch_size:
+            _flush(User.__table__, user_rows)
+    _flush(User.__table__, user_rows)
+    counts['users'], counts['staff'] = num_users, num_staff
+    if not requesters:
+        raise ValueError("At least one requester user is needed to generate tickets.")
+
+    # Bawat service ay may 1-3 managers mula sa seeded staff
+    managers_by_service = {}
+    for service in services:
+        managers = rng.sample(staff_ids, min(len(staff_ids), rng.randint(1, 3))) if staff_ids else []
+        managers_by_service[service.id] = managers
+        link_rows.extend({'user_id': staff_id, 'service_id': service.id} for staff_id in managers)
+    counts['user_service'] = len(link_rows)
+    _flush(user_service_association, link_rows)
+    db.session.commit()
+    logger.info(f"Seed load: {num_users} users and {num_staff} staff inserted")
+
+    # --- Tickets, Responses at Attachments ---
+    prefixes = {f"{DEPT_CODE_MAP.get(s.department_name, 'GEN')}-{year}"
+                for s in services for year in range(start_date.year, end_date.year + 1)}
+    sequences = _ticket_sequences(prefixes)
+
+    ticket_rows, response_rows, attachment_rows = [], [], []
+    for i in range(num_tickets):
+        # Pantay na nakakalat sa buong range, office hours lang (7AM-5PM)
+        day = start_date + timedelta(seconds=span_seconds * (i + rng.random()) / num_tickets)
+        posted = day.replace(hour=rng.randint(7, 16), minute=rng.randint(0, 59), second=rng.randint(0, 59), microsecond=0)
+        service = rng.choices(services, weights=service_weights)[0]
+        school = rng.choice(schools)
+        user_id, name, email, contact = rng.choice(requesters)
+
+        prefix = f"{DEPT_CODE_MAP.get(service.department_name, 'GEN')}-{posted.year}"
+        sequences[prefix] = sequences.get(prefix, 0) + 1
+        ticket_id = next_ticket_id + i
+
+        details_fn, attachment_fields = FORM_PROFILES.get(service.name, DEFAULT_FORM_PROFILE)
+        ctx = {'year': posted.year, 'name': name, 'email': email, 'school_code': school_codes[school.id]}
+        status = _status_for_age(rng, (end_date - posted).days)
+        managers = managers_by_service.get(service.id) or staff_ids
+        assigned = rng.choice(managers) if managers and (status != 'Open' or rng.random() < 0.3) else None
+
+        ticket_row = {
+            'id': ticket_id, 'ticket_number': f"{prefix}-{sequences[prefix]:04d}", 'status': status,
+            'date_posted': posted, 'requester_name': name, 'requester_email': email,
+            'requester_contact': contact if rng.random() < 0.8 else '', 'details': details_fn(rng, ctx),
+            'department_id': service.department_id, 'service_id': service.id, 'school_id': school.id,
+            'assigned_staff_id': assigned,
+        }
+        ticket_rows.append(ticket_row)
+
+        stamp = posted.strftime('%Y%m%d%H%M%S%f')
+        for field_name in attachment_fields:
+            if field_name == 'attachment' or rng.random() < 0.5:
+                attachment_rows.append({'filename': f"{stamp}_{field_name}_{rng.choice(['scan', 'document', 'form'])}_{ticket_id}.pdf",
+                                        'ticket_id': ticket_id})
+
+        # Conversation: staff replies, minsan follow-up ng requester, at internal notes
+        reply_at = posted
+        last_activity_at, response_count, first_staff_response_at = posted, 0, None
+        num_replies = 0 if status == 'Open' else rng.randint(1, 3)
+        for r in range(num_replies):
+            reply_at += timedelta(hours=rng.randint(1, 72))
+            staff_id = assigned or (rng.choice(managers) if managers else None)
+            if r > 0 and rng.random() < 0.35:
+                response_rows.append({'body': rng.choice(REQUESTER_REPLIES), 'is_internal': False,
+                                      'date_posted': reply_at, 'user_id': user_id, 'ticket_id': ticket_id})
+            elif staff_id:
+                is_internal = rng.random() < 0.15
+                response_rows.append({'body': rng.choice(INTERNAL_NOTES if is_internal else STAFF_REPLIES), 'is_internal': is_internal,
+                                      'date_posted': reply_at, 'user_id': staff_id, 'ticket_id': ticket_id})
+                if not is_internal and first_staff_response_at is None:
+                    first_staff_response_at = reply_at
+            else:
+                continue
+            last_activity_at = reply_at
+            response_count += 1
+
+        # Activity columns (dito na kinukuwenta; ang Core inserts ay hindi dumadaan sa ticket_activity)
+        ticket_row.update({'last_activity_at': last_activity_at, 'response_count': response_count,
+                           'first_staff_response_at': first_staff_response_at,
+                           'resolved_at': last_activity_at if status == 'Resolved' else None})
+
+        if len(ticket_rows) >= batch_size:
+            counts['tickets'] += len(ticket_rows)
+            counts['responses'] += len(response_rows)
+            counts['attachments'] += len(attachment_rows)
+            # Tickets muna bago ang children (foreign keys)
+            _flush(Ticket.__table__, ticket_rows)
+            _flush(TicketResponse.__table__, response_rows)
+            _flush(Attachment.__table__, attachment_rows)
+            db.session.commit()
+            if progress:
+                progress(counts['tickets'], num_tickets)
+
+    if ticket_rows: # Huling batch (wala na kapag eksaktong multiple ng batch_size ang num_tickets)
+        counts['tickets'] += len(ticket_rows)
+        counts['responses'] += len(response_rows)
+        counts['attachments'] += len(attachment_rows)
+        _flush(Ticket.__table__, ticket_rows)
+        _flush(TicketResponse.__table__, response_rows)
+        _flush(Attachment.__table__, attachment_rows)
+        db.session.commit()
+        if progress:
+            progress(counts['tickets'], num_tickets)
+    logger.info(f"Seed load complete: {counts}")
+    return counts
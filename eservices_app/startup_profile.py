@@ -0,0 +1,77 @@
+# eservices_app/startup_profile.py
+
+# Startup-time profiling ng create_app().
+# Bawat phase (config, extensions, models, blueprints, atbp.) ay tina-time at
+# binibilang kung ilang modules ang na-import dito. Naka-save ang resulta sa
+# app.extensions['startup_profile']; kapag STARTUP_PROFILE=1, nilo-log din ito.
+# Para sa import-time breakdown (cold process), gamitin ang 'flask startup-profile'.
+
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """Records the wall time and number of newly imported modules of each startup phase."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        modules_before = len(sys.modules)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, (time.perf_counter() - start) * 1000, len(sys.modules) - modules_before))
+
+    @property
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def report(self):
+        lines = [f"{'Phase':<24} {'ms':>8} {'modules':>8}"]
+        for name, elapsed_ms, new_modules in self.phases:
+            lines.append(f"{name:<24} {elapsed_ms:>8.1f} {new_modules:>8}")
+        lines.append(f"{'create_app total':<24} {sum(p[1] for p in self.phases):>8.1f}")
+        return "\n".join(lines)
+
+
+def import_time_breakdown(target='from app import app', top=15, cwd=None):
+    """Runs `python -X importtime` in a fresh process and returns (total_ms, [(package, self_ms)]).
+
+    Ang self time ng bawat module ay pinagsasama per top-level package, para
+    makita kung aling libraries (o sariling modules) ang pinakamabagal i-import.
+    """
+    env = dict(os.environ, STARTUP_PROFILE='0')
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', target],
+                            capture_output=True, text=True, cwd=cwd, env=env)
+    total_ms = (time.perf_counter() - start) * 1000
+    per_package = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _cumulative, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        # Sariling modules: ipakita per module (e.g. eservices_app.forms)
+        if package in ('eservices_app', 'app'):
+            package = name.strip()
+        per_package[package] = per_package.get(package, 0) + int(self_us) / 1000
+    ranked = sorted(per_package.items(), key=lambda item: item[1], reverse=True)[:top]
+    return total_ms, ranked
+
+
+def cold_start_ms(target='from app import app', runs=3, cwd=None):
+    """Returns the best wall time (ms) of starting a fresh interpreter that runs `target`."""
+    env = dict(os.environ, STARTUP_PROFILE='0')
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', target], capture_output=True, cwd=cwd, env=env, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
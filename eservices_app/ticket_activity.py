@@ -0,0 +1,137 @@
+# eservices_app/ticket_activity.py
+
+# Denormalized activity columns ng Ticket:
+#   - last_activity_at:        huling response, status change o attachment
+#   - response_count:          bilang ng responses (kasama ang internal notes)
+#   - first_staff_response_at: unang hindi-internal na reply ng Staff/Admin
+#   - resolved_at:             kailan na-Resolve (NULL kapag hindi Resolved)
+#
+# Ina-update sa parehong transaction ng mismong write (ticket_detail at
+# bulk_ticket_action), kaya ang "recently updated" at "awaiting reply" views ay
+# single-table queries na lang (walang join/aggregate sa 'response').
+#
+# Ang mga values ay SQL expressions (response_count + 1, COALESCE(...)) para tama
+# pa rin kahit sabay na nag-reply ang dalawang tao sa iisang ticket. Pareho ang
+# dict na ginagamit sa ORM (apply_activity) at sa bulk Query.update().
+#
+# Dito rin isinusulat ang status history (ticket_status_change) at ang turnaround
+# samples (ticket_sla.py), gamit ang values ng ticket *bago* ang update. Kapag
+# sabay na nag-first-reply ang dalawang staff, pwedeng madoble ang sample; ang
+# 'flask refresh-sla-stats --check' ang magpapakita nito.
+
+from datetime import datetime
+
+from sqlalchemy import func, select, insert, delete
+
+from . import db
+from .models import Ticket, TicketStatusChange
+from .ticket_sla import SlaDeltas, METRIC_FIRST_RESPONSE, METRIC_RESOLUTION, ticket_samples
+
+# Mga views ng ticket lists (my_tickets at staff_dashboard)
+VIEW_RECENT = 'recent'
+VIEW_AWAITING = 'awaiting'
+TICKET_VIEWS = (VIEW_RECENT, VIEW_AWAITING)
+
+
+def response_values(now, staff_reply):
+    """Values para sa bagong response; staff_reply = hindi-internal na reply ng Staff/Admin."""
+    values = {'last_activity_at': now, 'response_count': Ticket.response_count + 1}
+    if staff_reply:
+        values['first_staff_response_at'] = func.coalesce(Ticket.first_staff_response_at, now)
+    return values
+
+
+def status_values(new_status, now):
+    """Values para sa status change (ang pag-reopen ay nagki-clear ng resolved_at)."""
+    return {'status': new_status, 'last_activity_at': now,
+            'resolved_at': now if new_status == 'Resolved' else None}
+
+
+def apply_activity(ticket, values):
+    for name, value in values.items():
+        setattr(ticket, name, value)
+
+
+def _resolution_deltas(deltas, ticket, new_status, now):
+    if ticket.status == 'Resolved':
+        deltas.add(METRIC_RESOLUTION, ticket, ticket.resolved_at, sign=-1) # Reopen: alisin ang lumang resolution
+    if new_status == 'Resolved':
+        deltas.add(METRIC_RESOLUTION, ticket, now)
+
+
+def record_response(ticket, staff_reply, now=None):
+    now = now or datetime.utcnow()
+    if staff_reply and ticket.first_staff_response_at is None:
+        deltas = SlaDeltas()
+        deltas.add(METRIC_FIRST_RESPONSE, ticket, now)
+        deltas.write()
+    apply_activity(ticket, response_values(now, staff_reply))
+
+
+def record_status_change(ticket, new_status, changed_by_id=None, now=None):
+    now = now or datetime.utcnow()
+    db.session.add(TicketStatusChange(ticket_id=ticket.id, from_status=ticket.status, to_status=new_status,
+                                      changed_at=now, changed_by_id=changed_by_id))
+    deltas = SlaDeltas()
+    _resolution_deltas(deltas, ticket, new_status, now)
+    deltas.write()
+    apply_activity(ticket, status_values(new_status, now))
+
+
+# --- Bulk Writes (bulk_ticket_action) ---
+
+def activity_rows(*criteria):
+    """Tickets (activity columns lang) na tatamaan ng bulk UPDATE; kunin bago ang UPDATE."""
+    return db.session.execute(
+        select(Ticket.id, Ticket.ticket_number, Ticket.status, Ticket.date_posted, Ticket.service_id, Ticket.school_id,
+               Ticket.assigned_staff_id, Ticket.first_staff_response_at, Ticket.resolved_at).where(*criteria)
+    ).all()
+
+
+def record_bulk_status_change(rows, new_status, changed_by_id, now):
+    """History at turnaround samples para sa bulk status UPDATE (rows galing sa activity_rows)."""
+    if not rows:
+        return
+    db.session.execute(insert(TicketStatusChange), [
+        {'ticket_id': row.id, 'from_status': row.status, 'to_status': new_status,
+         'changed_at': now, 'changed_by_id': changed_by_id}
+        for row in rows
+    ])
+    deltas = SlaDeltas()
+    for row in rows:
+        _resolution_deltas(deltas, row, new_status, now)
+    deltas.write()
+
+
+def record_bulk_first_responses(rows, now):
+    """First response samples para sa bulk staff reply (rows galing sa activity_rows)."""
+    deltas = SlaDeltas()
+    for row in rows:
+        if row.first_staff_response_at is None:
+            deltas.add(METRIC_FIRST_RESPONSE, row, now)
+    deltas.write()
+
+
+def record_ticket_deleted(ticket):
+    """Inaalis ang turnaround samples at history ng ticket na buburahin."""
+    deltas = SlaDeltas()
+    ticket_samples(deltas, ticket, sign=-1)
+    deltas.write()
+    db.session.execute(delete(TicketStatusChange).where(TicketStatusChange.ticket_id == ticket.id))
+
+
+def touch(ticket, now=None):
+    ticket.last_activity_at = now or datetime.utcnow()
+
+
+def apply_ticket_view(query, view, active=True):
+    """Filter/order ng 'recent' at 'awaiting' views; None kapag walang napiling view.
+
+    'awaiting' = active tickets na wala pang reply ng staff (pinakaluma muna).
+    Resolved list: 'awaiting' ay walang saysay, kaya 'recent' ordering na lang.
+    """
+    if view == VIEW_AWAITING and active:
+        return query.filter(Ticket.first_staff_response_at == None).order_by(Ticket.date_posted)
+    if view in TICKET_VIEWS:
+        return query.order_by(Ticket.last_activity_at.desc())
+    return None
@@ -0,0 +1,413 @@
+# eservices_app/ticket_assignment.py
+
+# Auto-assignment ng bagong tickets sa isa sa mga managers ng service.
+#
+# Load = bilang ng hindi pa Resolved na tickets na naka-assign sa staff. Naka-save
+# ito sa 'staff_ticket_load' at ina-update nang incremental sa parehong transaction
+# ng write (session events para sa ORM; record_bulk_load_changes() para sa bulk
+# UPDATEs ng bulk_ticket_action), kaya hindi na binibilang ang tickets sa bawat
+# assignment. Ang Core inserts (e.g. 'flask seed-load') ay hindi dumadaan dito;
+# pagkatapos ng mga iyon, patakbuhin ang 'flask refresh-staff-load'.
+#
+# Strategies (AUTO_ASSIGN_STRATEGY; 'off' = walang auto-assignment):
+#   - least_loaded:  pinakamababang load; tie = pinakamatagal nang hindi na-auto-assign
+#   - round_robin:   pinakamatagal nang hindi na-auto-assign (hindi tinitingnan ang load)
+#   - sticky_school: ang staff na huling humawak ng ticket ng parehong school at
+#                    service, basta hindi lalampas sa AUTO_ASSIGN_STICKY_SLACK ang load
+#                    niya kumpara sa pinakamababa; kung hindi, least_loaded
+#
+# Ang pagpili ay sa LoadBoard: min-heap ng managers bawat service ayon sa key ng
+# strategy (lazy: ang lumang entries ay nilalaktawan kapag nagbago ang load). Isang
+# service lang sa live assignment; buong ticket stream sa simulation ('flask
+# simulate-assignment'), kung saan ang resolutions ay nagbabawas ng load.
+#
+# Sa MySQL, ang load rows ng mga managers ay naka-lock (SELECT ... FOR UPDATE)
+# hanggang sa commit, kaya ang sabay na tickets sa parehong service ay hindi
+# mapupunta sa iisang staff dahil pareho nilang nakita ang lumang load.
+
+import heapq
+from datetime import datetime
+from statistics import mean, pstdev
+
+from flask import current_app
+from sqlalchemy import select, update, delete, func, event, inspect, union_all
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from . import db
+from .models import Ticket, ArchivedTicket, User, StaffTicketLoad, user_service_association
+from .metrics import record_auto_assignment
+
+STRATEGY_LEAST_LOADED = 'least_loaded'
+STRATEGY_ROUND_ROBIN = 'round_robin'
+STRATEGY_STICKY_SCHOOL = 'sticky_school'
+STRATEGIES = (STRATEGY_LEAST_LOADED, STRATEGY_ROUND_ROBIN, STRATEGY_STICKY_SCHOOL)
+STRATEGY_OFF = 'off'
+RESOLVED = 'Resolved'
+_NEVER = datetime.min
+
+
+def counts_toward_load(assigned_staff_id, status):
+    return assigned_staff_id is not None and status != RESOLVED
+
+
+# --- Selection ---
+
+class StaffLoad:
+    """Load ng isang staff sa LoadBoard."""
+
+    __slots__ = ('user_id', 'open_count', 'last_auto_assigned_at', 'version')
+
+    def __init__(self, user_id, open_count=0, last_auto_assigned_at=None):
+        self.user_id = user_id
+        self.open_count = open_count
+        self.last_auto_assigned_at = last_auto_assigned_at
+        self.version = 0
+
+
+def _least_loaded_key(load):
+    return (load.open_count, load.last_auto_assigned_at or _NEVER, load.user_id)
+
+
+def _round_robin_key(load):
+    return (load.last_auto_assigned_at or _NEVER, load.user_id)
+
+
+_STRATEGY_KEYS = {
+    STRATEGY_LEAST_LOADED: _least_loaded_key,
+    STRATEGY_ROUND_ROBIN: _round_robin_key,
+    STRATEGY_STICKY_SCHOOL: _least_loaded_key,
+}
+
+
+class LoadBoard:
+    """Min-heap ng managers bawat service ayon sa key ng strategy."""
+
+    def __init__(self, strategy, managers_by_service, loads=None, sticky_slack=3):
+        if strategy not in _STRATEGY_KEYS:
+            raise ValueError(f"Unknown auto-assignment strategy '{strategy}' ({', '.join(STRATEGIES)} or {STRATEGY_OFF}).")
+        self.strategy = strategy
+        self.sticky_slack = sticky_slack
+        self._key = _STRATEGY_KEYS[strategy]
+        self.loads = dict(loads or {})
+        self.managers = {service_id: list(user_ids) for service_id, user_ids in managers_by_service.items()}
+        self._services_of = {}
+        self._heaps = {}
+        for service_id, user_ids in self.managers.items():
+            for user_id in user_ids:
+                self.loads.setdefault(user_id, StaffLoad(user_id))
+                self._services_of.setdefault(user_id, []).append(service_id)
+            self._rebuild(service_id)
+
+    def _entry(self, load):
+        return (self._key(load), load.version, load.user_id)
+
+    def _rebuild(self, service_id):
+        heap = [self._entry(self.loads[user_id]) for user_id in self.managers[service_id]]
+        heapq.heapify(heap)
+        self._heaps[service_id] = heap
+
+    def _changed(self, load):
+        load.version += 1
+        for service_id in self._services_of.get(load.user_id, ()):
+            heap = self._heaps[service_id]
+            if len(heap) > 4 * len(self.managers[service_id]) + 16:
+                self._rebuild(service_id) # Masyado nang maraming lumang entries
+            else:
+                heapq.heappush(heap, self._entry(load))
+
+    def top(self, service_id):
+        """Ang manager na nasa taas ng heap ng service (None kapag walang managers)."""
+        heap = self._heaps.get(service_id)
+        while heap:
+            _key, version, user_id = heap[0]
+            if version == self.loads[user_id].version:
+                return user_id
+            heapq.heappop(heap) # Luma na ang entry
+        return None
+
+    def choose(self, service_id, sticky_staff_id=None):
+        """Ang staff na bibigyan ng susunod na ticket ng service; (user_id, sticky?)."""
+        user_id = self.top(service_id)
+        if (user_id is not None and self.strategy == STRATEGY_STICKY_SCHOOL and sticky_staff_id is not None
+                and sticky_staff_id != user_id and sticky_staff_id in self.managers[service_id]
+                and self.loads[sticky_staff_id].open_count <= self.loads[user_id].open_count + self.sticky_slack):
+            return sticky_staff_id, True
+        return user_id, self.strategy == STRATEGY_STICKY_SCHOOL and user_id is not None and user_id == sticky_staff_id
+
+    def assign(self, user_id, now):
+        load = self.loads[user_id]
+        load.open_count += 1
+        load.last_auto_assigned_at = now
+        self._changed(load)
+
+    def release(self, user_id):
+        load = self.loads.get(user_id)
+        if load is not None:
+            load.open_count -= 1
+            self._changed(load)
+
+
+# --- Incremental Load Counters ---
+
+class LoadDeltas:
+    """Naiipong +1/-1 bawat staff na isusulat nang sabay (isang upsert)."""
+
+    def __init__(self):
+        self._counts = {}
+
+    def add(self, assigned_staff_id, status, sign=1):
+        if counts_toward_load(assigned_staff_id, status):
+            self._counts[assigned_staff_id] = self._counts.get(assigned_staff_id, 0) + sign
+
+    def discard(self, user_ids):
+        for user_id in user_ids:
+            self._counts.pop(user_id, None)
+
+    def write(self, connection=None):
+        rows = [{'user_id': user_id, 'open_count': count} for user_id, count in self._counts.items() if count]
+        self._counts.clear()
+        if rows:
+            upsert_staff_loads(connection if connection is not None else db.session.connection(), rows)
+        return len(rows)
+
+
+def upsert_staff_loads(connection, rows):
+    """Adds each row's open_count to the staff's load (gumagawa ng row kapag wala pa)."""
+    table = StaffTicketLoad.__table__
+    if connection.dialect.name == 'mysql':
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update(open_count=table.c.open_count + stmt.inserted.open_count)
+    elif connection.dialect.name == 'sqlite':
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(index_elements=['user_id'],
+                                          set_={'open_count': table.c.open_count + stmt.excluded.open_count})
+    else:
+        raise NotImplementedError(f"staff_ticket_load upsert is not implemented for {connection.dialect.name}")
+    connection.execute(stmt, rows)
+
+
+def _deltas(flush_context):
+    return flush_context.attributes.setdefault('staff_load_deltas', LoadDeltas())
+
+
+def _previous_value(obj, name):
+    history = inspect(obj).attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    return history.unchanged[0] if history.unchanged else getattr(obj, name)
+
+
+def _collect_deleted_tickets(session, flush_context, instances):
+    # Sa before_flush pa kinukuha (pwede pang i-load ang expired na attributes)
+    deltas = _deltas(flush_context)
+    for obj in session.deleted:
+        if isinstance(obj, Ticket):
+            deltas.add(_previous_value(obj, 'assigned_staff_id'), _previous_value(obj, 'status'), sign=-1)
+
+
+def _apply_load_deltas(session, flush_context):
+    deltas = _deltas(flush_context)
+    deleted_users = []
+    for obj in session.new:
+        if isinstance(obj, Ticket):
+            deltas.add(obj.assigned_staff_id, obj.status)
+    for obj in session.dirty:
+        if isinstance(obj, Ticket) and obj not in session.deleted:
+            state = inspect(obj)
+            if state.attrs.assigned_staff_id.history.has_changes() or state.attrs.status.history.has_changes():
+                deltas.add(_previous_value(obj, 'assigned_staff_id'), _previous_value(obj, 'status'), sign=-1)
+                deltas.add(obj.assigned_staff_id, obj.status)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            deleted_users.append(obj.id)
+    deltas.discard(deleted_users)
+    deltas.write(session.connection())
+    if deleted_users:
+        session.connection().execute(delete(StaffTicketLoad.__table__).where(StaffTicketLoad.user_id.in_(deleted_users)))
+
+
+def record_bulk_load_changes(rows, status=None, assigned_staff_id=...):
+    """Load deltas para sa bulk UPDATE ng status o assignment; rows (may assigned_staff_id at status) ay kinuha bago ang UPDATE."""
+    deltas = LoadDeltas()
+    for row in rows:
+        deltas.add(row.assigned_staff_id, row.status, sign=-1)
+        deltas.add(row.assigned_staff_id if assigned_staff_id is ... else assigned_staff_id, status or row.status)
+    deltas.write()
+
+
+# --- Live Assignment (create_ticket_form) ---
+
+def _manager_ids(service_id):
+    return list(db.session.scalars(
+        select(user_service_association.c.user_id).where(user_service_association.c.service_id == service_id)
+        .order_by(user_service_association.c.user_id)))
+
+
+def _lock_loads(user_ids):
+    """{user_id: StaffLoad} ng mga staff; naka-lock ang rows hanggang sa commit (MySQL)."""
+    upsert_staff_loads(db.session.connection(), [{'user_id': user_id, 'open_count': 0} for user_id in user_ids])
+    rows = db.session.execute(
+        select(StaffTicketLoad.user_id, StaffTicketLoad.open_count, StaffTicketLoad.last_auto_assigned_at)
+        .where(StaffTicketLoad.user_id.in_(user_ids)).order_by(StaffTicketLoad.user_id).with_for_update())
+    return {row.user_id: StaffLoad(*row) for row in rows}
+
+
+def last_school_assignee(service_id, school_id):
+    """Ang staff ng pinakahuling naka-assign na ticket ng parehong service at school (para sa sticky_school)."""
+    if school_id is None:
+        return None
+    return db.session.scalar(
+        select(Ticket.assigned_staff_id)
+        .where(Ticket.service_id == service_id, Ticket.school_id == school_id, Ticket.assigned_staff_id != None)
+        .order_by(Ticket.id.desc()).limit(1))
+
+
+def auto_assign(ticket, now=None):
+    """Sets ticket.assigned_staff_id ayon sa AUTO_ASSIGN_STRATEGY (bago i-add/i-flush ang bagong ticket).
+
+    Returns (user_id, strategy); user_id ay None kapag naka-off, may assignee na, o walang managers ang service.
+    """
+    strategy = current_app.config['AUTO_ASSIGN_STRATEGY']
+    if strategy == STRATEGY_OFF or ticket.assigned_staff_id is not None:
+        return None, strategy
+    manager_ids = _manager_ids(ticket.service_id)
+    if not manager_ids:
+        record_auto_assignment(strategy, 'no_staff')
+        return None, strategy
+
+    board = LoadBoard(strategy, {ticket.service_id: manager_ids}, _lock_loads(manager_ids),
+                      sticky_slack=current_app.config['AUTO_ASSIGN_STICKY_SLACK'])
+    sticky_staff_id = last_school_assignee(ticket.service_id, ticket.school_id) if strategy == STRATEGY_STICKY_SCHOOL else None
+    user_id, sticky = board.choose(ticket.service_id, sticky_staff_id)
+    now = now or datetime.utcnow()
+    db.session.execute(update(StaffTicketLoad).where(StaffTicketLoad.user_id == user_id).values(last_auto_assigned_at=now))
+    ticket.assigned_staff_id = user_id # Ang +1 sa open_count ay sa flush (_apply_load_deltas)
+    record_auto_assignment(strategy, 'sticky' if sticky else 'assigned')
+    return user_id, strategy
+
+
+# --- Full Rebuild ---
+
+def _open_counts():
+    return dict(db.session.execute(
+        select(Ticket.assigned_staff_id, func.count())
+        .where(Ticket.assigned_staff_id != None, Ticket.status != RESOLVED)
+        .group_by(Ticket.assigned_staff_id)).all())
+
+
+def rebuild_staff_loads():
+    """Recomputes open_count mula sa ticket table (naiiwan ang last_auto_assigned_at). Returns the staff count."""
+    counts = _open_counts()
+    db.session.execute(update(StaffTicketLoad).values(open_count=0))
+    if counts:
+        upsert_staff_loads(db.session.connection(), [{'user_id': user_id, 'open_count': count}
+                                                     for user_id, count in counts.items()])
+    db.session.commit()
+    return len(counts)
+
+
+def verify_staff_loads():
+    """Returns the staff whose stored load differs from the ticket table: {user_id: (stored, actual)}."""
+    actual = _open_counts()
+    stored = dict(db.session.execute(select(StaffTicketLoad.user_id, StaffTicketLoad.open_count)
+                                     .where(StaffTicketLoad.open_count != 0)).all())
+    return {user_id: (stored.get(user_id, 0), actual.get(user_id, 0))
+            for user_id in stored.keys() | actual.keys() if stored.get(user_id, 0) != actual.get(user_id, 0)}
+
+
+# --- Simulation ('flask simulate-assignment') ---
+
+def ticket_stream(start, end):
+    """Historical tickets (hot + archive) na posted sa [start, end), sunod-sunod ayon sa date_posted."""
+    parts = [select(model.id, model.date_posted, model.service_id, model.school_id, model.status,
+                    model.resolved_at, model.assigned_staff_id)
+             .where(model.date_posted >= start, model.date_posted < end)
+             for model in (Ticket, ArchivedTicket)]
+    stream = union_all(*parts).subquery()
+    return db.session.execute(select(stream).order_by(stream.c.date_posted, stream.c.id)
+                              .execution_options(yield_per=5000))
+
+
+def managers_by_service():
+    managers = {}
+    for user_id, service_id in db.session.execute(
+            select(user_service_association.c.user_id, user_service_association.c.service_id)
+            .order_by(user_service_association.c.user_id)):
+        managers.setdefault(service_id, []).append(user_id)
+    return managers
+
+
+def simulate_assignment(tickets, managers, strategy, sticky_slack=3):
+    """Nire-replay ang ticket stream gamit ang strategy; 'actual' = ang historical assigned_staff_id.
+
+    Nagsisimula sa walang load; ang bawat ticket na Resolved ay nagbabawas ng load sa
+    resolved_at nito. Ang sinusukat bago ang bawat assignment:
+      - queue: load ng napiling staff (ilang tickets ang nauuna sa bagong ticket)
+      - spread: pinakamataas minus pinakamababang load ng managers ng service
+    """
+    actual = strategy == 'actual'
+    board = LoadBoard(STRATEGY_LEAST_LOADED if actual else strategy, managers, sticky_slack=sticky_slack)
+    releases = [] # (resolved_at, seq, user_id)
+    last_by_school = {}
+    queue_depths, spreads, assigned_counts = [], [], {}
+    unassigned = sticky_hits = seq = 0
+
+    for ticket in tickets:
+        while releases and releases[0][0] <= ticket.date_posted:
+            board.release(heapq.heappop(releases)[2])
+
+        service_managers = board.managers.get(ticket.service_id)
+        if actual:
+            user_id, sticky = ticket.assigned_staff_id, False
+            if user_id is not None and user_id not in board.loads:
+                board.loads[user_id] = StaffLoad(user_id) # Dating staff na wala nang hawak na service
+        elif service_managers:
+            user_id, sticky = board.choose(ticket.service_id, last_by_school.get((ticket.service_id, ticket.school_id)))
+        else:
+            user_id, sticky = None, False
+        if user_id is None:
+            unassigned += 1
+            continue
+
+        if service_managers:
+            service_loads = [board.loads[manager_id].open_count for manager_id in service_managers]
+            spreads.append(max(service_loads) - min(service_loads))
+        queue_depths.append(board.loads[user_id].open_count)
+        sticky_hits += sticky
+        assigned_counts[user_id] = assigned_counts.get(user_id, 0) + 1
+        board.assign(user_id, ticket.date_posted)
+        if ticket.school_id is not None:
+            last_by_school[(ticket.service_id, ticket.school_id)] = user_id
+        if ticket.status == RESOLVED and ticket.resolved_at is not None:
+            seq += 1
+            heapq.heappush(releases, (max(ticket.resolved_at, ticket.date_posted), seq, user_id))
+
+    assigned = len(queue_depths)
+    shares = list(assigned_counts.values())
+    return {
+        'strategy': strategy,
+        'tickets': assigned + unassigned,
+        'assigned': assigned,
+        'unassigned': unassigned,
+        'staff': len(assigned_counts),
+        'mean_queue': round(mean(queue_depths), 2) if queue_depths else 0,
+        'p95_queue': sorted(queue_depths)[int(0.95 * (assigned - 1))] if queue_depths else 0,
+        'mean_spread': round(mean(spreads), 2) if spreads else 0,
+        'max_spread': max(spreads, default=0),
+        'share_stdev': round(pstdev(shares), 1) if shares else 0,
+        'sticky_hits': sticky_hits,
+    }
+
+
+# --- Setup ---
+
+def init_ticket_assignment(app):
+    """Checks AUTO_ASSIGN_STRATEGY and registers the session listeners that keep staff_ticket_load up to date."""
+    strategy = app.config['AUTO_ASSIGN_STRATEGY']
+    if strategy != STRATEGY_OFF and strategy not in STRATEGIES:
+        raise ValueError(f"Unknown AUTO_ASSIGN_STRATEGY '{strategy}' ({', '.join(STRATEGIES)} or {STRATEGY_OFF}).")
+    if not event.contains(Session, 'after_flush', _apply_load_deltas):
+        event.listen(Session, 'before_flush', _collect_deleted_tickets)
+        event.listen(Session, 'after_flush', _apply_load_deltas)
@@ -0,0 +1,166 @@
+# eservices_app/ticket_details.py
+
+# Indexed fields ng Ticket.details (JSON) para sa filters at reports.
+#
+# Ang bawat form class (forms.py) ay pwedeng mag-declare ng:
+#     indexed_details = ('query',)          # o {'query': 'Provident Fund Query'} para sa ibang label
+# Ang mga keys na iyon ay may index sa 'ticket' at 'archived_ticket':
+#   - MySQL: VIRTUAL generated column na 'detail_<key>' (walang dagdag na storage
+#     sa table) + secondary index.
+#   - SQLite: expression index sa json_extract(details, '$.<key>') (walang column).
+# Ang detail_value() ay nagbabalik ng expression na tumutugma sa index ng dialect,
+# kaya ang filter ay index lookup at hindi na JSON parsing ng bawat row sa Python.
+#
+# Ang columns/indexes ay ginagawa ng migration gamit ang add_detail_columns();
+# ang 'flask detail-columns' ay nagpapakita ng declared keys na wala pang index.
+# Ang generated columns ay hindi naka-map sa models (hindi sila sinusulatan ng ORM).
+
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+from sqlalchemy import String, func, inspect, literal_column, text
+
+from . import db
+
+DETAIL_COLUMN_PREFIX = 'detail_'
+DETAIL_COLUMN_LENGTH = 255
+DETAIL_TABLES = ('ticket', 'archived_ticket')
+_KEY_PATTERN = re.compile(r'^[a-z][a-z0-9_]{0,40}$') # Ginagamit sa DDL at JSON path, kaya identifier lang
+
+
+class DetailField(NamedTuple):
+    key: str
+    label: str
+    choices: tuple
+    forms: tuple
+
+
+def _check_key(key):
+    if not _KEY_PATTERN.match(key):
+        raise ValueError(f"Invalid details key for an indexed column: {key!r}")
+    return key
+
+
+def detail_column_name(key):
+    return DETAIL_COLUMN_PREFIX + _check_key(key)
+
+
+def detail_index_name(table_name, key):
+    return f'ix_{table_name}_{detail_column_name(key)}'
+
+
+def _json_path(key):
+    return f"'$.{_check_key(key)}'"
+
+
+# --- Declarations (forms.py) ---
+
+def _ticket_form_classes():
+    from .forms import GeneralTicketForm
+    pending, found = list(GeneralTicketForm.__subclasses__()), []
+    while pending:
+        form_class = pending.pop(0)
+        found.append(form_class)
+        pending.extend(form_class.__subclasses__())
+    return found
+
+
+def form_detail_keys(form_class):
+    """{key: label o None} na sariling declare ng form class (hindi minana).
+
+    Ang indexed_details ay tuple ng keys, o dict na key -> label kapag hindi sapat ang label ng field.
+    """
+    declared = form_class.__dict__.get('indexed_details', ())
+    labels = declared if isinstance(declared, dict) else dict.fromkeys(declared)
+    return {_check_key(key): label for key, label in labels.items()}
+
+
+@lru_cache(maxsize=None)
+def indexed_detail_fields():
+    """{key: DetailField} ng lahat ng declared keys; pinagsasama ang choices ng forms na may parehong key."""
+    fields = {}
+    for form_class in _ticket_form_classes():
+        for key, label in form_detail_keys(form_class).items():
+            unbound = getattr(form_class, key)
+            label = label or (unbound.args[0] if unbound.args else key.replace('_', ' ').title())
+            choices = tuple(value for value, _text in unbound.kwargs.get('choices', ()) if value)
+            field = fields.get(key)
+            if field is None:
+                fields[key] = DetailField(key, label, choices, (form_class.__name__,))
+            else:
+                merged = field.choices + tuple(value for value in choices if value not in field.choices)
+                fields[key] = field._replace(choices=merged, forms=field.forms + (form_class.__name__,))
+    return dict(sorted(fields.items(), key=lambda item: item[1].label))
+
+
+# --- Queries ---
+
+def detail_value(table, key):
+    """Expression ng details[key] na gumagamit ng index ng dialect (table = Table, hindi alias o subquery)."""
+    if db.engine.dialect.name == 'mysql':
+        return literal_column(f'{table.name}.{detail_column_name(key)}', String(DETAIL_COLUMN_LENGTH))
+    # Dapat kapareho ng expression sa index (literal ang JSON path, hindi bound parameter)
+    return func.json_extract(table.c.details, literal_column(_json_path(key)))
+
+
+def parse_detail_filter(raw):
+    """'key:value' galing sa query string -> (key, value); None kapag walang filter o hindi indexed ang key."""
+    key, _sep, value = (raw or '').partition(':')
+    if not value or key not in indexed_detail_fields():
+        return None
+    return key, value
+
+
+def detail_criteria(table, detail_filter):
+    key, value = detail_filter
+    return detail_value(table, key) == value
+
+
+# --- Migrations ---
+
+def add_detail_columns(op, keys, tables=DETAIL_TABLES):
+    """Para sa Alembic migrations: gumagawa ng generated column + index (MySQL) o expression index (SQLite) bawat key."""
+    dialect = op.get_context().dialect.name
+    for table_name in tables:
+        for key in keys:
+            column, index = detail_column_name(key), detail_index_name(table_name, key)
+            if dialect == 'mysql':
+                # LEFT() sa halip na CAST para walang truncation error sa strict mode
+                op.execute(
+                    f"ALTER TABLE {table_name} ADD COLUMN {column} VARCHAR({DETAIL_COLUMN_LENGTH}) "
+                    f"GENERATED ALWAYS AS (LEFT(JSON_UNQUOTE(JSON_EXTRACT(details, {_json_path(key)})), {DETAIL_COLUMN_LENGTH})) VIRTUAL, "
+                    f"ADD INDEX {index} ({column})")
+            else:
+                op.create_index(index, table_name, [text(f"json_extract(details, {_json_path(key)})")], unique=False)
+
+
+def drop_detail_columns(op, keys, tables=DETAIL_TABLES):
+    """Kabaligtaran ng add_detail_columns()."""
+    dialect = op.get_context().dialect.name
+    for table_name in tables:
+        for key in keys:
+            if dialect == 'mysql':
+                op.execute(f"ALTER TABLE {table_name} DROP INDEX {detail_index_name(table_name, key)}, "
+                           f"DROP COLUMN {detail_column_name(key)}")
+            else:
+                op.drop_index(detail_index_name(table_name, key), table_name=table_name)
+
+
+def _index_names(table_name):
+    if db.engine.dialect.name == 'sqlite':
+        # Hindi nire-reflect ng SQLAlchemy ang expression indexes ng SQLite
+        return set(db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"),
+                                      {'table': table_name}).scalars())
+    return {index['name'] for index in inspect(db.engine).get_indexes(table_name)}
+
+
+def missing_detail_indexes():
+    """[(form class, key, table)] ng declared keys na wala pang index sa database."""
+    existing = {table_name: _index_names(table_name) for table_name in DETAIL_TABLES}
+    missing = []
+    for key, field in indexed_detail_fields().items():
+        for table_name in DETAIL_TABLES:
+            if detail_index_name(table_name, key) not in existing[table_name]:
+                missing.append((', '.join(field.forms), key, table_name))
+    return missing
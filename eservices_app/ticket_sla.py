@@ -0,0 +1,258 @@
+# eservices_app/ticket_sla.py
+
+# Turnaround (SLA) analytics: first response at resolution time per service at school.
+#
+# Bawat ticket ay may (hanggang) isang sample bawat metric:
+#   - first_response: first_staff_response_at - date_posted
+#   - resolution:     resolved_at - date_posted (kapag Resolved ang ticket)
+# Ang samples ay naka-bucket sa fixed histogram (BUCKET_BOUNDS_MINUTES) sa
+# 'ticket_sla_stat', kaya ang percentiles ay kinukuwenta mula sa ilang buckets lang
+# (hindi na ini-scan ang tickets o responses). Ang p50/p90 ay tantya (linear
+# interpolation sa loob ng bucket), sapat para sa dashboards.
+#
+# Incremental: ang ticket_activity.py ang tumatawag dito sa parehong transaction ng
+# write (+1 sa unang staff reply at sa pag-Resolve; -1 sa lumang resolution kapag
+# na-reopen, para isa lang ang resolution sample bawat ticket). Kaya ang histograms
+# ay laging kapareho ng ibibigay ng rebuild mula sa activity columns ng tickets.
+#
+# Kapag binago ang BUCKET_BOUNDS_MINUTES o may Core/bulk inserts sa ticket table
+# (e.g. 'flask seed-load'), patakbuhin ang 'flask refresh-sla-stats'.
+
+from bisect import bisect_left
+from datetime import datetime
+
+from sqlalchemy import select, delete, insert, union_all
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from . import db
+from .models import Ticket, ArchivedTicket, TicketSlaStat, Service, Department, School
+
+METRIC_FIRST_RESPONSE = 'first_response'
+METRIC_RESOLUTION = 'resolution'
+METRICS = (METRIC_FIRST_RESPONSE, METRIC_RESOLUTION)
+PERCENTILES = (50, 90)
+NO_SCHOOL = 0
+NO_SCHOOL_LABEL = 'No School / Office'
+
+# Upper bounds (minutes) ng bawat bucket: 15m ... 90 days; ang huling bucket ay "> 90 days"
+BUCKET_BOUNDS_MINUTES = (
+    15, 30, 60, 120, 240, 480, 720,                   # hanggang 12 oras
+    1440, 2160, 2880, 4320, 5760, 7200,               # 1-5 araw
+    10080, 14400, 20160, 30240, 43200, 64800, 129600, # 1 linggo - 90 araw
+)
+KEY_COLUMNS = ('year', 'metric', 'service_id', 'school_id', 'bucket')
+
+
+def bucket_for(minutes):
+    return bisect_left(BUCKET_BOUNDS_MINUTES, minutes)
+
+
+def _minutes_between(start, end):
+    return max(0, round((end - start).total_seconds() / 60))
+
+
+def sample_key(metric, ticket, event_at):
+    """(key, minutes) ng isang sample; ang 'ticket' ay kahit anong may date_posted/service_id/school_id."""
+    minutes = _minutes_between(ticket.date_posted, event_at)
+    key = (ticket.date_posted.year, metric, ticket.service_id, ticket.school_id or NO_SCHOOL, bucket_for(minutes))
+    return key, minutes
+
+
+class SlaDeltas:
+    """Naiipong +1/-1 samples na isusulat nang sabay (isang upsert bawat flush)."""
+
+    def __init__(self):
+        self._rows = {}
+
+    def add(self, metric, ticket, event_at, sign=1):
+        if event_at is None:
+            return
+        key, minutes = sample_key(metric, ticket, event_at)
+        count, total = self._rows.get(key, (0, 0))
+        self._rows[key] = (count + sign, total + sign * minutes)
+
+    def rows(self):
+        return [dict(zip(KEY_COLUMNS, key), sample_count=count, total_minutes=total)
+                for key, (count, total) in self._rows.items() if count or total]
+
+    def write(self, connection=None):
+        rows = self.rows()
+        self._rows.clear()
+        if rows:
+            upsert_sla_samples(connection if connection is not None else db.session.connection(), rows)
+        return len(rows)
+
+
+def upsert_sla_samples(connection, rows):
+    """Adds each row's sample_count/total_minutes to its (year, metric, service, school, bucket) bucket."""
+    table = TicketSlaStat.__table__
+    if connection.dialect.name == 'mysql':
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update(sample_count=table.c.sample_count + stmt.inserted.sample_count,
+                                            total_minutes=table.c.total_minutes + stmt.inserted.total_minutes)
+    elif connection.dialect.name == 'sqlite':
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(index_elements=list(KEY_COLUMNS),
+                                          set_={'sample_count': table.c.sample_count + stmt.excluded.sample_count,
+                                                'total_minutes': table.c.total_minutes + stmt.excluded.total_minutes})
+    else:
+        raise NotImplementedError(f"ticket_sla_stat upsert is not implemented for {connection.dialect.name}")
+    connection.execute(stmt, rows)
+
+
+def ticket_samples(deltas, ticket, sign=1):
+    """Lahat ng samples ng isang ticket (para sa rebuild at kapag binura ang ticket)."""
+    deltas.add(METRIC_FIRST_RESPONSE, ticket, ticket.first_staff_response_at, sign)
+    if ticket.status == 'Resolved':
+        deltas.add(METRIC_RESOLUTION, ticket, ticket.resolved_at, sign)
+
+
+# --- Full Rebuild ---
+
+def _sample_source(start=None, end=None):
+    parts = []
+    for model in (Ticket, ArchivedTicket):
+        part = select(model.date_posted, model.service_id, model.school_id, model.status,
+                      model.first_staff_response_at, model.resolved_at)
+        if start is not None:
+            part = part.where(model.date_posted >= start, model.date_posted < end)
+        parts.append(part)
+    return union_all(*parts)
+
+
+def _year_bounds(years):
+    return datetime(min(years), 1, 1), datetime(max(years) + 1, 1, 1)
+
+
+def _computed_samples(years=None):
+    deltas = SlaDeltas()
+    source = _sample_source(*_year_bounds(years)) if years else _sample_source()
+    for row in db.session.execute(source.execution_options(yield_per=5000)):
+        ticket_samples(deltas, row)
+    return deltas.rows()
+
+
+def rebuild_sla_stats(years=None):
+    """Recomputes the turnaround histograms from the ticket and archive tables (lahat, o ang mga napiling taon lang).
+
+    Returns the number of buckets written.
+    """
+    table = TicketSlaStat.__table__
+    clear = delete(table)
+    if years:
+        clear = clear.where(table.c.year.between(min(years), max(years)))
+    rows = _computed_samples(years)
+    db.session.execute(clear)
+    if rows:
+        db.session.execute(insert(table), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def verify_sla_stats(year):
+    """Returns the buckets of the given year whose stored count differs from the tickets: {key: (stored, actual)}."""
+    actual = {tuple(row[name] for name in KEY_COLUMNS): row['sample_count'] for row in _computed_samples([year])}
+    stored = {tuple(row[:5]): row[5] for row in db.session.execute(
+        select(*[TicketSlaStat.__table__.c[name] for name in KEY_COLUMNS], TicketSlaStat.sample_count)
+        .where(TicketSlaStat.year == year, TicketSlaStat.sample_count != 0))}
+    return {key: (stored.get(key, 0), actual.get(key, 0))
+            for key in stored.keys() | actual.keys() if stored.get(key, 0) != actual.get(key, 0)}
+
+
+# --- Percentiles ---
+
+def percentile(histogram, pct):
+    """Tantyang percentile (minutes) mula sa {bucket: count}; None kapag walang samples."""
+    total = sum(histogram.values())
+    if total <= 0:
+        return None
+    target = total * pct / 100
+    seen = 0
+    for bucket in sorted(histogram):
+        count = histogram[bucket]
+        if count <= 0:
+            continue
+        lower = BUCKET_BOUNDS_MINUTES[bucket - 1] if bucket > 0 else 0
+        if bucket >= len(BUCKET_BOUNDS_MINUTES):
+            return lower # Open-ended na huling bucket
+        if seen + count >= target:
+            upper = BUCKET_BOUNDS_MINUTES[bucket]
+            return lower + (upper - lower) * (target - seen) / count
+        seen += count
+    return None
+
+
+def _turnaround(histogram, total_minutes):
+    count = sum(histogram.values())
+    result = {'count': count, 'mean': round(total_minutes / count) if count else None}
+    for pct in PERCENTILES:
+        value = percentile(histogram, pct)
+        result[f'p{pct}'] = round(value) if value is not None else None
+    return result
+
+
+def turnaround_summary(year):
+    """First response and resolution percentiles (minutes) per service, per school at overall.
+
+    Isang query lang sa ticket_sla_stat; ang laki ng resulta ay nakadepende sa bilang
+    ng services/schools/buckets, hindi sa bilang ng tickets. JSON-serializable.
+    """
+    rows = db.session.execute(
+        select(TicketSlaStat.metric, Service.name, Department.name, School.name, TicketSlaStat.bucket,
+               TicketSlaStat.sample_count, TicketSlaStat.total_minutes)
+        .join(Service, Service.id == TicketSlaStat.service_id)
+        .join(Department, Department.id == Service.department_id)
+        .outerjoin(School, School.id == TicketSlaStat.school_id)
+        .where(TicketSlaStat.year == year, TicketSlaStat.sample_count != 0)
+    ).all()
+
+    # Magkapareho ang pangalan ng services sa magkaibang departments: isama ang department sa label
+    service_departments = {}
+    for _metric, service_name, dept_name, _school, _bucket, _count, _total in rows:
+        service_departments.setdefault(service_name, set()).add(dept_name)
+
+    # groups[group][label][metric] = [histogram, total_minutes]
+    groups = {'services': {}, 'schools': {}, 'overall': {}}
+    for metric, service_name, dept_name, school_name, bucket, count, total in rows:
+        service_label = service_name if len(service_departments[service_name]) == 1 else f"{service_name} ({dept_name})"
+        for group, label in (('services', service_label), ('schools', school_name or NO_SCHOOL_LABEL), ('overall', 'All')):
+            entry = groups[group].setdefault(label, {}).setdefault(metric, [{}, 0])
+            entry[0][bucket] = entry[0].get(bucket, 0) + count
+            entry[1] += total
+
+    def build(group):
+        return {label: {metric: _turnaround(*metrics.get(metric, ({}, 0))) for metric in METRICS}
+                for label, metrics in groups[group].items()}
+
+    services, schools = build('services'), build('schools')
+    overall = build('overall').get('All') or {metric: _turnaround({}, 0) for metric in METRICS}
+    return {
+        'year': year,
+        'metrics': list(METRICS),
+        'percentiles': list(PERCENTILES),
+        'overall': overall,
+        'services': {label: services[label] for label in sorted(services)},
+        'schools': {label: schools[label] for label in sorted(schools, key=lambda name: (name == NO_SCHOOL_LABEL, name))},
+    }
+
+
+def format_minutes(minutes):
+    """Jinja filter: 95 -> '1h 35m', 3000 -> '2d 2h'."""
+    if minutes is None:
+        return '—'
+    minutes = int(minutes)
+    days, rest = divmod(minutes, 1440)
+    hours, mins = divmod(rest, 60)
+    if days:
+        return f"{days}d {hours}h" if hours else f"{days}d"
+    if hours:
+        return f"{hours}h {mins}m" if mins else f"{hours}h"
+    return f"{mins}m"
+
+
+# --- Setup ---
+
+def init_ticket_sla(app):
+    """Registers the 'duration' Jinja filter used by the turnaround tables."""
+    app.jinja_env.filters['duration'] = format_minutes
@@ -0,0 +1,217 @@
+# eservices_app/ticket_stats.py
+
+# Precomputed aggregates para sa yearly summary report ('main.summary').
+#
+# Ang 'ticket_monthly_stat' table ay may bilang ng tickets per
+# (year, month, department, service, school). Ang report ay nagbabasa lang dito
+# (ilang libong rows lang kada taon) at hindi na nag-i-scan ng ticket table.
+#
+# Incremental refresh: sa bawat flush na may bagong Ticket, na-delete na Ticket,
+# o Ticket na nabago ang date_posted/department/service/school, ang +1/-1 ay
+# ina-upsert sa parehong transaction (kaya kasama sa rollback). Ang status ay
+# hindi kasama sa key, kaya walang epekto ang bulk status/assignment updates.
+# Kasama ang archived tickets, kaya ang archive job (move lang) ay walang epekto.
+#
+# Ang Core/bulk inserts o deletes sa ticket table (e.g. 'flask seed-load') ay hindi
+# dumadaan dito; pagkatapos ng mga iyon, patakbuhin ang 'flask refresh-ticket-stats'.
+
+from datetime import datetime
+
+from sqlalchemy import select, delete, insert, func, extract, union_all, event, literal, inspect
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from . import db
+from .models import Ticket, ArchivedTicket, TicketMonthlyStat, Department, Service, School
+
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+          'August', 'September', 'October', 'November', 'December']
+QUARTERS = ['Q1', 'Q2', 'Q3', 'Q4']
+NO_SCHOOL = 0
+NO_SCHOOL_LABEL = 'No School / Office'
+KEY_ATTRIBUTES = ('date_posted', 'department_id', 'service_id', 'school_id')
+KEY_COLUMNS = ('year', 'month', 'department_id', 'service_id', 'school_id')
+
+
+def _stat_key(date_posted, department_id, service_id, school_id):
+    return (date_posted.year, date_posted.month, department_id, service_id, school_id or NO_SCHOOL)
+
+
+# --- Incremental Refresh (SQLAlchemy session events) ---
+
+def _deltas(flush_context):
+    return flush_context.attributes.setdefault('ticket_stats_deltas', {})
+
+
+def _add_delta(deltas, key, amount):
+    deltas[key] = deltas.get(key, 0) + amount
+
+
+def _collect_deleted_tickets(session, flush_context, instances):
+    # Sa before_flush pa kinukuha (pwede pang i-load ang expired na attributes)
+    deltas = _deltas(flush_context)
+    for obj in session.deleted:
+        if isinstance(obj, Ticket):
+            _add_delta(deltas, _stat_key(*(getattr(obj, name) for name in KEY_ATTRIBUTES)), -1)
+
+
+def _previous_value(obj, name):
+    history = inspect(obj).attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    return history.unchanged[0] if history.unchanged else getattr(obj, name)
+
+
+def _apply_ticket_deltas(session, flush_context):
+    deltas = _deltas(flush_context)
+    for obj in session.new:
+        if isinstance(obj, Ticket):
+            _add_delta(deltas, _stat_key(*(getattr(obj, name) for name in KEY_ATTRIBUTES)), 1)
+    for obj in session.dirty:
+        if isinstance(obj, Ticket) and obj not in session.deleted:
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in KEY_ATTRIBUTES):
+                _add_delta(deltas, _stat_key(*(_previous_value(obj, name) for name in KEY_ATTRIBUTES)), -1)
+                _add_delta(deltas, _stat_key(*(getattr(obj, name) for name in KEY_ATTRIBUTES)), 1)
+    rows = [dict(zip(KEY_COLUMNS, key), ticket_count=amount) for key, amount in deltas.items() if amount]
+    deltas.clear()
+    if rows:
+        upsert_ticket_counts(session.connection(), rows)
+
+
+def upsert_ticket_counts(connection, rows):
+    """Adds each row's ticket_count to its (year, month, department, service, school) bucket."""
+    table = TicketMonthlyStat.__table__
+    if connection.dialect.name == 'mysql':
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update(ticket_count=table.c.ticket_count + stmt.inserted.ticket_count)
+    elif connection.dialect.name == 'sqlite':
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(index_elements=list(KEY_COLUMNS),
+                                          set_={'ticket_count': table.c.ticket_count + stmt.excluded.ticket_count})
+    else:
+        raise NotImplementedError(f"ticket_monthly_stat upsert is not implemented for {connection.dialect.name}")
+    connection.execute(stmt, rows)
+
+
+# --- Full Rebuild ---
+
+def ticket_counts_select(start=None, end=None):
+    """SELECT ng bilang ng tickets (hot + archive) per bucket, para sa rebuild at verification."""
+    parts = []
+    for model in (Ticket, ArchivedTicket):
+        part = select(extract('year', model.date_posted).label('year'),
+                      extract('month', model.date_posted).label('month'),
+                      model.department_id, model.service_id,
+                      func.coalesce(model.school_id, literal(NO_SCHOOL)).label('school_id'))
+        if start is not None:
+            part = part.where(model.date_posted >= start, model.date_posted < end)
+        parts.append(part)
+    tickets = union_all(*parts).subquery()
+    return (select(tickets.c.year, tickets.c.month, tickets.c.department_id, tickets.c.service_id,
+                   tickets.c.school_id, func.count().label('ticket_count'))
+            .group_by(tickets.c.year, tickets.c.month, tickets.c.department_id, tickets.c.service_id, tickets.c.school_id))
+
+
+def _year_bounds(years):
+    return datetime(min(years), 1, 1), datetime(max(years) + 1, 1, 1)
+
+
+def rebuild_ticket_stats(years=None):
+    """Recomputes the aggregates from the ticket and archive tables (lahat, o ang mga napiling taon lang).
+
+    Returns the number of buckets written.
+    """
+    table = TicketMonthlyStat.__table__
+    clear = delete(table)
+    counts = ticket_counts_select()
+    if years:
+        clear = clear.where(table.c.year.between(min(years), max(years)))
+        counts = ticket_counts_select(*_year_bounds(years))
+    db.session.execute(clear)
+    result = db.session.execute(insert(table).from_select(list(KEY_COLUMNS) + ['ticket_count'], counts))
+    db.session.commit()
+    return result.rowcount
+
+
+def verify_ticket_stats(year):
+    """Returns the buckets of the given year whose stored count differs from the ticket tables: {key: (stored, actual)}."""
+    actual = {tuple(row[:5]): row[5] for row in db.session.execute(ticket_counts_select(*_year_bounds([year])))}
+    stored = {tuple(row[:5]): row[5] for row in db.session.execute(
+        select(*[TicketMonthlyStat.__table__.c[name] for name in KEY_COLUMNS], TicketMonthlyStat.ticket_count)
+        .where(TicketMonthlyStat.year == year, TicketMonthlyStat.ticket_count != 0))}
+    return {key: (stored.get(key, 0), actual.get(key, 0))
+            for key in stored.keys() | actual.keys() if stored.get(key, 0) != actual.get(key, 0)}
+
+
+# --- Report Data ---
+
+def available_years(current_year):
+    years = set(db.session.scalars(select(TicketMonthlyStat.year).distinct()))
+    years.add(current_year)
+    return sorted(years, reverse=True)
+
+
+def yearly_summary(year):
+    """Builds the monthly x department x service x school matrices of one year from the aggregates.
+
+    Isang query lang sa ticket_monthly_stat (naka-join sa names). JSON-serializable
+    ang resulta (ito rin ang '/summary/data' response).
+    """
+    rows = db.session.execute(
+        select(TicketMonthlyStat.month, Department.name, Service.id, Service.name, School.name,
+               TicketMonthlyStat.ticket_count)
+        .join(Department, Department.id == TicketMonthlyStat.department_id)
+        .join(Service, Service.id == TicketMonthlyStat.service_id)
+        .outerjoin(School, School.id == TicketMonthlyStat.school_id)
+        .where(TicketMonthlyStat.year == year, TicketMonthlyStat.ticket_count != 0)
+    ).all()
+
+    # Magkapareho ang pangalan ng services sa magkaibang departments: isama ang department sa label
+    service_names = {}
+    for _month, dept_name, service_id, service_name, _school, _count in rows:
+        service_names.setdefault(service_name, set()).add(dept_name)
+
+    by_department, by_service, service_department = {}, {}, {}
+    school_monthly, school_by_department = {}, {}
+    monthly_totals = [0] * 12
+    for month, dept_name, service_id, service_name, school_name, count in rows:
+        index = month - 1
+        label = service_name if len(service_names[service_name]) == 1 else f"{service_name} ({dept_name})"
+        school_label = school_name or NO_SCHOOL_LABEL
+        service_department[label] = dept_name
+        by_department.setdefault(dept_name, [0] * 12)[index] += count
+        by_service.setdefault(label, [0] * 12)[index] += count
+        school_monthly.setdefault(school_label, [0] * 12)[index] += count
+        per_dept = school_by_department.setdefault(school_label, {})
+        per_dept[dept_name] = per_dept.get(dept_name, 0) + count
+        monthly_totals[index] += count
+
+    departments = sorted(by_department)
+    service_types = sorted(by_service, key=lambda label: (service_department[label], label))
+    return {
+        'year': year,
+        'months': MONTHS,
+        'quarters': QUARTERS,
+        'departments': departments,
+        'service_types': service_types,
+        'service_departments': service_department,
+        'schools': sorted(school_monthly, key=lambda name: (name == NO_SCHOOL_LABEL, name)),
+        'by_department': by_department,
+        'by_service': by_service,
+        'school_monthly': school_monthly,
+        'school_by_department': school_by_department,
+        'monthly_totals': monthly_totals,
+        'quarterly_totals': {q: sum(monthly_totals[i * 3:i * 3 + 3]) for i, q in enumerate(QUARTERS)},
+        'grand_total': sum(monthly_totals),
+    }
+
+
+# --- Setup ---
+
+def init_ticket_stats(app):
+    """Registers the session listeners that keep ticket_monthly_stat up to date."""
+    if not event.contains(Session, 'after_flush', _apply_ticket_deltas):
+        event.listen(Session, 'before_flush', _collect_deleted_tickets)
+        event.listen(Session, 'after_flush', _apply_ticket_deltas)
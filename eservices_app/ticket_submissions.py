@@ -0,0 +1,179 @@
+# eservices_app/ticket_submissions.py
+
+# Idempotent na pag-submit ng bagong ticket (create_ticket_form).
+#
+# Sa mabagal na connection, nagdo-double-click o nagre-refresh ang requester
+# pagkatapos ng timeout; dati, dalawang beses nase-save ang files at dalawa ang
+# ticket number at confirmation email. Ngayon, bago ang uploads at inserts, kini-
+# "claim" ng request ang submission sa 'ticket_submission' gamit ang dalawang keys:
+#   - token: hidden submission_token ng form (bagong value bawat GET). Tumutugma sa
+#     refresh/resubmit ng parehong POST (TICKET_SUBMISSION_TOKEN_TTL).
+#   - fingerprint: sha256 ng requester, service, school at details (kasama ang
+#     filename at size ng attachments). Tumutugma sa parehong request mula sa bagong
+#     bukas na form (TICKET_SUBMISSION_FINGERPRINT_TTL, mas maikli).
+# Primary key ang key, kaya isa lang ang mananalo kapag sabay ang dalawang POST.
+# Ang duplicate ay naghihintay (hanggang TICKET_SUBMISSION_WAIT_SECONDS) sa ticket
+# number ng original at iyon ang ibinabalik; walang uploads, inserts o emails.
+#
+# Ang token na may ibang fingerprint (e.g. nag-Back at nag-fill ng ibang request sa
+# parehong page) ay hindi duplicate. Kapag pumalya ang original, binubura ang claim
+# para pwedeng i-retry. Ang expired rows ay hindi na binibilang at pana-panahong
+# binubura gamit ang index sa expires_at.
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app, g, has_request_context
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import secure_filename
+
+from . import db
+from .models import TicketSubmission
+
+TOKEN_PREFIX = 'token:'
+FINGERPRINT_PREFIX = 'fp:'
+POLL_INTERVAL = 0.25 # seconds
+_TOKEN_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+_purge_lock = threading.Lock()
+_last_purge = 0.0
+
+
+def new_submission_token():
+    """Default ng submission_token field (GeneralTicketForm).
+
+    Naka-save din sa g.submission_token para mapalitan ng placeholder ng page cache.
+    """
+    token = uuid.uuid4().hex
+    if has_request_context():
+        g.submission_token = token
+    return token
+
+
+def submission_fingerprint(service_id, form, details, files):
+    """sha256 ng laman ng request: requester, service, school, details at attachments (filename + size)."""
+    attachments = {}
+    for field_name, file in files.items():
+        file.seek(0, os.SEEK_END); size = file.tell(); file.seek(0)
+        attachments[field_name] = [secure_filename(file.filename), size]
+    payload = {
+        'service': service_id,
+        'email': (form.requester_email.data or '').strip().lower(),
+        'name': ' '.join((form.requester_name.data or '').split()).lower(),
+        'contact': (form.requester_contact.data or '').strip(),
+        'school': form.school.data,
+        'details': details,
+        'attachments': attachments,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class SubmissionClaim:
+    """Keys ng isang submission; duplicate_of ay ang ticket number ng original (o None kung pending pa)."""
+
+    def __init__(self, token, fingerprint):
+        self.fingerprint = fingerprint
+        self.token_key = TOKEN_PREFIX + token if token and _TOKEN_PATTERN.match(token) else None
+        self.fingerprint_key = FINGERPRINT_PREFIX + fingerprint
+        self.keys = []
+        self.duplicate = False
+        self.duplicate_of = None
+
+    def _lookup(self, now):
+        """Hindi pa expired na rows na tumutugma (token na may parehong fingerprint, o ang fingerprint)."""
+        candidates = [key for key in (self.token_key, self.fingerprint_key) if key]
+        rows = TicketSubmission.query.filter(TicketSubmission.key.in_(candidates),
+                                             TicketSubmission.expires_at > now).all()
+        return [row for row in rows if row.fingerprint == self.fingerprint], rows
+
+    def _record(self, rows):
+        self.duplicate = True
+        self.duplicate_of = next((row.ticket_number for row in rows if row.ticket_number), None)
+
+
+def claim_submission(token, fingerprint):
+    """Kini-claim ang submission bago ang uploads; claim.duplicate = True kapag may nauna na."""
+    config = current_app.config
+    claim = SubmissionClaim(token, fingerprint)
+    now = datetime.utcnow()
+    matches, rows = claim._lookup(now)
+    if matches:
+        claim._record(matches)
+        return claim
+
+    # Stale token (ibang fingerprint, hindi pa expired): fingerprint lang ang iki-claim
+    stale_token = any(row.key == claim.token_key for row in rows)
+    ttls = {claim.fingerprint_key: config['TICKET_SUBMISSION_FINGERPRINT_TTL']}
+    if claim.token_key and not stale_token:
+        ttls[claim.token_key] = config['TICKET_SUBMISSION_TOKEN_TTL']
+    try:
+        db.session.execute(delete(TicketSubmission).where(TicketSubmission.key.in_(list(ttls)),
+                                                          TicketSubmission.expires_at <= now))
+        for key, ttl in ttls.items():
+            db.session.add(TicketSubmission(key=key, fingerprint=fingerprint, created_at=now,
+                                            expires_at=now + timedelta(seconds=ttl)))
+        db.session.commit()
+    except IntegrityError:
+        # Sabay na POST ang nakauna
+        db.session.rollback()
+        matches, _rows = claim._lookup(now)
+        claim._record(matches)
+        return claim
+    claim.keys = list(ttls)
+    _purge_expired(now)
+    return claim
+
+
+def complete_submission(claim, ticket_number):
+    """Idinudugtong sa transaction ng ticket insert (ang caller ang magko-commit)."""
+    if claim.keys:
+        db.session.execute(update(TicketSubmission).where(TicketSubmission.key.in_(claim.keys))
+                           .values(ticket_number=ticket_number))
+
+
+def release_submission(claim):
+    """Binubura ang claim kapag pumalya ang original, para pwedeng i-retry."""
+    if not claim.keys:
+        return
+    try:
+        db.session.execute(delete(TicketSubmission).where(TicketSubmission.key.in_(claim.keys)))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error releasing ticket submission claim: {e}", exc_info=True)
+
+
+def wait_for_original(claim):
+    """Ticket number ng original; naghihintay habang pending pa ito (None kapag hindi natapos o pumalya)."""
+    deadline = time.monotonic() + current_app.config['TICKET_SUBMISSION_WAIT_SECONDS']
+    while claim.duplicate_of is None and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        db.session.rollback() # Bagong snapshot para makita ang commit ng original
+        matches, _rows = claim._lookup(datetime.utcnow())
+        if not matches:
+            return None # Na-release ang claim (pumalya ang original)
+        claim._record(matches)
+    return claim.duplicate_of
+
+
+def _purge_expired(now):
+    """Binubura ang expired rows, hanggang isang beses bawat TICKET_SUBMISSION_FINGERPRINT_TTL sa worker na ito."""
+    global _last_purge
+    interval = current_app.config['TICKET_SUBMISSION_FINGERPRINT_TTL']
+    with _purge_lock:
+        if time.monotonic() - _last_purge < interval:
+            return
+        _last_purge = time.monotonic()
+    try:
+        db.session.execute(delete(TicketSubmission).where(TicketSubmission.expires_at <= now))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning(f"Could not purge expired ticket submissions: {e}")
@@ -2,8 +2,9 @@
 
 import os
 import json
+import time
 from flask import (Blueprint, render_template, request, redirect,
-                   url_for, flash, current_app, json)
+                   url_for, flash, current_app, json, jsonify)
 from flask_login import login_required, current_user
 from sqlalchemy import case, or_, extract
 from werkzeug.utils import secure_filename
@@ -12,7 +13,8 @@ from datetime import datetime, timezone
 # Import galing sa parent package (eservices_app)
 from .. import db
 from ..models import (User, Department, Service, School, Ticket, Attachment,
-                      CannedResponse, PersonalCannedResponse, Response as TicketResponse)
+                      Response as TicketResponse,
+                      ArchivedTicket, TicketStatusChange)
 # Import *LAHAT* ng ticket forms
 from ..forms import (DepartmentSelectionForm, ServiceSelectionForm, GeneralTicketForm,
                      IssuanceForm, RepairForm, EmailAccountForm, DpdsForm, DcpForm, OtherIctForm,
@@ -21,6 +23,15 @@ from ..forms import (DepartmentSelectionForm, ServiceSelectionForm, GeneralTicke
                      ProvidentFundForm, IcsForm, ResponseForm, UpdateTicketForm)
 # Import email helper functions
 from ..helpers import send_new_ticket_email, send_staff_notification_email, send_resolution_email
+from ..archive import archive_years
+from ..canned_responses import personal_canned_responses, system_canned_responses
+from ..metrics import observe_upload, record_ticket_created, record_tickets_resolved, record_duplicate_submission
+from ..page_cache import cached_page
+from .. import audit
+from ..ticket_assignment import auto_assign
+from ..ticket_submissions import (claim_submission, complete_submission, release_submission,
+                                  submission_fingerprint, wait_for_original)
+from ..ticket_activity import TICKET_VIEWS, apply_ticket_view, record_response, record_status_change, touch
 
 # --- Create Blueprint ---
 # Walang url_prefix dito para manatili ang /my-tickets at /ticket/<id>
@@ -35,6 +46,9 @@ def my_tickets():
     page_active = request.args.get('page_active', 1, type=int)
     page_resolved = request.args.get('page_resolved', 1, type=int)
     search_query = request.args.get('search', '').strip()
+    ticket_view = request.args.get('view', '')
+    if ticket_view not in TICKET_VIEWS:
+        ticket_view = ''
 
     base_query = Ticket.query.filter_by(requester_email=current_user.email)
 
@@ -53,12 +67,32 @@ def my_tickets():
         else_=3
     )
 
-    active_tickets = db.paginate(base_query.filter(Ticket.status.in_(['Open', 'In Progress'])).order_by(status_order, Ticket.date_posted.desc()),
-                                 page=page_active, per_page=current_app.config['TICKETS_PER_PAGE'], error_out=False)
-    resolved_tickets = db.paginate(base_query.filter(Ticket.status == 'Resolved').order_by(Ticket.date_posted.desc()),
-                                   page=page_resolved, per_page=current_app.config['TICKETS_PER_PAGE'], error_out=False)
-
-    return render_template('my_tickets.html', active_tickets=active_tickets, resolved_tickets=resolved_tickets, title='My Tickets', search_query=search_query)
+    # 'recent' / 'awaiting' views: single-table queries sa activity columns (ticket_activity.py)
+    active_query = base_query.filter(Ticket.status.in_(['Open', 'In Progress']))
+    active_query = apply_ticket_view(active_query, ticket_view) or active_query.order_by(status_order, Ticket.date_posted.desc())
+    resolved_query = base_query.filter(Ticket.status == 'Resolved')
+    resolved_query = apply_ticket_view(resolved_query, ticket_view, active=False) or resolved_query.order_by(Ticket.date_posted.desc())
+
+    active_tickets = db.paginate(active_query, page=page_active, per_page=current_app.config['TICKETS_PER_PAGE'], error_out=False)
+    resolved_tickets = db.paginate(resolved_query, page=page_resolved, per_page=current_app.config['TICKETS_PER_PAGE'], error_out=False)
+
+    # --- Archived Tickets (kinukuha lang kapag pumili ang user ng taon na nasa archive) ---
+    archive_year_options = archive_years()
+    archive_year = request.args.get('archive_year', 0, type=int)
+    archived_tickets = None
+    if archive_year in archive_year_options:
+        archived_query = ArchivedTicket.query.options(db.joinedload(ArchivedTicket.service_type)).filter(
+            ArchivedTicket.requester_email == current_user.email,
+            extract('year', ArchivedTicket.date_posted) == archive_year)
+        if search_query:
+            archived_query = archived_query.join(Service, ArchivedTicket.service_id == Service.id).filter(
+                or_(ArchivedTicket.ticket_number.ilike(f"%{search_query}%"), Service.name.ilike(f"%{search_query}%")))
+        archived_tickets = db.paginate(archived_query.order_by(ArchivedTicket.date_posted.desc()),
+                                       page=request.args.get('page_archived', 1, type=int),
+                                       per_page=current_app.config['TICKETS_PER_PAGE'], error_out=False)
+
+    return render_template('my_tickets.html', active_tickets=active_tickets, resolved_tickets=resolved_tickets, title='My Tickets', search_query=search_query, ticket_view=ticket_view,
+                           archive_year_options=archive_year_options, archive_year=archive_year, archived_tickets=archived_tickets)
 
 
 # === TICKET DETAIL (User and Staff/Admin) ===
@@ -90,18 +124,7 @@ def ticket_detail(ticket_id):
             return redirect(url_for('main.home'))
         form = ResponseForm()
 
-    # Canned Response Query
-    system_canned_responses = []
-    personal_canned_responses = []
-    if is_staff_or_admin:
-        system_canned_responses = CannedResponse.query.filter(
-            CannedResponse.department_id == ticket.department_id,
-            or_(
-                CannedResponse.service_id == ticket.service_id,
-                CannedResponse.service_id == None
-            )
-        ).order_by(CannedResponse.service_id.desc(), CannedResponse.title).all()
-        personal_canned_responses = PersonalCannedResponse.query.filter_by(user_id=current_user.id).order_by(PersonalCannedResponse.title).all()
+    # Ang canned responses ay kinukuha ng composer sa unang focus (tingnan ang canned_responses_json)
 
     if form.validate_on_submit():
         if ticket.status == 'Resolved' and not is_staff_or_admin:
@@ -150,15 +173,22 @@ def ticket_detail(ticket_id):
 
             if file_to_save_object and filename_to_save_in_db:
                 save_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename_to_save_in_db)
+                upload_start = time.perf_counter()
                 file_to_save_object.save(save_path)
+                observe_upload(os.path.getsize(save_path), time.perf_counter() - upload_start)
                 current_app.logger.info(f"Saved attachment: {filename_to_save_in_db} for ticket {ticket_id}")
                 db.session.add(Attachment(filename=filename_to_save_in_db, ticket_id=ticket.id))
+                touch(ticket)
+                audit.record_event(audit.TICKET_ATTACHMENT_ADDED, ticket, filename=filename_to_save_in_db)
 
             if form.body.data and form.body.data.strip():
                 # Check kung staff/admin form para kunin ang is_internal
                 is_internal = form.is_internal.data if hasattr(form, 'is_internal') else False
                 new_response = TicketResponse(body=form.body.data, user_id=current_user.id, ticket_id=ticket.id, is_internal=is_internal)
                 db.session.add(new_response)
+                record_response(ticket, staff_reply=is_staff_or_admin and not is_internal)
+                audit.record_event(audit.TICKET_INTERNAL_NOTE if is_internal else audit.TICKET_REPLIED, ticket,
+                                   excerpt=audit.excerpt(form.body.data))
                 response_was_added = True
                 new_response_object = new_response
 
@@ -166,12 +196,14 @@ def ticket_detail(ticket_id):
                 old_status = ticket.status
                 new_status = form.status.data
                 if old_status != new_status:
-                    ticket.status = new_status
+                    record_status_change(ticket, new_status, changed_by_id=current_user.id)
+                    audit.record_event(audit.TICKET_STATUS_CHANGED, ticket, from_status=old_status, to_status=new_status)
                     status_was_changed = True
                     current_app.logger.info(f"Ticket {ticket_id} status changed: '{old_status}' -> '{new_status}' by {current_user.email}")
 
                 new_staff_id = form.assigned_staff.data
                 if new_staff_id == 0 and ticket.assigned_staff_id is not None:
+                    audit.record_event(audit.TICKET_ASSIGNED, ticket, from_staff_id=ticket.assigned_staff_id, to_staff_id=None)
                     ticket.assigned_staff_id = None
                     assignment_was_changed = True
                     flash('Ticket unassigned.', 'info')
@@ -179,6 +211,8 @@ def ticket_detail(ticket_id):
                 elif new_staff_id != 0 and new_staff_id != ticket.assigned_staff_id:
                     new_staff = db.session.get(User, new_staff_id)
                     if new_staff and new_staff in ticket.service_type.managers:
+                        audit.record_event(audit.TICKET_ASSIGNED, ticket, from_staff_id=ticket.assigned_staff_id,
+                                           to_staff_id=new_staff_id, to_staff_email=new_staff.email)
                         ticket.assigned_staff_id = new_staff_id
                         assignment_was_changed = True
                         flash(f'Ticket assigned to {new_staff.name}.', 'success')
@@ -207,6 +241,8 @@ def ticket_detail(ticket_id):
                         send_staff_notification_email(ticket, new_response_object)
 
             db.session.commit()
+            if status_was_changed and ticket.status == 'Resolved':
+                record_tickets_resolved()
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f"Error saving response/assignment ticket {ticket_id}: {e}", exc_info=True)
@@ -221,12 +257,43 @@ def ticket_detail(ticket_id):
 
     details_pretty = json.dumps(ticket.details, indent=2) if ticket.details else "No additional details."
 
-    return render_template('ticket_detail.html', ticket=ticket, details_pretty=details_pretty, form=form, is_staff_or_admin=is_staff_or_admin, system_canned_responses=system_canned_responses, personal_canned_responses=personal_canned_responses)
+    # Status history (Staff/Admin lang)
+    status_history = []
+    if is_staff_or_admin:
+        status_history = TicketStatusChange.query.options(db.joinedload(TicketStatusChange.changed_by)) \
+            .filter_by(ticket_id=ticket.id).order_by(TicketStatusChange.changed_at).all()
+
+    return render_template('ticket_detail.html', ticket=ticket, details_pretty=details_pretty, form=form, is_staff_or_admin=is_staff_or_admin,
+                           status_history=status_history)
+
+
+@tickets_bp.route('/ticket/<int:ticket_id>/canned-responses')
+@login_required
+def canned_responses_json(ticket_id):
+    """Canned responses para sa reply composer (JSON); ?q= para sa prefix search ng titles."""
+    ticket = db.session.get(Ticket, ticket_id)
+    if not ticket:
+        return jsonify({'error': 'Ticket not found.'}), 404
+    is_staff_or_admin = current_user.role == 'Admin' or (current_user.role == 'Staff' and ticket.service_type in current_user.managed_services)
+    if not is_staff_or_admin:
+        return jsonify({'error': 'Permission denied.'}), 403
+
+    prefix = request.args.get('q', '').strip()
+    limit = current_app.config['CANNED_RESPONSE_SEARCH_LIMIT']
+    sets = {'personal': personal_canned_responses(current_user.id),
+            **system_canned_responses(ticket.department_id, ticket.service_id)}
+    groups, truncated, total = {}, False, 0
+    for name, response_set in sets.items():
+        groups[name], group_truncated = response_set.search(prefix, limit)
+        truncated = truncated or group_truncated
+        total += len(response_set)
+    return jsonify({'groups': groups, 'truncated': truncated, 'total': total, 'q': prefix})
 
 
 # === TICKET CREATION PROCESS ===
 
 @tickets_bp.route('/create-ticket/select-department', methods=['GET'])
+@cached_page
 def select_department():
     DEPARTMENT_ORDER = ["ICT", "Personnel", "Legal Services", "Office of the SDS", "Accounting Unit", "Supply Office"]
     all_departments = Department.query.all()
@@ -235,6 +302,7 @@ def select_department():
     return render_template('select_department.html', departments=ordered_departments, title='Select a Department')
 
 @tickets_bp.route('/create-ticket/select-service/<int:department_id>', methods=['GET'])
+@cached_page
 def select_service(department_id):
     department = db.session.get(Department, department_id)
     if not department:
@@ -242,7 +310,21 @@ def select_service(department_id):
         return redirect(url_for('tickets.select_department')) # Correct redirect
     return render_template('select_service.html', department=department, services=department.services, title=f'Select a Service for {department.name}')
 
+def _duplicate_submission_response(claim):
+    """Sagot sa duplicate na ticket POST: ang ticket number ng original, walang bagong uploads/insert/email."""
+    ticket_number = wait_for_original(claim)
+    record_duplicate_submission('returned' if ticket_number else 'pending')
+    if ticket_number:
+        current_app.logger.info(f"Duplicate submission for ticket {ticket_number} absorbed")
+        flash(f'This request was already submitted. Your ticket number is {ticket_number}.', 'info')
+    else:
+        flash('Your request is still being submitted. Please check your tickets again in a moment.', 'info')
+    if current_user.is_authenticated:
+        return redirect(url_for('tickets.my_tickets'))
+    return redirect(url_for('tickets.select_department'))
+
 @tickets_bp.route('/create-ticket/form/<int:service_id>', methods=['GET', 'POST'])
+@cached_page # Anonymous GET lang (walang laman na form); ang POST ay laging dumadaan sa view
 def create_ticket_form(service_id):
     service = db.session.get(Service, service_id)
     if not service:
@@ -319,6 +401,12 @@ def create_ticket_form(service_id):
                 else:
                     details_data[field.name] = field.data
 
+        # Idempotency: ang double-click/refresh ay ibinabalik ang original na ticket (tingnan ang ticket_submissions.py)
+        claim = claim_submission(form.submission_token.data,
+                                 submission_fingerprint(service.id, form, details_data, files_to_save))
+        if claim.duplicate:
+            return _duplicate_submission_response(claim)
+
         # Save Files and Ticket
         saved_filenames_map = {}
         try:
@@ -327,11 +415,14 @@ def create_ticket_form(service_id):
                 timestamp = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S%f')
                 filename_to_save = f"{timestamp}_{field_name}_{original_filename}"
                 save_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename_to_save)
+                upload_start = time.perf_counter()
                 file_to_save.save(save_path)
+                observe_upload(os.path.getsize(save_path), time.perf_counter() - upload_start)
                 saved_filenames_map[field_name] = filename_to_save
                 current_app.logger.info(f"Saved file: {filename_to_save}")
         except Exception as e:
             current_app.logger.error(f"Error saving files for new ticket: {e}", exc_info=True)
+            release_submission(claim)
             flash('Error saving attachments. Please try again.', 'danger')
             return render_template('create_ticket_form.html', form=form, service=service, title=f'Request for {service.name}')
 
@@ -356,7 +447,14 @@ def create_ticket_form(service_id):
             details=details_data
         )
         try:
+            # Auto-assignment bago i-add (isang INSERT lang, kasama na ang assigned_staff_id)
+            assigned_staff_id, assign_strategy = auto_assign(new_ticket)
             db.session.add(new_ticket)
+            audit.record_event(audit.TICKET_CREATED, new_ticket, requester_email=new_ticket.requester_email, service=service.name)
+            if assigned_staff_id:
+                audit.record_event(audit.TICKET_ASSIGNED, new_ticket, from_staff_id=None, to_staff_id=assigned_staff_id,
+                                   auto=assign_strategy)
+            complete_submission(claim, new_ticket_number)
             db.session.commit() # Commit to get new_ticket.id
             
             # Save Attachment Records
@@ -365,6 +463,9 @@ def create_ticket_form(service_id):
             db.session.commit() # Commit attachments
             
             current_app.logger.info(f"New ticket {new_ticket_number} created by {form.requester_email.data}")
+            if assigned_staff_id:
+                current_app.logger.info(f"Ticket {new_ticket_number} auto-assigned to staff ID {assigned_staff_id} ({assign_strategy})")
+            record_ticket_created(service.department.name)
             send_new_ticket_email(new_ticket)
             flash(f'Ticket created! Confirmation sent. Your ticket number is {new_ticket_number}.', 'success')
             
@@ -375,6 +476,7 @@ def create_ticket_form(service_id):
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f"DB error creating ticket {new_ticket_number}: {e}", exc_info=True)
+            release_submission(claim)
             flash('Database error creating ticket. Please try again.', 'danger')
             # Optional: Delete saved files here
             return render_template('create_ticket_form.html', form=form, service=service, title=f'Request for {service.name}')
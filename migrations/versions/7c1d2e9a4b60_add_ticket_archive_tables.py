@@ -0,0 +1,80 @@
+"""Add archive tables for old resolved tickets
+
+Revision ID: 7c1d2e9a4b60
+Revises: 13e5ede2e0b0
+Create Date: 2025-11-03 09:14:22.108531
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1d2e9a4b60'
+down_revision = '13e5ede2e0b0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('archived_ticket',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('ticket_number', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('date_posted', sa.DateTime(), nullable=False),
+    sa.Column('requester_name', sa.String(length=100), nullable=False),
+    sa.Column('requester_email', sa.String(length=120), nullable=False),
+    sa.Column('requester_contact', sa.String(length=50), nullable=True),
+    sa.Column('details', sa.JSON(), nullable=True),
+    sa.Column('department_id', sa.Integer(), nullable=False),
+    sa.Column('service_id', sa.Integer(), nullable=False),
+    sa.Column('school_id', sa.Integer(), nullable=True),
+    sa.Column('assigned_staff_id', sa.Integer(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['department_id'], ['department.id'], ),
+    sa.ForeignKeyConstraint(['service_id'], ['service.id'], ),
+    sa.ForeignKeyConstraint(['school_id'], ['school.id'], ),
+    sa.ForeignKeyConstraint(['assigned_staff_id'], ['user.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('ticket_number')
+    )
+    with op.batch_alter_table('archived_ticket', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_archived_ticket_date_posted'), ['date_posted'], unique=False)
+        batch_op.create_index(batch_op.f('ix_archived_ticket_requester_email'), ['requester_email'], unique=False)
+
+    op.create_table('archived_attachment',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('filename', sa.String(length=200), nullable=False),
+    sa.Column('ticket_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ticket_id'], ['archived_ticket.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('archived_attachment', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_archived_attachment_ticket_id'), ['ticket_id'], unique=False)
+
+    op.create_table('archived_response',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('is_internal', sa.Boolean(), nullable=False),
+    sa.Column('date_posted', sa.DateTime(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('ticket_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ticket_id'], ['archived_ticket.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('archived_response', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_archived_response_ticket_id'), ['ticket_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('archived_response', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_archived_response_ticket_id'))
+    op.drop_table('archived_response')
+    with op.batch_alter_table('archived_attachment', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_archived_attachment_ticket_id'))
+    op.drop_table('archived_attachment')
+    with op.batch_alter_table('archived_ticket', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_archived_ticket_requester_email'))
+        batch_op.drop_index(batch_op.f('ix_archived_ticket_date_posted'))
+    op.drop_table('archived_ticket')
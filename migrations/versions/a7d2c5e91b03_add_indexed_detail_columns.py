@@ -0,0 +1,43 @@
+"""Add indexed columns for frequently filtered ticket details keys
+
+Revision ID: a7d2c5e91b03
+Revises: f3c9d2e84a61
+Create Date: 2025-11-24 09:37:12.118460
+
+"""
+from alembic import op
+
+from eservices_app.ticket_details import add_detail_columns, drop_detail_columns
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d2c5e91b03'
+down_revision = 'f3c9d2e84a61'
+branch_labels = None
+depends_on = None
+
+# Kopya ng indexed_details ng bawat form class sa revision na ito (forms.py).
+# Ang 'remarks' ay iisang column para sa tatlong forms.
+DETAIL_KEYS_BY_FORM = {
+    'IssuanceForm': ('document_type',),
+    'RepairForm': ('device_type',),
+    'EmailAccountForm': ('remarks',),
+    'DpdsForm': ('remarks',),
+    'LeaveApplicationForm': ('type_of_leave', 'classification'),
+    'CoeForm': ('remarks',),
+    'ServiceRecordForm': ('delivery_method',),
+    'GsisForm': ('employment_status',),
+    'ProvidentFundForm': ('query',),
+}
+
+
+def _keys():
+    return list(dict.fromkeys(key for keys in DETAIL_KEYS_BY_FORM.values() for key in keys))
+
+
+def upgrade():
+    add_detail_columns(op, _keys())
+
+
+def downgrade():
+    drop_detail_columns(op, list(reversed(_keys())))
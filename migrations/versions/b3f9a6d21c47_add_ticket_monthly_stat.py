@@ -0,0 +1,57 @@
+"""Add ticket_monthly_stat aggregates for the yearly summary report
+
+Revision ID: b3f9a6d21c47
+Revises: 7c1d2e9a4b60
+Create Date: 2025-11-10 10:02:37.415290
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f9a6d21c47'
+down_revision = '7c1d2e9a4b60'
+branch_labels = None
+depends_on = None
+
+
+def _tickets_table(name):
+    return sa.table(name,
+                    sa.column('date_posted', sa.DateTime()),
+                    sa.column('department_id', sa.Integer()),
+                    sa.column('service_id', sa.Integer()),
+                    sa.column('school_id', sa.Integer()))
+
+
+def upgrade():
+    stats = op.create_table('ticket_monthly_stat',
+    sa.Column('year', sa.SmallInteger(), autoincrement=False, nullable=False),
+    sa.Column('month', sa.SmallInteger(), autoincrement=False, nullable=False),
+    sa.Column('department_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('service_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('school_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('ticket_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['department_id'], ['department.id'], ),
+    sa.ForeignKeyConstraint(['service_id'], ['service.id'], ),
+    sa.PrimaryKeyConstraint('year', 'month', 'department_id', 'service_id', 'school_id')
+    )
+
+    # Backfill mula sa ticket + archived_ticket (isang INSERT ... SELECT ... GROUP BY)
+    parts = []
+    for name in ('ticket', 'archived_ticket'):
+        tickets = _tickets_table(name)
+        parts.append(sa.select(sa.extract('year', tickets.c.date_posted).label('year'),
+                               sa.extract('month', tickets.c.date_posted).label('month'),
+                               tickets.c.department_id, tickets.c.service_id,
+                               sa.func.coalesce(tickets.c.school_id, 0).label('school_id')))
+    all_tickets = sa.union_all(*parts).subquery()
+    keys = [all_tickets.c.year, all_tickets.c.month, all_tickets.c.department_id, all_tickets.c.service_id, all_tickets.c.school_id]
+    op.execute(stats.insert().from_select(
+        ['year', 'month', 'department_id', 'service_id', 'school_id', 'ticket_count'],
+        sa.select(*keys, sa.func.count()).group_by(*keys)
+    ))
+
+
+def downgrade():
+    op.drop_table('ticket_monthly_stat')
@@ -0,0 +1,42 @@
+"""Add staff_ticket_load counters for auto-assignment
+
+Revision ID: c4e8b1f6a2d9
+Revises: a7d2c5e91b03
+Create Date: 2025-11-26 14:08:51.302716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8b1f6a2d9'
+down_revision = 'a7d2c5e91b03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('staff_ticket_load',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('open_count', sa.Integer(), nullable=False),
+    sa.Column('last_auto_assigned_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.create_index('ix_ticket_service_id_school_id', ['service_id', 'school_id'], unique=False)
+
+    # Kasalukuyang load: hindi pa Resolved na tickets bawat naka-assign na staff
+    op.execute(
+        "INSERT INTO staff_ticket_load (user_id, open_count) "
+        "SELECT assigned_staff_id, COUNT(*) FROM ticket "
+        "WHERE assigned_staff_id IS NOT NULL AND status != 'Resolved' "
+        "GROUP BY assigned_staff_id"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.drop_index('ix_ticket_service_id_school_id')
+
+    op.drop_table('staff_ticket_load')
@@ -0,0 +1,99 @@
+"""Add denormalized activity columns to ticket and archived_ticket
+
+Revision ID: d5e8c3a17f92
+Revises: b3f9a6d21c47
+Create Date: 2025-11-14 08:41:05.207316
+
+"""
+from alembic import op, context
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e8c3a17f92'
+down_revision = 'b3f9a6d21c47'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+# (ticket table, response table) pairs na kailangang i-backfill
+TABLES = (('ticket', 'response'), ('archived_ticket', 'archived_response'))
+
+
+def _add_columns(table_name):
+    with op.batch_alter_table(table_name, schema=None) as batch_op:
+        # Nullable muna; gagawing NOT NULL pagkatapos ng backfill
+        batch_op.add_column(sa.Column('last_activity_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('response_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('first_staff_response_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('resolved_at', sa.DateTime(), nullable=True))
+
+
+def _backfill_values(tickets, responses, users):
+    """Correlated subqueries mula sa responses ng bawat ticket."""
+    of_ticket = responses.c.ticket_id == tickets.c.id
+    last_response_at = sa.select(sa.func.max(responses.c.date_posted)).where(of_ticket).scalar_subquery()
+    last_activity_at = sa.func.coalesce(last_response_at, tickets.c.date_posted)
+    return {
+        'last_activity_at': last_activity_at,
+        'response_count': sa.select(sa.func.count()).select_from(responses).where(of_ticket).scalar_subquery(),
+        'first_staff_response_at': sa.select(sa.func.min(responses.c.date_posted))
+            .join(users, users.c.id == responses.c.user_id)
+            .where(of_ticket, responses.c.is_internal == sa.false(), users.c.role.in_(['Admin', 'Staff']))
+            .scalar_subquery(),
+        # Walang talaan kung kailan na-Resolve; ang huling activity ang pinakamalapit na tantya
+        'resolved_at': sa.case((tickets.c.status == 'Resolved', last_activity_at), else_=None),
+    }
+
+
+def _backfill(table_name, response_table_name):
+    tickets = sa.table(table_name, sa.column('id', sa.Integer()), sa.column('status', sa.String()),
+                       sa.column('date_posted', sa.DateTime()), sa.column('last_activity_at', sa.DateTime()),
+                       sa.column('response_count', sa.Integer()), sa.column('first_staff_response_at', sa.DateTime()),
+                       sa.column('resolved_at', sa.DateTime()))
+    responses = sa.table(response_table_name, sa.column('ticket_id', sa.Integer()), sa.column('user_id', sa.Integer()),
+                         sa.column('is_internal', sa.Boolean()), sa.column('date_posted', sa.DateTime()))
+    users = sa.table('user', sa.column('id', sa.Integer()), sa.column('role', sa.String()))
+    update = tickets.update().values(**_backfill_values(tickets, responses, users))
+
+    if context.is_offline_mode():
+        # --sql: isang UPDATE lang (walang data para hatiin sa batches)
+        op.execute(update)
+        return
+
+    # Batches ayon sa id range, para maiksi ang bawat UPDATE (at ang locks nito)
+    bind = op.get_bind()
+    low, high = bind.execute(sa.select(sa.func.min(tickets.c.id), sa.func.max(tickets.c.id))).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, BACKFILL_BATCH_SIZE):
+        bind.execute(update.where(tickets.c.id >= start, tickets.c.id < start + BACKFILL_BATCH_SIZE))
+
+
+def upgrade():
+    for table_name, response_table_name in TABLES:
+        _add_columns(table_name)
+        _backfill(table_name, response_table_name)
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.alter_column('last_activity_at', existing_type=sa.DateTime(), nullable=False)
+            batch_op.alter_column('response_count', existing_type=sa.Integer(), nullable=False)
+
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.create_index('ix_ticket_requester_email_last_activity_at', ['requester_email', 'last_activity_at'], unique=False)
+        batch_op.create_index('ix_ticket_last_activity_at', ['last_activity_at'], unique=False)
+        batch_op.create_index('ix_ticket_status_first_staff_response_at', ['status', 'first_staff_response_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.drop_index('ix_ticket_status_first_staff_response_at')
+        batch_op.drop_index('ix_ticket_last_activity_at')
+        batch_op.drop_index('ix_ticket_requester_email_last_activity_at')
+
+    for table_name, _response_table_name in reversed(TABLES):
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.drop_column('resolved_at')
+            batch_op.drop_column('first_staff_response_at')
+            batch_op.drop_column('response_count')
+            batch_op.drop_column('last_activity_at')
@@ -0,0 +1,92 @@
+"""Add ticket status history and turnaround (SLA) histograms
+
+Revision ID: e1a4f7b90c38
+Revises: d5e8c3a17f92
+Create Date: 2025-11-18 13:26:44.581903
+
+"""
+from bisect import bisect_left
+
+from alembic import op, context
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1a4f7b90c38'
+down_revision = 'd5e8c3a17f92'
+branch_labels = None
+depends_on = None
+
+# Kopya ng ticket_sla.BUCKET_BOUNDS_MINUTES sa revision na ito
+BUCKET_BOUNDS_MINUTES = (15, 30, 60, 120, 240, 480, 720, 1440, 2160, 2880, 4320, 5760, 7200,
+                         10080, 14400, 20160, 30240, 43200, 64800, 129600)
+
+
+def _add_sample(samples, metric, row, event_at):
+    if event_at is None:
+        return
+    minutes = max(0, round((event_at - row.date_posted).total_seconds() / 60))
+    key = (row.date_posted.year, metric, row.service_id, row.school_id or 0, bisect_left(BUCKET_BOUNDS_MINUTES, minutes))
+    count, total = samples.get(key, (0, 0))
+    samples[key] = (count + 1, total + minutes)
+
+
+def _backfill_sla_stats(stats):
+    """Histograms mula sa activity columns ng ticket at archived_ticket (sa Python, para pareho sa MySQL at SQLite)."""
+    samples = {}
+    bind = op.get_bind()
+    for name in ('ticket', 'archived_ticket'):
+        tickets = sa.table(name, sa.column('date_posted', sa.DateTime()), sa.column('service_id', sa.Integer()),
+                           sa.column('school_id', sa.Integer()), sa.column('status', sa.String()),
+                           sa.column('first_staff_response_at', sa.DateTime()), sa.column('resolved_at', sa.DateTime()))
+        for row in bind.execute(sa.select(tickets).execution_options(yield_per=5000)):
+            _add_sample(samples, 'first_response', row, row.first_staff_response_at)
+            if row.status == 'Resolved':
+                _add_sample(samples, 'resolution', row, row.resolved_at)
+    rows = [{'year': year, 'metric': metric, 'service_id': service_id, 'school_id': school_id, 'bucket': bucket,
+             'sample_count': count, 'total_minutes': total}
+            for (year, metric, service_id, school_id, bucket), (count, total) in samples.items()]
+    if rows:
+        op.bulk_insert(stats, rows)
+
+
+def upgrade():
+    op.create_table('ticket_status_change',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('ticket_id', sa.Integer(), nullable=False),
+    sa.Column('from_status', sa.String(length=20), nullable=False),
+    sa.Column('to_status', sa.String(length=20), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.Column('changed_by_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['changed_by_id'], ['user.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('ticket_status_change', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_ticket_status_change_changed_at'), ['changed_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_ticket_status_change_ticket_id'), ['ticket_id'], unique=False)
+
+    stats = op.create_table('ticket_sla_stat',
+    sa.Column('year', sa.SmallInteger(), autoincrement=False, nullable=False),
+    sa.Column('metric', sa.String(length=20), nullable=False),
+    sa.Column('service_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('school_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('bucket', sa.SmallInteger(), autoincrement=False, nullable=False),
+    sa.Column('sample_count', sa.Integer(), nullable=False),
+    sa.Column('total_minutes', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['service_id'], ['service.id'], ),
+    sa.PrimaryKeyConstraint('year', 'metric', 'service_id', 'school_id', 'bucket')
+    )
+
+    # Walang status history bago ang revision na ito; ang histograms ay mula sa
+    # activity columns. Sa --sql mode, patakbuhin ang 'flask refresh-sla-stats' pagkatapos.
+    if not context.is_offline_mode():
+        _backfill_sla_stats(stats)
+
+
+def downgrade():
+    op.drop_table('ticket_sla_stat')
+    with op.batch_alter_table('ticket_status_change', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_ticket_status_change_ticket_id'))
+        batch_op.drop_index(batch_op.f('ix_ticket_status_change_changed_at'))
+
+    op.drop_table('ticket_status_change')
@@ -0,0 +1,46 @@
+"""Add staff notification preferences and notification_event digest queue
+
+Revision ID: e1f5a3c7d920
+Revises: c4e8b1f6a2d9
+Create Date: 2025-11-28 10:41:17.552903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1f5a3c7d920'
+down_revision = 'c4e8b1f6a2d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('notify_mode', sa.String(length=20), server_default='digest', nullable=False))
+        batch_op.add_column(sa.Column('notify_digest_minutes', sa.Integer(), nullable=True))
+
+    op.create_table('notification_event',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('recipient_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('kind', sa.String(length=40), nullable=False),
+    sa.Column('ticket_id', sa.Integer(), nullable=True),
+    sa.Column('ticket_number', sa.String(length=20), nullable=True),
+    sa.Column('summary', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['recipient_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('notification_event', schema=None) as batch_op:
+        batch_op.create_index('ix_notification_event_recipient_id_created_at', ['recipient_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notification_event', schema=None) as batch_op:
+        batch_op.drop_index('ix_notification_event_recipient_id_created_at')
+
+    op.drop_table('notification_event')
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('notify_digest_minutes')
+        batch_op.drop_column('notify_mode')
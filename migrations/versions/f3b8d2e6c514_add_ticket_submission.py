@@ -0,0 +1,36 @@
+"""Add ticket_submission idempotency keys
+
+Revision ID: f3b8d2e6c514
+Revises: e1f5a3c7d920
+Create Date: 2025-12-01 09:12:44.618230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8d2e6c514'
+down_revision = 'e1f5a3c7d920'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ticket_submission',
+    sa.Column('key', sa.String(length=80), nullable=False),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('ticket_number', sa.String(length=20), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    with op.batch_alter_table('ticket_submission', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_ticket_submission_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('ticket_submission', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_ticket_submission_expires_at'))
+
+    op.drop_table('ticket_submission')
@@ -0,0 +1,48 @@
+"""Add append-only audit_event table
+
+Revision ID: f3c9d2e84a61
+Revises: e1a4f7b90c38
+Create Date: 2025-11-20 10:12:37.406219
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c9d2e84a61'
+down_revision = 'e1a4f7b90c38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('audit_event',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(), nullable=False),
+    sa.Column('action', sa.String(length=40), nullable=False),
+    sa.Column('actor_id', sa.Integer(), nullable=True),
+    sa.Column('actor_email', sa.String(length=120), nullable=True),
+    sa.Column('ticket_id', sa.Integer(), nullable=True),
+    sa.Column('ticket_number', sa.String(length=20), nullable=True),
+    sa.Column('details', sa.JSON(), nullable=True),
+    sa.Column('request_id', sa.String(length=64), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('audit_event', schema=None) as batch_op:
+        batch_op.create_index('ix_audit_event_occurred_at', ['occurred_at'], unique=False)
+        batch_op.create_index('ix_audit_event_ticket_id_occurred_at', ['ticket_id', 'occurred_at'], unique=False)
+        batch_op.create_index('ix_audit_event_ticket_number_occurred_at', ['ticket_number', 'occurred_at'], unique=False)
+        batch_op.create_index('ix_audit_event_actor_email_occurred_at', ['actor_email', 'occurred_at'], unique=False)
+        batch_op.create_index('ix_audit_event_action_occurred_at', ['action', 'occurred_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('audit_event', schema=None) as batch_op:
+        batch_op.drop_index('ix_audit_event_action_occurred_at')
+        batch_op.drop_index('ix_audit_event_actor_email_occurred_at')
+        batch_op.drop_index('ix_audit_event_ticket_number_occurred_at')
+        batch_op.drop_index('ix_audit_event_ticket_id_occurred_at')
+        batch_op.drop_index('ix_audit_event_occurred_at')
+
+    op.drop_table('audit_event')